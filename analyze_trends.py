@@ -9,229 +9,471 @@
 - reports/trends/companies.json: 企業出現頻度の時系列データ
 - reports/trends/categories.json: カテゴリ分布の時系列データ
 - reports/trends/summary.json: 週次サマリーのメタデータ
+- reports/trends/digest.json: 分析レポート用のトレンドダイジェスト（直近の上位・前週比・新規出現）
+
+時系列データは既定でv2（共有の日付配列＋件数配列）形式で保存する。
+従来のv1形式が必要な場合は `python analyze_trends.py --format v1` で実行する。
+
+週次データは1週ずつストリーミングで読み込み、集計に必要なフィールド
+（tags, related_companies, metadata, extracted_insights）だけを取り出す。
+記事の要約・重要ポイントなどは保持しないため、履歴が増えてもメモリ使用量は増えない。
+ファイル数が多い場合は、プロセスプールで各ファイルを週ごとの集計に変換してから統合する。
+タグと企業名は読み込み時に正規形（entity_aliases.yaml）へまとめてから集計する。
 """
 
+import os
+import re
+import sys
 import json
-from collections import Counter, defaultdict
+import argparse
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+# プロジェクトルートをパスに追加（設定ファイル読み込みのため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from article_model import Article
+from config_loader import get_config
+from entity_normalizer import get_normalizer
+from trend_digest import DIGEST_FILENAME, build_digest, write_digest
+from trend_query import TrendStore
+from trend_store import FORMATS, encode_v1, write_trend_file
+
+# ijson がインストールされていれば、ファイル全体を文字列として読まずに逐次パースする
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# 各集計が参照する記事フィールド
+AGGREGATOR_FIELDS = {
+    "keywords": ("tags",),
+    "companies": ("related_companies",),
+    "categories": (),
+    "summary": (),
+}
+
+# 記事以外で読み込むトップレベルのフィールド
+TOP_LEVEL_FIELDS = ("metadata", "extracted_insights")
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def required_article_fields(aggregators=AGGREGATOR_FIELDS):
+    """指定した集計に必要な記事フィールドの一覧"""
+    fields = []
+    for name in aggregators:
+        for field in AGGREGATOR_FIELDS[name]:
+            if field not in fields:
+                fields.append(field)
+    return tuple(fields)
+
+
+def _skip_whitespace(text, pos):
+    return _whitespace.match(text, pos).end()
+
+
+def _expect(text, pos, char):
+    if text[pos:pos + 1] != char:
+        raise ValueError(f"JSONの構文エラー: 位置{pos}で '{char}' が必要です")
+    return _skip_whitespace(text, pos + 1)
+
+
+def _parse_articles_text(text, pos, article_fields, articles):
+    """記事配列を1件ずつデコードし、必要なフィールドだけを articles に追加"""
+    pos = _expect(text, pos, "[")
+    if text[pos:pos + 1] == "]":
+        return pos + 1
+
+    while True:
+        article, pos = _decoder.raw_decode(text, pos)
+        if isinstance(article, dict):
+            articles.append({field: article[field] for field in article_fields if field in article})
+        pos = _skip_whitespace(text, pos)
+        if text[pos:pos + 1] == "]":
+            return pos + 1
+        pos = _expect(text, pos, ",")
+
+
+def _parse_weekly_text(text, article_fields):
+    """トップレベルのオブジェクトを要素ごとにデコードする（標準ライブラリ版）"""
+    data = {"articles": []}
+    pos = _expect(text, _skip_whitespace(text, 0), "{")
+    if text[pos:pos + 1] == "}":
+        return data
+
+    while True:
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = _expect(text, _skip_whitespace(text, pos), ":")
+        if key == "articles":
+            pos = _parse_articles_text(text, pos, article_fields, data["articles"])
+        else:
+            value, pos = _decoder.raw_decode(text, pos)
+            if key in TOP_LEVEL_FIELDS:
+                data[key] = value
+        pos = _skip_whitespace(text, pos)
+        if text[pos:pos + 1] == "}":
+            return data
+        pos = _expect(text, pos, ",")
+
+
+def _parse_weekly_stream(f, article_fields):
+    """ijson のイベントから必要な部分木だけを組み立てる（ijson版）"""
+    data = {"articles": []}
+    wanted = set(TOP_LEVEL_FIELDS) | {f"articles.item.{field}" for field in article_fields}
+    article = None
+    builder = None
+    builder_prefix = None
+    depth = 0
+
+    def assign(prefix, value):
+        if prefix.startswith("articles.item."):
+            article[prefix[len("articles.item."):]] = value
+        else:
+            data[prefix] = value
+
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    assign(builder_prefix, builder.value)
+                    builder = None
+            continue
+
+        if prefix == "articles.item" and event == "start_map":
+            article = {}
+        elif prefix == "articles.item" and event == "end_map":
+            data["articles"].append(article)
+            article = None
+        elif prefix in wanted and event != "map_key":
+            if event in ("start_map", "start_array"):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                builder_prefix = prefix
+                depth = 1
+            else:
+                assign(prefix, value)
 
-def load_weekly_data():
-    """週次データを全て読み込む"""
-    weekly_data_dir = Path("reports/weekly_data")
+    return data
+
+
+def read_weekly_file(path, article_fields=None):
+    """
+    週次データファイルを1件読み込み、集計に必要なフィールドだけを返す
+
+    Args:
+        path (Path): 週次データファイル
+        article_fields (tuple): 記事から取り出すフィールド（省略時は全集計の分）
+
+    Returns:
+        dict: {"metadata": ..., "extracted_insights": ..., "articles": [{"tags": ..., ...}]}
+    """
+    if article_fields is None:
+        article_fields = required_article_fields()
+
+    if ijson is not None:
+        with open(path, "rb") as f:
+            return _parse_weekly_stream(f, article_fields)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return _parse_weekly_text(f.read(), article_fields)
+
+
+def list_weekly_files(weekly_data_dir=None):
+    """週次データファイルの一覧（ファイル名＝日付順）"""
+    if weekly_data_dir is None:
+        weekly_data_dir = get_config().get("data.weekly_data_dir", "reports/weekly_data")
+    weekly_data_dir = Path(weekly_data_dir)
 
     if not weekly_data_dir.exists():
-        print("⚠️ reports/weekly_data ディレクトリが見つかりません。")
+        print(f"⚠️ {weekly_data_dir} ディレクトリが見つかりません。")
         return []
 
     weekly_files = sorted(weekly_data_dir.glob("*.json"))
 
     if not weekly_files:
         print("⚠️ 週次データファイルが見つかりません。")
-        return []
 
-    data = []
-    for file in weekly_files:
+    return weekly_files
+
+
+def iter_weekly_data(weekly_files=None, article_fields=None, workers=None):
+    """
+    週次データを1週ずつ返すジェネレータ
+
+    Args:
+        weekly_files (list): 読み込むファイル（省略時は週次データディレクトリの全ファイル）
+        article_fields (tuple): 記事から取り出すフィールド
+        workers (int): 読み込み・デコードに使うスレッド数（0または1で逐次読み込み）
+
+    Yields:
+        dict: 1週分のデータ（ファイル名順）
+    """
+    if weekly_files is None:
+        weekly_files = list_weekly_files()
+    if workers is None:
+        workers = get_config().get("trends.read_workers", 0)
+
+    def read(file):
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                data.append(json.load(f))
+            return read_weekly_file(file, article_fields)
         except Exception as e:
             print(f"⚠️ {file.name} の読み込みに失敗しました: {e}")
+            return None
 
-    return data
+    if not workers or workers <= 1:
+        for file in weekly_files:
+            data = read(file)
+            if data is not None:
+                yield data
+        return
+
+    # 先読みは workers の2倍までに抑え、読み込み済みの週が溜まらないようにする
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        files = iter(weekly_files)
+        for file in files:
+            pending.append(executor.submit(read, file))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            data = pending.popleft().result()
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append(executor.submit(read, next_file))
+            if data is not None:
+                yield data
+
+
+def load_weekly_data():
+    """週次データを全て読み込む（集計に必要なフィールドのみ）"""
+    return list(iter_weekly_data())
+
+
+def summarize_week(data):
+    """1週分のサマリー行を作成"""
+    metadata = data["metadata"]
+    insights = data.get("extracted_insights", {})
+
+    return {
+        "report_date": metadata["report_date"],
+        "start_date": metadata.get("start_date", ""),
+        "end_date": metadata.get("end_date", ""),
+        "article_count": metadata.get("article_count", 0),
+        "manufacturing_related_count": insights.get("manufacturing_related_count", 0),
+        "avg_confidence_score": insights.get("avg_confidence_score", 0.0),
+        "top_keywords": insights.get("top_keywords", [])[:5],
+        "top_companies": insights.get("top_companies", [])[:3],
+        "execution_time": metadata.get("execution_time", "")
+    }
+
+
+def count_week(data):
+    """
+    1週分のデータを次元ごとの出現回数に集計
+
+    Returns:
+        dict: {"date", "keywords": Counter, "companies": Counter, "categories": Counter, "summary": dict}
+    """
+    normalizer = get_normalizer()
+    keyword_counts = Counter()
+    company_counts = Counter()
+    # 全週の記事を読むため、集計に使う項目だけを変換する（公開日の解析などは行わない）
+    for item in data.get("articles", []):
+        if not isinstance(item, dict):
+            continue
+        article = Article.for_counting(item)
+        keyword_counts.update(normalizer.canonicalize_all(article.tags, "tags"))
+        company_counts.update(normalizer.canonicalize_all(article.related_companies, "companies"))
+
+    category_dist = data.get("extracted_insights", {}).get("category_distribution", {})
+
+    return {
+        "date": data["metadata"]["report_date"],
+        "keywords": keyword_counts,
+        "companies": company_counts,
+        "categories": Counter(category_dist),
+        "summary": summarize_week(data),
+    }
+
+
+def count_weekly_file(path):
+    """1ファイルを読み込んで週ごとの集計を返す（プロセスプールのワーカー用）"""
+    try:
+        return count_week(read_weekly_file(path))
+    except Exception as e:
+        print(f"⚠️ {Path(path).name} の読み込みに失敗しました: {e}")
+        return None
+
+
+def collect_weekly_counts(weekly_files=None, workers=None, parallel_threshold=None):
+    """
+    全週次データを週ごとの集計（count_week の結果）に変換
+
+    ファイル数が parallel_threshold 以上ならプロセスプールで並列に変換し、
+    それ未満なら1週ずつ逐次に変換する。どちらもファイル名順の同じ結果を返す。
+
+    Args:
+        weekly_files (list): 対象ファイル（省略時は週次データディレクトリの全ファイル）
+        workers (int): プロセス数（省略時は trends.process_workers、0ならCPUコア数）
+        parallel_threshold (int): 並列モードに切り替えるファイル数
+    """
+    config = get_config()
+    if weekly_files is None:
+        weekly_files = list_weekly_files()
+    if workers is None:
+        workers = config.get("trends.process_workers", 0)
+    workers = workers or os.cpu_count() or 1
+    if parallel_threshold is None:
+        parallel_threshold = config.get("trends.parallel_threshold", 200)
+
+    if workers > 1 and len(weekly_files) >= parallel_threshold:
+        print(f"⚙️ 並列読み込みモード: {len(weekly_files)}ファイル / {workers}プロセス")
+        chunksize = max(1, len(weekly_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(count_weekly_file, weekly_files, chunksize=chunksize)
+            return [week for week in results if week is not None]
+
+    return [count_week(data) for data in iter_weekly_data(weekly_files)]
+
+
+def build_trend_series(weekly_counts, dimension, sort_by_total=True):
+    """
+    週ごとの集計を統合し、全日付を0埋めした件数配列を作成
+
+    Args:
+        weekly_counts (list): count_week() の結果のリスト
+        dimension (str): "keywords" | "companies" | "categories"
+        sort_by_total (bool): 総出現回数の多い順に並べるか
+
+    Returns:
+        tuple: (日付リスト, {エンティティ: [日付ごとの件数]})
+    """
+    all_dates = sorted(set(week["date"] for week in weekly_counts))
+
+    # 同じ日付のファイルが複数ある場合は後のファイルの値を採用する
+    entity_dates = defaultdict(dict)
+    for week in weekly_counts:
+        for entity, count in week[dimension].items():
+            entity_dates[entity][week["date"]] = count
+
+    # 別名辞書に未登録の表記ゆれ（大文字/小文字・空白の違い）を統合
+    if dimension in ("keywords", "companies"):
+        entity_dates = get_normalizer().merge_variants(entity_dates)
+
+    series = {
+        entity: [date_counts.get(date, 0) for date in all_dates]
+        for entity, date_counts in entity_dates.items()
+    }
+
+    if sort_by_total:
+        # 総出現回数でソート（上位を優先）
+        series = dict(sorted(series.items(), key=lambda x: sum(x[1]), reverse=True))
+
+    return all_dates, series
+
+
+def build_trends(weekly_counts, dimension, sort_by_total=True):
+    """週ごとの集計から、v1形式（{"date", "count"} のリスト）の時系列トレンドを作成"""
+    return encode_v1(*build_trend_series(weekly_counts, dimension, sort_by_total))
 
 
 def analyze_keyword_trends(weekly_data_list):
     """キーワードの時系列トレンドを分析"""
-    keyword_trends = defaultdict(list)
-
-    for data in weekly_data_list:
-        report_date = data["metadata"]["report_date"]
-        articles = data.get("articles", [])
-
-        # 各週のキーワード出現回数をカウント
-        keyword_counts = Counter()
-        for article in articles:
-            tags = article.get("tags", [])
-            for tag in tags:
-                keyword_counts[tag] += 1
-
-        # 全キーワードについて、その週の出現回数を記録
-        for keyword, count in keyword_counts.items():
-            keyword_trends[keyword].append({
-                "date": report_date,
-                "count": count
-            })
-
-    # 各キーワードのデータを時系列で完全にする（0埋め）
-    all_dates = sorted(set(
-        data["metadata"]["report_date"] for data in weekly_data_list
-    ))
-
-    complete_trends = {}
-    for keyword, trend_data in keyword_trends.items():
-        date_counts = {item["date"]: item["count"] for item in trend_data}
-        complete_trends[keyword] = [
-            {"date": date, "count": date_counts.get(date, 0)}
-            for date in all_dates
-        ]
-
-    # 総出現回数でソート（トップキーワードを優先）
-    sorted_keywords = sorted(
-        complete_trends.items(),
-        key=lambda x: sum(item["count"] for item in x[1]),
-        reverse=True
-    )
-
-    return dict(sorted_keywords)
+    return build_trends([count_week(data) for data in weekly_data_list], "keywords")
 
 
 def analyze_company_trends(weekly_data_list):
     """企業の時系列トレンドを分析"""
-    company_trends = defaultdict(list)
-
-    for data in weekly_data_list:
-        report_date = data["metadata"]["report_date"]
-        articles = data.get("articles", [])
-
-        # 各週の企業出現回数をカウント
-        company_counts = Counter()
-        for article in articles:
-            companies = article.get("related_companies", [])
-            for company in companies:
-                company_counts[company] += 1
-
-        # 全企業について、その週の出現回数を記録
-        for company, count in company_counts.items():
-            company_trends[company].append({
-                "date": report_date,
-                "count": count
-            })
-
-    # 各企業のデータを時系列で完全にする（0埋め）
-    all_dates = sorted(set(
-        data["metadata"]["report_date"] for data in weekly_data_list
-    ))
-
-    complete_trends = {}
-    for company, trend_data in company_trends.items():
-        date_counts = {item["date"]: item["count"] for item in trend_data}
-        complete_trends[company] = [
-            {"date": date, "count": date_counts.get(date, 0)}
-            for date in all_dates
-        ]
-
-    # 総出現回数でソート（トップ企業を優先）
-    sorted_companies = sorted(
-        complete_trends.items(),
-        key=lambda x: sum(item["count"] for item in x[1]),
-        reverse=True
-    )
-
-    return dict(sorted_companies)
+    return build_trends([count_week(data) for data in weekly_data_list], "companies")
 
 
 def analyze_category_trends(weekly_data_list):
     """カテゴリの時系列トレンドを分析"""
-    category_trends = defaultdict(list)
-
-    for data in weekly_data_list:
-        report_date = data["metadata"]["report_date"]
-        category_dist = data.get("extracted_insights", {}).get("category_distribution", {})
-
-        for category, count in category_dist.items():
-            category_trends[category].append({
-                "date": report_date,
-                "count": count
-            })
-
-    # 各カテゴリのデータを時系列で完全にする（0埋め）
-    all_dates = sorted(set(
-        data["metadata"]["report_date"] for data in weekly_data_list
-    ))
-
-    complete_trends = {}
-    for category, trend_data in category_trends.items():
-        date_counts = {item["date"]: item["count"] for item in trend_data}
-        complete_trends[category] = [
-            {"date": date, "count": date_counts.get(date, 0)}
-            for date in all_dates
-        ]
-
-    return complete_trends
+    return build_trends([count_week(data) for data in weekly_data_list], "categories", sort_by_total=False)
 
 
 def generate_summary(weekly_data_list):
     """週次サマリーを生成"""
-    summary = []
-
-    for data in weekly_data_list:
-        metadata = data["metadata"]
-        insights = data.get("extracted_insights", {})
+    return sorted((summarize_week(data) for data in weekly_data_list), key=lambda x: x["report_date"])
 
-        summary.append({
-            "report_date": metadata["report_date"],
-            "start_date": metadata.get("start_date", ""),
-            "end_date": metadata.get("end_date", ""),
-            "article_count": metadata.get("article_count", 0),
-            "manufacturing_related_count": insights.get("manufacturing_related_count", 0),
-            "avg_confidence_score": insights.get("avg_confidence_score", 0.0),
-            "top_keywords": insights.get("top_keywords", [])[:5],
-            "top_companies": insights.get("top_companies", [])[:3],
-            "execution_time": metadata.get("execution_time", "")
-        })
 
-    return sorted(summary, key=lambda x: x["report_date"])
+def main(trend_format=None):
+    """
+    メイン処理
 
-
-def main():
-    """メイン処理"""
+    Args:
+        trend_format (str): 時系列データの保存形式 "v1" | "v2"（省略時は trends.format）
+    """
     print("=" * 60)
     print("📊 トレンド分析を開始します...")
     print("=" * 60)
 
-    # 週次データの読み込み
-    weekly_data_list = load_weekly_data()
+    config = get_config()
+    trend_format = trend_format or config.get("trends.format", "v2")
+    gzip_sidecar = config.get("trends.gzip_sidecar", False)
+
+    # 週次データを週ごとの集計に変換（ファイル数に応じて逐次／並列を自動選択）
+    weekly_counts = collect_weekly_counts()
 
-    if not weekly_data_list:
+    if not weekly_counts:
         print("❌ 分析するデータがありません。")
         return
 
-    print(f"✓ {len(weekly_data_list)}件の週次データを読み込みました。")
+    print(f"✓ {len(weekly_counts)}件の週次データを読み込みました。")
 
     # トレンドディレクトリの作成
-    trends_dir = Path("reports/trends")
+    trends_dir = Path(config.get("data.trends_dir", "reports/trends"))
     trends_dir.mkdir(parents=True, exist_ok=True)
 
     # キーワードトレンドの分析
-    print("\n📈 キーワードトレンドを分析中...")
-    keyword_trends = analyze_keyword_trends(weekly_data_list)
-    with open(trends_dir / "keywords.json", "w", encoding="utf-8") as f:
-        json.dump(keyword_trends, f, ensure_ascii=False, indent=2)
+    print(f"\n📈 キーワードトレンドを分析中...（保存形式: {trend_format}）")
+    dates, keyword_trends = build_trend_series(weekly_counts, "keywords")
+    write_trend_file(trends_dir / "keywords.json", dates, keyword_trends, trend_format, gzip_sidecar)
     print(f"✓ キーワード: {len(keyword_trends)}種類")
 
     # 企業トレンドの分析
     print("\n🏢 企業トレンドを分析中...")
-    company_trends = analyze_company_trends(weekly_data_list)
-    with open(trends_dir / "companies.json", "w", encoding="utf-8") as f:
-        json.dump(company_trends, f, ensure_ascii=False, indent=2)
+    dates, company_trends = build_trend_series(weekly_counts, "companies")
+    write_trend_file(trends_dir / "companies.json", dates, company_trends, trend_format, gzip_sidecar)
     print(f"✓ 企業: {len(company_trends)}社")
 
     # カテゴリトレンドの分析
     print("\n📂 カテゴリトレンドを分析中...")
-    category_trends = analyze_category_trends(weekly_data_list)
-    with open(trends_dir / "categories.json", "w", encoding="utf-8") as f:
-        json.dump(category_trends, f, ensure_ascii=False, indent=2)
+    dates, category_trends = build_trend_series(weekly_counts, "categories", sort_by_total=False)
+    write_trend_file(trends_dir / "categories.json", dates, category_trends, trend_format, gzip_sidecar)
     print(f"✓ カテゴリ: {len(category_trends)}種類")
 
     # 週次サマリーの生成
     print("\n📋 週次サマリーを生成中...")
-    summary = generate_summary(weekly_data_list)
+    summary = sorted((week["summary"] for week in weekly_counts), key=lambda x: x["report_date"])
     with open(trends_dir / "summary.json", "w", encoding="utf-8") as f:
         json.dump(summary, f, ensure_ascii=False, indent=2)
     print(f"✓ サマリー: {len(summary)}週分")
 
+    # 分析レポート用のダイジェスト
+    store = TrendStore({
+        "keywords": (dates, keyword_trends),
+        "companies": (dates, company_trends),
+        "categories": (dates, category_trends),
+    })
+    if config.get("trends.digest.enabled", True):
+        print("\n🧭 トレンドダイジェストを生成中...")
+        digest = build_digest(
+            store,
+            window_weeks=config.get("trends.digest.window_weeks", 4),
+            top_k=config.get("trends.digest.top_k", 5),
+        )
+        write_digest(trends_dir / DIGEST_FILENAME, digest)
+        print(f"✓ ダイジェスト: {digest['latest']} 時点")
+
     # 結果サマリーの表示
     print("\n" + "=" * 60)
     print("✓ トレンド分析完了")
@@ -242,30 +484,22 @@ def main():
     print(f"🏭 製造業関連: {sum(s['manufacturing_related_count'] for s in summary)}件")
 
     # トップキーワード（全期間）
-    top_keywords = sorted(
-        keyword_trends.items(),
-        key=lambda x: sum(item["count"] for item in x[1]),
-        reverse=True
-    )[:5]
     print(f"\n🏷️ トップキーワード（全期間）:")
-    for keyword, trend_data in top_keywords:
-        total = sum(item["count"] for item in trend_data)
-        print(f"  • {keyword}: {total}回")
+    for keyword, count in store.top_k("keywords", k=5):
+        print(f"  • {keyword}: {count}回")
 
     # トップ企業（全期間）
     if company_trends:
-        top_companies = sorted(
-            company_trends.items(),
-            key=lambda x: sum(item["count"] for item in x[1]),
-            reverse=True
-        )[:5]
         print(f"\n🏢 トップ企業（全期間）:")
-        for company, trend_data in top_companies:
-            total = sum(item["count"] for item in trend_data)
-            print(f"  • {company}: {total}回")
+        for company, count in store.top_k("companies", k=5):
+            print(f"  • {company}: {count}回")
 
     print("=" * 60 + "\n")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="週次データからトレンドデータを生成")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="時系列データの保存形式（既定: config.yaml の trends.format）")
+    args = parser.parse_args()
+
+    main(trend_format=args.format)
@@ -0,0 +1,129 @@
+"""
+トレンド分析のスケーリングベンチマーク
+
+合成週次データ（benchmarks/synthetic_corpus.py）を履歴の長さを変えて生成し、
+analyze_trends.py を別プロセスで実行して処理時間とピークRSSを計測する。
+
+使い方:
+    python benchmarks/bench_trends_scaling.py --weeks 13 52 156 --articles-per-week 100
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from synthetic_corpus import generate_corpus
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+
+def _dir_size(path):
+    """ディレクトリ配下のファイルサイズ合計（バイト）"""
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def run_trend_analysis(workspace, extra_args=()):
+    """
+    analyze_trends.py を子プロセスで実行し、処理時間とピークRSSを返す
+
+    os.wait4 で子プロセス単位のリソース使用量を取得するため、
+    サイズごとの計測が互いに影響しない。
+    標準エラー出力は一時ファイルに書き出す（パイプでは、バッファを超える出力があると wait4 の待機中に止まる）。
+    """
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            [sys.executable, str(ROOT_DIR / "analyze_trends.py"), *extra_args],
+            cwd=workspace,
+            stdout=devnull,
+            stderr=stderr_file,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_s = time.perf_counter() - start
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode("utf-8", errors="replace")
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "returncode": process.returncode,
+        "wall_s": round(wall_s, 3),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "max_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "stderr": stderr[-500:] if process.returncode else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="トレンド分析のスケーリングベンチマーク")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[13, 52, 156], help="計測する履歴の週数")
+    parser.add_argument("--articles-per-week", type=int, default=100, help="1週あたりの記事数")
+    parser.add_argument("--tags", type=int, default=5000, help="タグの語彙数")
+    parser.add_argument("--companies", type=int, default=2000, help="企業の語彙数")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf分布の指数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d_%H%M%S"), help="結果ファイル名")
+    parser.add_argument("--trend-args", nargs=argparse.REMAINDER, default=[], help="analyze_trends.py に渡す引数")
+    args = parser.parse_args()
+
+    rows = []
+    for weeks in args.weeks:
+        with tempfile.TemporaryDirectory(prefix="gds-trends-") as workspace:
+            weekly_data_dir = Path(workspace) / "reports" / "weekly_data"
+            print(f"▶ {weeks}週 × {args.articles_per_week}記事 のデータを生成中...")
+            generate_corpus(
+                weekly_data_dir,
+                weeks=weeks,
+                articles_per_week=args.articles_per_week,
+                tag_vocabulary=args.tags,
+                company_vocabulary=args.companies,
+                zipf_exponent=args.zipf,
+                seed=args.seed,
+            )
+            print("  analyze_trends.py を実行中...")
+            result = run_trend_analysis(workspace, args.trend_args)
+            result.update({
+                "weeks": weeks,
+                "articles": weeks * args.articles_per_week,
+                "input_mb": round(_dir_size(weekly_data_dir) / 1024 / 1024, 2),
+                "output_mb": round(_dir_size(Path(workspace) / "reports" / "trends") / 1024 / 1024, 2)
+                if (Path(workspace) / "reports" / "trends").exists() else 0.0,
+            })
+            rows.append(result)
+
+    print("\n" + "=" * 78)
+    print(f"📊 トレンド分析スケーリング: {args.label}")
+    print("=" * 78)
+    print(f"{'weeks':>7}{'articles':>10}{'input(MB)':>11}{'output(MB)':>12}{'wall(s)':>10}{'cpu(s)':>9}{'RSS(MB)':>10}{'rc':>5}")
+    for row in rows:
+        print(
+            f"{row['weeks']:>7}{row['articles']:>10}{row['input_mb']:>11.2f}{row['output_mb']:>12.2f}"
+            f"{row['wall_s']:>10.2f}{row['cpu_s']:>9.2f}{row['max_rss_mb']:>10.1f}{row['returncode']:>5}"
+        )
+        if row["stderr"]:
+            print(f"  ⚠️ {row['stderr']}")
+    print("=" * 78 + "\n")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result_path = RESULTS_DIR / f"trends_scaling_{args.label}.json"
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "label": args.label,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "articles_per_week": args.articles_per_week,
+            "tags": args.tags,
+            "companies": args.companies,
+            "zipf": args.zipf,
+            "seed": args.seed,
+            "trend_args": args.trend_args,
+            "rows": rows,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"💾 結果を保存しました: {result_path}")
+
+
+if __name__ == "__main__":
+    main()
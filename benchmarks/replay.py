@@ -0,0 +1,459 @@
+"""
+記録・再生レイヤー（オフラインベンチマーク用）
+
+Gemini・Tavilyの実レスポンスを一度だけフィクスチャに記録し、
+以降はAPIキーやネットワークなしで同じレスポンスを再生する。
+再生時は遅延と429エラーを擬似的に発生させられる。
+
+使い方:
+    # 既存の reports/ データからフィクスチャを作成（APIキー不要）
+    python benchmarks/replay.py bootstrap --output benchmarks/fixtures/default.json
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+sys.path.insert(0, str(ROOT_DIR))
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+# time.sleep はベンチマーク中に仮想化されるため、擬似遅延用に実体を保持しておく
+_real_sleep = time.sleep
+
+DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+
+
+def estimate_usage(prompt_text, output_text):
+    """記録にトークン数がない場合の概算（4文字≒1トークン）"""
+    input_tokens = max(1, len(prompt_text) // 4)
+    output_tokens = max(1, len(output_text) // 4)
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+def _message_text(messages):
+    """invokeに渡された入力をテキストとして連結"""
+    if isinstance(messages, str):
+        return messages
+    if isinstance(messages, dict):
+        messages = messages.get("messages", [])
+    texts = []
+    for message in messages:
+        content = getattr(message, "content", message)
+        texts.append(content if isinstance(content, str) else json.dumps(content, ensure_ascii=False))
+    return "\n".join(texts)
+
+
+class Fixture:
+    """記録済みレスポンスの集合"""
+
+    STREAMS = ("agent", "formatting", "analysis", "email")
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.recorded_on = data.get("recorded_on", datetime.now().strftime("%Y-%m-%d"))
+        self.streams = {name: list(data.get(name, [])) for name in self.STREAMS}
+        self.search = dict(data.get("search", {}))
+        self._cursors = dict.fromkeys(self.STREAMS, 0)
+        self._date_shift = timedelta(0)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"recorded_on": self.recorded_on, **self.streams, "search": self.search}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def align_dates(self, today=None):
+        """記録日と再生日の差だけ、レスポンス中の日付（YYYY-MM-DD）をずらす"""
+        today = today or datetime.now()
+        recorded = datetime.strptime(self.recorded_on, "%Y-%m-%d")
+        self._date_shift = timedelta(days=(today.date() - recorded.date()).days)
+
+    def _shift(self, text):
+        if not self._date_shift:
+            return text
+
+        def replace(match):
+            try:
+                shifted = datetime(*map(int, match.groups())) + self._date_shift
+            except ValueError:
+                return match.group(0)
+            return shifted.strftime("%Y-%m-%d")
+
+        return DATE_PATTERN.sub(replace, text)
+
+    def next(self, stream):
+        """ストリームの次のレスポンスを返す（末尾に達したら先頭に戻る）"""
+        entries = self.streams[stream]
+        if not entries:
+            raise LookupError(f"フィクスチャに '{stream}' のレスポンスがありません")
+        entry = entries[self._cursors[stream] % len(entries)]
+        self._cursors[stream] += 1
+        entry = dict(entry)
+        entry["output"] = self._shift(entry["output"])
+        return entry
+
+    def search_result(self, query):
+        """検索クエリに対応する結果を返す（未記録のクエリは空の結果）"""
+        result = self.search.get(query)
+        if result is None:
+            return {"query": query, "results": [], "response_time": 0.0}
+        return json.loads(self._shift(json.dumps(result, ensure_ascii=False)))
+
+
+class SimulatedNetwork:
+    """擬似的なネットワーク遅延と429エラーの発生源"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.injected_errors = 0
+
+    def call(self, kind):
+        """1回のAPI呼び出しを模擬する"""
+        self.calls += 1
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            _real_sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.injected_errors += 1
+            raise RuntimeError(f"429 Resource has been exhausted (simulated, {kind})")
+
+
+class FakeChatModel:
+    """ChatGoogleGenerativeAI の再生用スタンドイン"""
+
+    def __init__(self, fixture, network, stream, model=None, **kwargs):
+        self.fixture = fixture
+        self.network = network
+        self.stream = stream
+        self.model = model
+        self.kwargs = kwargs
+
+    def invoke(self, messages, *args, **kwargs):
+        self.network.call(self.stream)
+        entry = self.fixture.next(self.stream)
+        usage = entry.get("usage") or estimate_usage(_message_text(messages), entry["output"])
+        return AIMessage(content=entry["output"], usage_metadata=usage)
+
+
+class FakeAgentExecutor:
+    """create_react_agent の再生用スタンドイン（記録済みの検索を実行してから最終回答を返す）"""
+
+    def __init__(self, fixture, network, tools):
+        self.fixture = fixture
+        self.network = network
+        self.tools = tools
+
+    def invoke(self, inputs, config=None):
+        messages = list(inputs.get("messages", []))
+        entry = self.fixture.next("agent")
+
+        for index, query in enumerate(entry.get("queries", [])):
+            self.network.call("agent_step")
+            result = self.tools[0].invoke({"query": query})
+            messages.append(ToolMessage(
+                content=json.dumps(result, ensure_ascii=False),
+                tool_call_id=f"replay-{index}",
+            ))
+
+        self.network.call("agent")
+        usage = entry.get("usage") or estimate_usage(_message_text(messages), entry["output"])
+        messages.append(AIMessage(content=entry["output"], usage_metadata=usage))
+        return {"messages": messages}
+
+
+class FakeSMTP:
+    """smtplib.SMTP_SSL / SMTP の再生用スタンドイン（送信内容を保持するだけ）"""
+
+    sent = []
+
+    def __init__(self, host=None, port=None, *args, **kwargs):
+        self.host = host
+        self.port = port
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.quit()
+        return False
+
+    def ehlo(self, name=""):
+        return (250, b"OK")
+
+    def starttls(self, *args, **kwargs):
+        return (220, b"Ready to start TLS")
+
+    def login(self, user, password):
+        return (235, b"Authentication successful")
+
+    def send_message(self, msg, *args, **kwargs):
+        FakeSMTP.sent.append(msg)
+        return {}
+
+    def sendmail(self, from_addr, to_addrs, msg, *args, **kwargs):
+        FakeSMTP.sent.append(msg)
+        return {}
+
+    def noop(self):
+        return (250, b"OK")
+
+    def rset(self):
+        return (250, b"OK")
+
+    def quit(self):
+        return (221, b"Bye")
+
+
+def install_replay(stack, fixture, network):
+    """
+    各モジュールのLLM・検索・SMTPを再生用スタンドインに差し替える
+
+    Args:
+        stack (contextlib.ExitStack): パッチの解除を管理するスタック
+        fixture (Fixture): 再生するフィクスチャ
+        network (SimulatedNetwork): 擬似ネットワーク
+    """
+    from unittest import mock
+    from langchain_tavily.tavily_search import TavilySearchAPIWrapper
+    import research_searcher
+    import research_analyzer
+    import email_report
+    import mail_delivery
+
+    def chat_factory(stream):
+        return lambda **kwargs: FakeChatModel(fixture, network, stream, **kwargs)
+
+    def raw_results(self, query, **kwargs):
+        network.call("search")
+        return fixture.search_result(query)
+
+    stack.enter_context(mock.patch.object(research_searcher, "ChatGoogleGenerativeAI", chat_factory("formatting")))
+    stack.enter_context(mock.patch.object(research_analyzer, "ChatGoogleGenerativeAI", chat_factory("analysis")))
+    stack.enter_context(mock.patch.object(email_report, "ChatGoogleGenerativeAI", chat_factory("email")))
+    stack.enter_context(mock.patch.object(
+        research_searcher, "create_react_agent",
+        lambda model, tools, **kwargs: FakeAgentExecutor(fixture, network, tools),
+    ))
+    stack.enter_context(mock.patch.object(TavilySearchAPIWrapper, "raw_results", raw_results))
+    stack.enter_context(mock.patch.object(mail_delivery.smtplib, "SMTP_SSL", FakeSMTP))
+    stack.enter_context(mock.patch.object(mail_delivery.smtplib, "SMTP", FakeSMTP))
+
+
+def install_recording(stack, fixture):
+    """
+    実APIを呼び出しつつ、レスポンスをフィクスチャに記録する
+
+    メール送信だけは記録時も FakeSMTP に差し替える。
+    """
+    from unittest import mock
+    from langchain_tavily.tavily_search import TavilySearchAPIWrapper
+    import research_searcher
+    import research_analyzer
+    import email_report
+    import mail_delivery
+
+    fixture.recorded_on = datetime.now().strftime("%Y-%m-%d")
+
+    def recording_chat(module, stream):
+        real_cls = module.ChatGoogleGenerativeAI
+
+        class RecordingChatModel(real_cls):
+            def invoke(self, messages, *args, **kwargs):
+                response = super().invoke(messages, *args, **kwargs)
+                fixture.streams[stream].append({
+                    "output": response.content if isinstance(response.content, str) else json.dumps(response.content, ensure_ascii=False),
+                    "usage": dict(response.usage_metadata or {}),
+                })
+                return response
+
+        return RecordingChatModel
+
+    real_create_agent = research_searcher.create_react_agent
+
+    class RecordingAgentExecutor:
+        def __init__(self, executor):
+            self.executor = executor
+
+        def invoke(self, inputs, config=None):
+            response = self.executor.invoke(inputs, config=config)
+            messages = response.get("messages", [])
+            queries = [
+                call["args"].get("query", "")
+                for message in messages
+                for call in (getattr(message, "tool_calls", None) or [])
+            ]
+            content = messages[-1].content if messages else ""
+            if isinstance(content, list) and content and isinstance(content[0], dict):
+                content = content[0].get("text", "")
+            input_tokens = sum((getattr(m, "usage_metadata", None) or {}).get("input_tokens", 0) for m in messages)
+            output_tokens = sum((getattr(m, "usage_metadata", None) or {}).get("output_tokens", 0) for m in messages)
+            fixture.streams["agent"].append({
+                "queries": queries,
+                "output": content,
+                "usage": {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                },
+            })
+            return response
+
+    real_raw_results = TavilySearchAPIWrapper.raw_results
+
+    def raw_results(self, query, **kwargs):
+        result = real_raw_results(self, query=query, **kwargs)
+        fixture.search[query] = result
+        return result
+
+    stack.enter_context(mock.patch.object(research_searcher, "ChatGoogleGenerativeAI", recording_chat(research_searcher, "formatting")))
+    stack.enter_context(mock.patch.object(research_analyzer, "ChatGoogleGenerativeAI", recording_chat(research_analyzer, "analysis")))
+    stack.enter_context(mock.patch.object(email_report, "ChatGoogleGenerativeAI", recording_chat(email_report, "email")))
+    stack.enter_context(mock.patch.object(
+        research_searcher, "create_react_agent",
+        lambda model, tools, **kwargs: RecordingAgentExecutor(real_create_agent(model, tools, **kwargs)),
+    ))
+    stack.enter_context(mock.patch.object(TavilySearchAPIWrapper, "raw_results", raw_results))
+    stack.enter_context(mock.patch.object(mail_delivery.smtplib, "SMTP_SSL", FakeSMTP))
+    stack.enter_context(mock.patch.object(mail_delivery.smtplib, "SMTP", FakeSMTP))
+
+
+def _render_agent_text(articles):
+    """エージェントの出力形式（research_searcher.py のプロンプト参照）で記事を書き出す"""
+    blocks = []
+    for index, article in enumerate(articles, start=1):
+        blocks.append("\n".join([
+            "---",
+            f"記事 {index}",
+            f"タイトル: {article.get('title', '')}",
+            f"URL: {article.get('url', '')}",
+            f"情報源: {article.get('source', '')}",
+            f"公開日: {article.get('published_date', '不明')}",
+            f"地域: {article.get('region', '')}",
+            f"カテゴリー: {article.get('category', '')}",
+            f"関連企業: {', '.join(article.get('related_companies') or []) or 'なし'}",
+            f"要約: {article.get('summary_japanese', '')}",
+            f"重要ポイント: {' / '.join(article.get('key_points') or [])}",
+            f"タグ: {', '.join(article.get('tags') or [])}",
+            f"製造業関連: {article.get('manufacturing_relevance', 'なし')}",
+            f"関連性理由: {article.get('relevance_reason', '該当なし')}",
+            f"信頼度: {article.get('confidence_score', 0.5)}",
+        ]))
+    return "\n".join(blocks) + "\n---"
+
+
+def bootstrap_fixture(reports_dir, keywords, batch_size, articles_per_batch):
+    """
+    既存の reports/ データから再生用フィクスチャを作成する
+
+    実APIの記録がない環境でもベンチマークを回せるようにするための代替手段。
+    """
+    reports_dir = Path(reports_dir)
+    articles = []
+    seen_urls = set()
+    sources = [reports_dir / "research_data.json"] + sorted((reports_dir / "weekly_data").glob("*.json"))
+    for path in sources:
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for article in data if isinstance(data, list) else data.get("articles", []):
+            if article.get("url") and article["url"] not in seen_urls:
+                seen_urls.add(article["url"])
+                articles.append(dict(article))
+
+    if not articles:
+        raise FileNotFoundError(f"記事データが見つかりません: {reports_dir}")
+
+    # 再生時の日付フィルタ（過去7日間）を通過するよう、公開日を記録日の直前に揃える
+    recorded_on = datetime.now()
+    for index, article in enumerate(articles):
+        article["published_date"] = (recorded_on - timedelta(days=index % 6)).strftime("%Y-%m-%d")
+
+    fixture = Fixture({"recorded_on": recorded_on.strftime("%Y-%m-%d")})
+
+    keyword_batches = [keywords[i:i + batch_size] for i in range(0, len(keywords), batch_size)]
+    for batch_idx, keyword_batch in enumerate(keyword_batches):
+        batch_articles = [articles[(batch_idx * articles_per_batch + i) % len(articles)] for i in range(articles_per_batch)]
+        fixture.streams["agent"].append({"queries": keyword_batch, "output": _render_agent_text(batch_articles)})
+        for query in keyword_batch:
+            fixture.search[query] = {
+                "query": query,
+                "results": [
+                    {
+                        "title": article.get("title", ""),
+                        "url": article.get("url", ""),
+                        "content": article.get("summary_japanese", ""),
+                        "score": article.get("confidence_score", 0.5),
+                        "published_date": article.get("published_date"),
+                        "raw_content": None,
+                    }
+                    for article in batch_articles
+                ],
+                "response_time": 1.2,
+            }
+
+    fixture.streams["formatting"].append({"output": json.dumps(articles, ensure_ascii=False, indent=2)})
+
+    report_body = "## 1. エグゼクティブサマリー（概要）\n（記録なし）\n"
+    for report_file in sorted(reports_dir.glob("週次レポート_*.md"), reverse=True):
+        with open(report_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        report_body = content.split("---\n\n", 1)[-1]
+        break
+    fixture.streams["analysis"].append({"output": report_body})
+
+    links = "".join(f'・<a href="{a["url"]}">{a["url"]}</a><br>\n' for a in articles)
+    fixture.streams["email"].append({"output": (
+        "<html>\n<head><meta charset=\"utf-8\"></head>\n<body>\n"
+        "<p>お疲れ様です。<br>\n今週の主要テーマを共有します。</p>\n"
+        f"<p><strong>【情報源】</strong><br>\n{links}</p>\n</body>\n</html>"
+    )})
+    return fixture
+
+
+def main():
+    from config_loader import get_config
+
+    parser = argparse.ArgumentParser(description="再生用フィクスチャの作成")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bootstrap = subparsers.add_parser("bootstrap", help="既存の reports/ データからフィクスチャを作成")
+    bootstrap.add_argument("--reports-dir", default=str(ROOT_DIR / "reports"))
+    bootstrap.add_argument("--output", default=str(ROOT_DIR / "benchmarks" / "fixtures" / "default.json"))
+    args = parser.parse_args()
+
+    config = get_config()
+    fixture = bootstrap_fixture(
+        args.reports_dir,
+        keywords=config.get("search.keywords", []),
+        batch_size=config.get("search.batch_size", 3),
+        articles_per_batch=config.get("search.articles_per_batch", 3),
+    )
+    fixture.save(args.output)
+    print(f"✓ フィクスチャを作成しました: {args.output}")
+    print(f"  - エージェント応答: {len(fixture.streams['agent'])}件")
+    print(f"  - 検索結果: {len(fixture.search)}クエリ")
+
+
+if __name__ == "__main__":
+    main()
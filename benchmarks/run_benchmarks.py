@@ -0,0 +1,290 @@
+"""
+パイプラインのオフラインベンチマーク
+
+記録済みフィクスチャ（benchmarks/replay.py）を再生して、
+各ステージの処理時間・待機時間・CPU時間・ピークメモリを計測する。
+待機（time.sleep）は実際には行わず、要求された秒数を「待機時間」として集計する。
+
+使い方:
+    # 再生（APIキー・ネットワーク不要）
+    python benchmarks/run_benchmarks.py --latency 0.05 --error-rate 0.1
+
+    # 実APIのレスポンスを記録（GOOGLE_API_KEY / TAVILY_API_KEY が必要）
+    python benchmarks/run_benchmarks.py --record --fixture benchmarks/fixtures/recorded.json
+
+結果は benchmarks/results/<ラベル>.json に保存され、前回の結果との差分が表示される。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from replay import (
+    ROOT_DIR,
+    Fixture,
+    FakeSMTP,
+    SimulatedNetwork,
+    install_recording,
+    install_replay,
+)
+import quota_ledger
+import rate_limiter
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+DEFAULT_FIXTURE = ROOT_DIR / "benchmarks" / "fixtures" / "default.json"
+
+# 計測対象のステージ（実行順）
+TARGETS = ("search", "analyzer", "trends", "email")
+
+# ダミーの環境変数（再生時はAPIキーの存在チェックだけを通過させる）
+DUMMY_ENV = {
+    "GOOGLE_API_KEY": "replay",
+    "TAVILY_API_KEY": "replay",
+    "GMAIL_USER": "bench@example.com",
+    "GMAIL_APP_PASSWORD": "replay",
+    "RECIPIENT_EMAIL": "reader1@example.com,reader2@example.com",
+    "PIPELINE_RUN_ID": "benchmark",
+}
+
+
+class VirtualClock:
+    """time.sleep を置き換え、要求された待機秒数だけを積算する"""
+
+    def __init__(self):
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        self.slept += max(0.0, seconds)
+
+    def monotonic(self):
+        """待機した秒数だけ進んだ経過時間（レート制限の判定用）"""
+        return time.monotonic() + self.slept
+
+    def time(self):
+        """待機した秒数だけ進んだ現在時刻（使用量台帳の判定用）"""
+        return time.time() + self.slept
+
+
+def prepare_workspace(workspace):
+    """作業ディレクトリに入力データをコピーする"""
+    source_reports = ROOT_DIR / "reports"
+    reports_dir = Path(workspace) / "reports"
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    if (source_reports / "weekly_data").exists():
+        shutil.copytree(source_reports / "weekly_data", reports_dir / "weekly_data")
+    if (source_reports / "research_data.json").exists():
+        shutil.copy2(source_reports / "research_data.json", reports_dir / "research_data.json")
+
+    # 分析ステージを実行しない場合でもメール送信を計測できるよう、最新レポートを1件置いておく
+    latest_reports = sorted(source_reports.glob("週次レポート_*.md"), key=lambda p: p.stat().st_mtime)
+    if latest_reports:
+        shutil.copy2(latest_reports[-1], reports_dir / latest_reports[-1].name)
+        sidecar = latest_reports[-1].with_suffix(".json")
+        if sidecar.exists():
+            shutil.copy2(sidecar, reports_dir / sidecar.name)
+
+
+def run_target(name):
+    """ステージを1つ実行する"""
+    if name == "search":
+        from research_searcher import search_and_extract_data
+        search_and_extract_data()
+    elif name == "analyzer":
+        from research_analyzer import generate_analysis_report
+        generate_analysis_report()
+    elif name == "trends":
+        import analyze_trends
+        analyze_trends.main()
+    elif name == "email":
+        import email_report
+        email_report.main()
+    else:
+        raise ValueError(f"未知のステージです: {name}")
+
+
+@contextmanager
+def _quiet(enabled):
+    """ステージの標準出力を抑制"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def measure(name, clock, trace_memory=True, quiet=True):
+    """ステージを実行し、処理時間・待機時間・CPU時間・ピークメモリを返す"""
+    slept_before = clock.slept
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if trace_memory:
+        tracemalloc.start()
+
+    status = "ok"
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        with _quiet(quiet):
+            run_target(name)
+    except SystemExit as e:
+        status = "ok" if not e.code else f"exit({e.code})"
+    except Exception as e:
+        status = f"error({type(e).__name__}: {e})"
+    wall_s = time.perf_counter() - wall_start
+    cpu_s = time.process_time() - cpu_start
+
+    peak_kb = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_kb = round(peak / 1024, 1)
+
+    return {
+        "status": status,
+        "wall_s": round(wall_s, 4),
+        "cpu_s": round(cpu_s, 4),
+        "sleep_s": round(clock.slept - slept_before, 1),
+        "peak_traced_kb": peak_kb,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+    }
+
+
+def run_benchmarks(args):
+    """全ステージを同じ作業ディレクトリで順に実行する"""
+    fixture = Fixture() if args.record else Fixture.load(args.fixture)
+    if not args.record:
+        fixture.align_dates()
+    network = SimulatedNetwork(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    clock = VirtualClock()
+    results = {}
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="gds-bench-") as workspace, ExitStack() as stack:
+        prepare_workspace(workspace)
+        os.chdir(workspace)
+        try:
+            env = dict(DUMMY_ENV)
+            if args.record:
+                # 記録時は実APIキーを使用する
+                env = {k: v for k, v in env.items() if k not in ("GOOGLE_API_KEY", "TAVILY_API_KEY")}
+                install_recording(stack, fixture)
+            else:
+                install_replay(stack, fixture, network)
+            stack.enter_context(mock.patch.dict(os.environ, env))
+            stack.enter_context(mock.patch("time.sleep", clock.sleep))
+            stack.enter_context(mock.patch.object(rate_limiter.RateLimiter, "clock", staticmethod(clock.monotonic)))
+            stack.enter_context(mock.patch.object(quota_ledger.QuotaLedger, "clock", staticmethod(clock.time)))
+
+            for name in args.targets:
+                print(f"▶ {name} を計測中...")
+                results[name] = measure(name, clock, trace_memory=not args.no_tracemalloc, quiet=not args.verbose)
+                print(f"  {results[name]['status']} / {results[name]['wall_s']:.3f}s")
+        finally:
+            os.chdir(original_cwd)
+
+    if args.record:
+        fixture.save(args.fixture)
+        print(f"💾 フィクスチャを保存しました: {args.fixture}")
+
+    return {
+        "label": args.label,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": "record" if args.record else "replay",
+        "fixture": str(args.fixture),
+        "network": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "calls": network.calls,
+            "injected_errors": network.injected_errors,
+        },
+        "emails_sent": len(FakeSMTP.sent),
+        "targets": results,
+    }
+
+
+def load_previous_result(exclude_label=None):
+    """直近の結果ファイルを読み込む"""
+    if not RESULTS_DIR.exists():
+        return None
+    candidates = sorted(RESULTS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in candidates:
+        if path.stem != exclude_label:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+
+def print_report(result, previous=None):
+    """結果表（前回比つき）を表示"""
+    print("\n" + "=" * 78)
+    print(f"📊 ベンチマーク結果: {result['label']}（{result['mode']}）")
+    if previous:
+        print(f"   比較対象: {previous['label']}（{previous['created_at']}）")
+    print("=" * 78)
+    print(f"{'stage':<10}{'wall(s)':>12}{'sleep(s)':>10}{'cpu(s)':>10}{'peak(KB)':>12}{'status':>24}")
+    for name, row in result["targets"].items():
+        line = (
+            f"{name:<10}{row['wall_s']:>12.3f}{row['sleep_s']:>10.1f}{row['cpu_s']:>10.3f}"
+            f"{row['peak_traced_kb'] if row['peak_traced_kb'] is not None else '-':>12}{row['status'][:22]:>24}"
+        )
+        print(line)
+        prev_row = (previous or {}).get("targets", {}).get(name)
+        if prev_row and prev_row["wall_s"]:
+            delta = (row["wall_s"] - prev_row["wall_s"]) / prev_row["wall_s"] * 100
+            print(f"{'':<10}{delta:>+11.1f}%{row['sleep_s'] - prev_row['sleep_s']:>+10.1f}")
+    network = result["network"]
+    print("-" * 78)
+    print(f"擬似API呼び出し: {network['calls']}回 / 注入した429: {network['injected_errors']}回 / 送信メール: {result['emails_sent']}通")
+    print("=" * 78 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パイプラインのオフラインベンチマーク")
+    parser.add_argument("--fixture", default=str(DEFAULT_FIXTURE), help="再生（記録）するフィクスチャ")
+    parser.add_argument("--record", action="store_true", help="実APIを呼び出してフィクスチャを記録する")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS), help="計測するステージ")
+    parser.add_argument("--latency", type=float, default=0.0, help="擬似API呼び出しの遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延に加える最大ゆらぎ（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429エラーを注入する確率（0〜1）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d_%H%M%S"), help="結果ファイル名")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="メモリ計測を無効化（CPU時間への影響を除く）")
+    parser.add_argument("--verbose", action="store_true", help="ステージの出力を表示")
+    args = parser.parse_args()
+
+    previous = load_previous_result(exclude_label=args.label)
+    result = run_benchmarks(args)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result_path = RESULTS_DIR / f"{args.label}.json"
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print_report(result, previous)
+    print(f"💾 結果を保存しました: {result_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+大規模な合成週次データの生成スクリプト（負荷試験用）
+
+analyze_trends.py と同じ形式（reports/weekly_data/YYYYMMDD.json）で、
+任意の週数・記事数の履歴を生成する。タグと企業はZipf分布に従うため、
+少数の頻出語と長いロングテールを持つ。
+
+- シードを固定すれば同じデータが再現される
+- 記事は1件ずつファイルに書き出し、全記事をメモリに保持しない
+
+使い方:
+    python benchmarks/synthetic_corpus.py --weeks 156 --articles-per-week 200 --output-dir /tmp/corpus/reports/weekly_data
+"""
+import json
+import random
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+REGIONS = ["米国", "英国", "ドイツ", "フランス", "オランダ", "カナダ", "オーストラリア", "北欧", "欧州", "グローバル"]
+CATEGORIES = ["feature", "news", "case_study", "partnership", "research", "product_launch", "opinion"]
+SOURCES = ["HR Dive", "Forbes", "Manufacturing.net", "IndustryWeek", "SHRM", "Josh Bersin", "TechTarget", "Reuters", "Automation World"]
+
+# 頻出側に現れる実在の語（ロングテールは機械的に生成する）
+SEED_TAGS = ["AI", "スキルマネジメント", "タレントマネジメント", "製造業", "リスキリング", "Industry 4.0", "スキルギャップ", "人材戦略"]
+SEED_COMPANIES = ["Workday", "SAP", "AG5", "Kahuna", "Skills Base", "iMocha", "Indeavor", "Deloitte", "Siemens", "Bosch"]
+
+# 既定の最新週（同じシードで同じファイル名・内容になるよう固定する）
+DEFAULT_END_DATE = "2025-12-28"
+
+FILLER_SENTENCES = [
+    "製造現場におけるスキル可視化の取り組みが紹介されている。",
+    "熟練工の技能伝承とデジタルツールの活用が論点となっている。",
+    "AIを活用したスキル評価により配置の最適化が進んでいる。",
+    "人材不足を背景に社内公募型のタレントマーケットが拡大している。",
+    "安全教育と資格管理を一元化する動きが見られる。",
+]
+
+
+class ZipfSampler:
+    """語彙からZipf分布（順位kの重み ∝ 1/k^s）で抽出する"""
+
+    def __init__(self, vocabulary, exponent, rng):
+        self.vocabulary = vocabulary
+        self.rng = rng
+        self.cum_weights = list(accumulate(1.0 / (rank ** exponent) for rank in range(1, len(vocabulary) + 1)))
+
+    def sample(self, k):
+        """重複なしでk個を抽出"""
+        if k <= 0:
+            return []
+        picked = []
+        seen = set()
+        # 重複が出た分だけ引き直す（上限を設けて無限ループを防ぐ）
+        for _ in range(k * 4):
+            for item in self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=k - len(picked)):
+                if item not in seen:
+                    seen.add(item)
+                    picked.append(item)
+            if len(picked) >= k:
+                break
+        return picked
+
+
+def build_vocabulary(seed_terms, size, prefix):
+    """実在語の後ろに機械生成した語を続けた語彙を作成"""
+    vocabulary = list(seed_terms[:size])
+    vocabulary.extend(f"{prefix}{i:05d}" for i in range(len(vocabulary), size))
+    return vocabulary
+
+
+def generate_article(rng, week_index, article_index, report_date, tag_sampler, company_sampler, summary_sentences):
+    """記事を1件生成"""
+    published = report_date - timedelta(days=rng.randint(0, 6))
+    tags = tag_sampler.sample(rng.randint(2, 6))
+    companies = company_sampler.sample(rng.choice([0, 1, 1, 2, 3]))
+    return {
+        "title": f"Synthetic workforce skills article {week_index:04d}-{article_index:05d}",
+        "url": f"https://example.com/synthetic/{week_index:04d}/{article_index:05d}",
+        "source": rng.choice(SOURCES),
+        "published_date": published.strftime("%Y-%m-%d"),
+        "region": rng.choice(REGIONS),
+        "category": rng.choice(CATEGORIES),
+        "related_companies": companies,
+        "summary_japanese": "".join(rng.choice(FILLER_SENTENCES) for _ in range(summary_sentences)),
+        "key_points": [rng.choice(FILLER_SENTENCES) for _ in range(3)],
+        "tags": tags,
+        "manufacturing_relevance": "あり" if rng.random() < 0.6 else "なし",
+        "relevance_reason": "製造業の人材戦略に関連するため。",
+        "confidence_score": round(rng.uniform(0.4, 1.0), 2),
+    }
+
+
+def write_week(path, rng, week_index, report_date, articles_per_week, tag_sampler, company_sampler, summary_sentences):
+    """
+    1週分のファイルを書き出す
+
+    記事は生成したそばから書き出し、週単位の集計（Counter）だけを保持する。
+    """
+    tag_counts = Counter()
+    company_counts = Counter()
+    category_counts = Counter()
+    manufacturing_related = 0
+    confidence_total = 0.0
+
+    metadata = {
+        "report_date": report_date.strftime("%Y-%m-%d"),
+        "start_date": (report_date - timedelta(days=7)).strftime("%Y-%m-%d"),
+        "end_date": report_date.strftime("%Y-%m-%d"),
+        "article_count": articles_per_week,
+        "execution_time": report_date.strftime("%Y-%m-%d 21:00:00"),
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n  "metadata": ')
+        f.write(json.dumps(metadata, ensure_ascii=False))
+        f.write(',\n  "articles": [')
+        for article_index in range(articles_per_week):
+            article = generate_article(
+                rng, week_index, article_index, report_date, tag_sampler, company_sampler, summary_sentences
+            )
+            tag_counts.update(article["tags"])
+            company_counts.update(article["related_companies"])
+            category_counts[article["category"]] += 1
+            if article["manufacturing_relevance"] == "あり":
+                manufacturing_related += 1
+            confidence_total += article["confidence_score"]
+
+            f.write("\n    " if article_index == 0 else ",\n    ")
+            f.write(json.dumps(article, ensure_ascii=False))
+
+        insights = {
+            "top_keywords": [tag for tag, _ in tag_counts.most_common(10)],
+            "top_companies": [company for company, _ in company_counts.most_common(10)],
+            "category_distribution": dict(category_counts),
+            "manufacturing_related_count": manufacturing_related,
+            "avg_confidence_score": round(confidence_total / articles_per_week, 2) if articles_per_week else 0.0,
+        }
+        f.write('\n  ],\n  "extracted_insights": ')
+        f.write(json.dumps(insights, ensure_ascii=False))
+        f.write("\n}\n")
+
+
+def generate_corpus(
+    output_dir,
+    weeks=156,
+    articles_per_week=100,
+    tag_vocabulary=5000,
+    company_vocabulary=2000,
+    zipf_exponent=1.1,
+    summary_sentences=3,
+    end_date=DEFAULT_END_DATE,
+    seed=42,
+):
+    """
+    合成週次データを生成
+
+    Args:
+        output_dir (str | Path): 出力先（weekly_data ディレクトリ）
+        weeks (int): 生成する週数
+        articles_per_week (int): 1週あたりの記事数
+        tag_vocabulary (int): タグの語彙数
+        company_vocabulary (int): 企業の語彙数
+        zipf_exponent (float): Zipf分布の指数（大きいほど頻出語に偏る）
+        summary_sentences (int): 要約の文数（ファイルサイズの調整用）
+        end_date (str): 最新週のレポート日（YYYY-MM-DD）
+        seed (int): 乱数シード
+
+    Returns:
+        list: 生成したファイルのパス
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    end_date = datetime.strptime(end_date, "%Y-%m-%d")
+
+    tag_sampler = ZipfSampler(build_vocabulary(SEED_TAGS, tag_vocabulary, "タグ"), zipf_exponent, rng)
+    company_sampler = ZipfSampler(build_vocabulary(SEED_COMPANIES, company_vocabulary, "Company "), zipf_exponent, rng)
+
+    paths = []
+    for week_index in range(weeks):
+        report_date = end_date - timedelta(weeks=weeks - 1 - week_index)
+        path = output_dir / f"{report_date.strftime('%Y%m%d')}.json"
+        write_week(path, rng, week_index, report_date, articles_per_week, tag_sampler, company_sampler, summary_sentences)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成週次データの生成")
+    parser.add_argument("--output-dir", required=True, help="出力先（例: /tmp/corpus/reports/weekly_data）")
+    parser.add_argument("--weeks", type=int, default=156, help="週数（既定: 3年分）")
+    parser.add_argument("--articles-per-week", type=int, default=100, help="1週あたりの記事数")
+    parser.add_argument("--tags", type=int, default=5000, help="タグの語彙数")
+    parser.add_argument("--companies", type=int, default=2000, help="企業の語彙数")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf分布の指数")
+    parser.add_argument("--summary-sentences", type=int, default=3, help="要約の文数")
+    parser.add_argument("--end-date", default=DEFAULT_END_DATE, help="最新週のレポート日（YYYY-MM-DD）")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    paths = generate_corpus(
+        args.output_dir,
+        weeks=args.weeks,
+        articles_per_week=args.articles_per_week,
+        tag_vocabulary=args.tags,
+        company_vocabulary=args.companies,
+        zipf_exponent=args.zipf,
+        summary_sentences=args.summary_sentences,
+        end_date=args.end_date,
+        seed=args.seed,
+    )
+    total_bytes = sum(p.stat().st_size for p in paths)
+    print(f"✓ 合成データを生成しました: {args.output_dir}")
+    print(f"  - 週数: {len(paths)}週 / 記事数: {len(paths) * args.articles_per_week}件")
+    print(f"  - 合計サイズ: {total_bytes / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,16 @@
 既存の research_data.json から週次データを生成してテストします。
 """
 
+import os
+import sys
 import json
-from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 
+# プロジェクトルートをパスに追加（記事モデル読み込みのため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from article_model import build_weekly_data, load_articles
+
 
 def create_test_weekly_data():
     """テスト用の週次データを作成"""
@@ -19,8 +24,7 @@ def create_test_weekly_data():
         print("❌ research_data.jsonが見つかりません。")
         return
 
-    with open(research_data_path, "r", encoding="utf-8") as f:
-        articles = json.load(f)
+    articles = load_articles(research_data_path)
 
     # 週次データディレクトリの作成
     weekly_data_dir = Path("reports/weekly_data")
@@ -36,58 +40,8 @@ def create_test_weekly_data():
         start_date = report_date - timedelta(days=7)
         end_date = report_date
 
-        # キーワード、企業、カテゴリの集計
-        all_tags = []
-        all_companies = []
-        category_counts = Counter()
-        manufacturing_related = 0
-        confidence_scores = []
-
-        for article in articles:
-            if "tags" in article and article["tags"]:
-                all_tags.extend(article["tags"])
-
-            if "related_companies" in article and article["related_companies"]:
-                all_companies.extend(article["related_companies"])
-
-            if "category" in article and article["category"]:
-                category_counts[article["category"]] += 1
-
-            if article.get("manufacturing_relevance") == "あり":
-                manufacturing_related += 1
-
-            if "confidence_score" in article and article["confidence_score"]:
-                try:
-                    confidence_scores.append(float(article["confidence_score"]))
-                except (ValueError, TypeError):
-                    pass
-
-        keyword_counter = Counter(all_tags)
-        company_counter = Counter(all_companies)
-
-        top_keywords = [kw for kw, count in keyword_counter.most_common(10)]
-        top_companies = [company for company, count in company_counter.most_common(10)]
-
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
-
-        # 週次データの構築
-        weekly_data = {
-            "metadata": {
-                "report_date": report_date.strftime("%Y-%m-%d"),
-                "start_date": start_date.strftime("%Y-%m-%d"),
-                "end_date": end_date.strftime("%Y-%m-%d"),
-                "article_count": len(articles),
-                "execution_time": report_date.strftime("%Y-%m-%d %H:%M:%S")
-            },
-            "articles": articles,
-            "extracted_insights": {
-                "top_keywords": top_keywords,
-                "top_companies": top_companies,
-                "category_distribution": dict(category_counts),
-                "manufacturing_related_count": manufacturing_related,
-                "avg_confidence_score": round(avg_confidence, 2)
-            }
-        }
+        # 週次データの構築（Phase 1 が保存するものと同じ形式）
+        weekly_data = build_weekly_data(articles, report_date, start_date, end_date, execution_time=report_date)
 
         # ファイル名: YYYYMMDD.json
         date_str = report_date.strftime("%Y%m%d")
@@ -1,26 +1,52 @@
 """
 週次レポートのメール送信スクリプト
 最新のMarkdownレポートを読み込み、Gemini APIで要約を生成してGmail経由で送信
+
+レポートの構造化データ（サイドカー: 週次レポート_*.json）がある場合は、
+本文をテンプレートから組み立て、Gemini APIは冒頭リードの生成のみに使う。
+サイドカーがない過去のレポートは、従来どおりレポート全体から要約を生成する。
 """
 
 import os
 import sys
 import re
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import html
+import argparse
 from datetime import datetime
 from pathlib import Path
+from string import Template
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # プロジェクトルートをパスに追加（設定ファイル読み込みのため）
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from config_loader import get_config
+from instrumentation import get_recorder
+from mail_delivery import MailDelivery
+from model_router import get_model_router
+from report_manifest import report_date_from_path, resolve_report, scan_reports
+from report_sidecar import load_sidecar, sidecar_path_for
+from token_estimate import estimate_tokens
+
+
+def find_latest_report(report_date=None):
+    """
+    最新（または指定日）のレポートファイルを検索
+
+    マニフェスト（reports/report_manifest.json）があればそれを参照し、
+    なければファイル名の日付でレポートを並べて選ぶ。
+
+    Args:
+        report_date (str): レポート日（YYYY-MM-DD、省略時は最新）
 
+    Returns:
+        tuple: (レポートのパス, マニフェストのエントリ or None)
+    """
+    report_path, entry = resolve_report(report_date)
+    if report_path is not None:
+        print(f"✓ {'指定日' if report_date else '最新'}レポート: {report_path}（マニフェスト）")
+        return report_path, entry
 
-def find_latest_report():
-    """最新のレポートファイルを検索"""
     config = get_config()
     reports_dir = Path(config.get("data.reports_dir", "reports"))
 
@@ -28,33 +54,47 @@ def find_latest_report():
         print(f"❌ エラー: {reports_dir}/ ディレクトリが存在しません")
         sys.exit(1)
 
-    # 週次レポートファイルを検索
-    report_files = list(reports_dir.glob("週次レポート_*.md"))
+    # 週次レポートファイルを検索（ファイル名の日付で比較）
+    reports = dict(scan_reports(reports_dir))
 
-    if not report_files:
+    if not reports:
         print("❌ エラー: レポートファイルが見つかりません")
         sys.exit(1)
 
-    # 最新のファイルを取得（ファイル名の日付部分でソート）
-    latest_report = sorted(report_files, reverse=True)[0]
-    print(f"✓ 最新レポート: {latest_report}")
+    if report_date and report_date not in reports:
+        print(f"❌ エラー: {report_date} のレポートが見つかりません")
+        sys.exit(1)
+
+    report_path = reports[report_date or max(reports)]
+    print(f"✓ {'指定日' if report_date else '最新'}レポート: {report_path}")
 
-    return latest_report
+    return report_path, None
 
 
-def extract_report_info(report_path):
-    """レポートから情報を抽出"""
+def extract_report_info(report_path, entry=None):
+    """
+    レポートから情報を抽出
+
+    Args:
+        report_path (Path): レポートのパス
+        entry (dict): マニフェストのエントリ（あればレポート日・記事数をそこから取る）
+    """
     with open(report_path, "r", encoding="utf-8") as f:
         content = f.read()
 
-    # ファイル名から日付を抽出（週次レポート_2025_20251021.md）
     filename = report_path.name
-    date_match = re.search(r"(\d{8})", filename)
-    report_date = date_match.group(1) if date_match else datetime.now().strftime("%Y%m%d")
 
-    # 調査件数を抽出
-    count_match = re.search(r"\*\*調査対象データ件数\*\*:\s*(\d+)件", content)
-    article_count = count_match.group(1) if count_match else "不明"
+    if entry is not None:
+        report_date = entry["date"].replace("-", "")
+        article_count = entry["article_count"] if entry["article_count"] is not None else "不明"
+    else:
+        # ファイル名から日付を抽出（週次レポート_2025_20251021.md）
+        date_from_name = report_date_from_path(report_path)
+        report_date = date_from_name.replace("-", "") if date_from_name else datetime.now().strftime("%Y%m%d")
+
+        # 調査件数を抽出
+        count_match = re.search(r"\*\*調査対象データ件数\*\*:\s*(\d+)件", content)
+        article_count = count_match.group(1) if count_match else "不明"
 
     return {
         "content": content,
@@ -64,21 +104,28 @@ def extract_report_info(report_path):
     }
 
 
+def get_email_router():
+    """メール要約・リード文のモデルの振り分け（クォータ超過時は候補の次のモデルに切り替える）"""
+    config = get_config()
+    return get_model_router(
+        "email",
+        lambda model_name: ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=config.get("llm.email.temperature", 0.3),
+        ),
+    )
+
+
 def generate_email_summary(report_content, article_count):
     """Gemini APIでメール用の要約を生成（指定フォーマット）"""
     print("📝 Gemini APIでメール用の要約を生成中...")
 
-    config = get_config()
-
     google_api_key = os.environ.get("GOOGLE_API_KEY")
     if not google_api_key:
         print("❌ エラー: GOOGLE_API_KEYが設定されていません")
         sys.exit(1)
 
-    model = ChatGoogleGenerativeAI(
-        model=config.get("llm.email.model", "gemini-2.5-flash"),
-        temperature=config.get("llm.email.temperature", 0.3),
-    )
+    router = get_email_router()
 
     prompt = f"""
 以下の週次レポートを、技術調査メール（他社動向の俯瞰）として要約してください。
@@ -162,7 +209,9 @@ URLは必ず<a href="...">タグでハイパーリンクにしてください。
 """
 
     try:
-        response = model.invoke(prompt)
+        response = router.invoke(
+            "llm", lambda model: model.invoke(prompt), attempt=1, expected_tokens=estimate_tokens(prompt)
+        )
         summary = response.content
         print("✓ 要約生成完了")
         return summary
@@ -171,6 +220,147 @@ URLは必ず<a href="...">タグでハイパーリンクにしてください。
         sys.exit(1)
 
 
+# サイドカーから組み立てるメール本文（$lead などはエスケープ済みのHTML）
+EMAIL_BODY_TEMPLATE = Template("""<p>$lead</p>
+
+<p><strong>【今週の注目トレンド】</strong><br>
+$trends</p>
+
+<p><strong>【他社動向まとめ】</strong><br>
+<br>
+$companies</p>
+
+<p><strong>【要約】</strong><br>
+$summary</p>
+
+<p><strong>【情報源】</strong><br>
+$sources</p>
+""")
+
+
+def _sentences(text, count=1):
+    """先頭から count 文を取り出す（「。」区切り）"""
+    parts = [part for part in re.split(r"(?<=。)", text or "") if part.strip()]
+    return "".join(parts[:count]).strip()
+
+
+def _shorten(text, limit):
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _link(url, label):
+    return f'<a href="{html.escape(url, quote=True)}">{html.escape(label)}</a>'
+
+
+def load_report_sidecar(report_path, manifest_entry=None):
+    """レポートの構造化データ（サイドカー）を読み込む（ない場合は None）"""
+    if manifest_entry is not None and manifest_entry.get("sidecar"):
+        sidecar = load_sidecar(manifest_entry["sidecar"])
+        if sidecar is not None:
+            return sidecar
+    return load_sidecar(sidecar_path_for(report_path))
+
+
+def build_email_lead_prompt(sidecar, max_chars=300):
+    """メール冒頭のリード文を生成するプロンプト（サイドカーの要点から作る）"""
+    topics = "\n".join(f"- {topic['title']}" for topic in sidecar.get("topics", []))
+    companies = "、".join(company["name"] for company in sidecar.get("companies", [])[:5]) or "なし"
+    return f"""
+以下は今週の週次レポート（他社動向の技術調査）の要点である。
+社内向けメールの冒頭リードを、「お疲れ様です。」から始めて2〜3文・{max_chars}文字以内の日本語で書け。
+今週の主要テーマが一読で分かるようにし、HTMLタグ・見出し・箇条書きは使わないこと。
+
+# エグゼクティブサマリー
+{_shorten(sidecar.get("executive_summary", ""), 800)}
+
+# 注目トピック
+{topics or "- なし"}
+
+# 言及された主な企業
+{companies}
+"""
+
+
+def generate_email_lead(sidecar):
+    """
+    Gemini APIでメール冒頭のリード文（2〜3文）を生成
+
+    失敗した場合はエグゼクティブサマリーの冒頭で代用する。
+    """
+    config = get_config()
+    max_chars = config.get("email.lead_max_chars", 300)
+    fallback = "お疲れ様です。" + _shorten(_sentences(sidecar.get("executive_summary", ""), 2), max_chars)
+
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    if not google_api_key:
+        print("❌ エラー: GOOGLE_API_KEYが設定されていません")
+        sys.exit(1)
+
+    print("📝 Gemini APIでメールのリード文を生成中...")
+    router = get_email_router()
+
+    prompt = build_email_lead_prompt(sidecar, max_chars)
+
+    try:
+        response = router.invoke(
+            "llm", lambda model: model.invoke(prompt), attempt=1, expected_tokens=estimate_tokens(prompt)
+        )
+        lead = re.sub(r"<[^>]+>", "", response.content or "")
+        lead = re.sub(r"\s+", " ", lead).strip()
+        if not lead:
+            return fallback
+        if len(lead) > max_chars:
+            lead = lead[:max_chars]
+            lead = lead[:lead.rfind("。") + 1] if "。" in lead else lead
+        print("✓ リード文生成完了")
+        return lead
+    except Exception as e:
+        print(f"⚠️ リード文の生成に失敗したため、エグゼクティブサマリーで代用します: {str(e)}")
+        return fallback
+
+
+def render_email_body(sidecar, lead):
+    """サイドカーとリード文からメール本文（HTML）を組み立てる"""
+    config = get_config()
+    max_trends = config.get("email.max_trends", 5)
+    max_companies = config.get("email.max_companies", 5)
+
+    # 注目トレンド: レポートのトピック（なければ頻出タグ）
+    if sidecar.get("topics"):
+        trends = [
+            f"・{html.escape(topic['title'])}: {html.escape(_sentences(topic['content']))}"
+            for topic in sidecar["topics"][:max_trends]
+        ]
+    else:
+        trends = [f"・{html.escape(trend['tag'])}（{trend['count']}件）" for trend in sidecar.get("trends", [])[:max_trends]]
+
+    # 他社動向: 企業ごとに情報源の記事へリンク
+    companies = []
+    for company in sidecar.get("companies", [])[:max_companies]:
+        article = company["articles"][0]
+        companies.append(
+            f"＜{html.escape(company['name'])}＞ [{_link(article['url'], _shorten(article['title'], 40))}]<br>\n"
+            f"&nbsp;&nbsp;主な動き: {html.escape(_sentences(article.get('summary', '')))}<br>\n"
+            f"&nbsp;&nbsp;製造業への示唆: {html.escape(_sentences(article.get('relevance', '')))}"
+        )
+
+    # 情報源: 調査した全記事（省略しない）
+    sources = [
+        f"・{_link(source['url'], source['url'])}"
+        for source in sidecar.get("sources", [])
+        if source.get("url")
+    ]
+
+    return EMAIL_BODY_TEMPLATE.substitute(
+        lead=html.escape(lead).replace("お疲れ様です。", "お疲れ様です。<br>\n", 1),
+        trends="<br>\n".join(trends) or "・なし",
+        companies="<br>\n<br>\n".join(companies) or "該当なし",
+        summary=html.escape(_sentences(sidecar.get("executive_summary", ""), 2)) or "なし",
+        sources="<br>\n".join(sources) or "・なし",
+    )
+
+
 def generate_github_link(filename):
     """GitHubのファイルリンクを生成"""
     config = get_config()
@@ -189,31 +379,30 @@ def send_email(summary, report_info, github_link):
     # 環境変数から設定を取得
     gmail_user = os.environ.get("GMAIL_USER")
     gmail_password = os.environ.get("GMAIL_APP_PASSWORD")
-    recipient = os.environ.get("RECIPIENT_EMAIL")
+    # 宛先は環境変数から取得（プロファイルごとに email.recipients_env で変数名を変えられる）
+    recipients_env = config.get("email.recipients_env", "RECIPIENT_EMAIL")
+    recipient = os.environ.get(recipients_env)
 
-    if not all([gmail_user, gmail_password, recipient]):
+    # SMTP認証を使わない場合（ローカルのSMTPサーバーなど）はパスワード不要
+    use_auth = config.get("email.smtp.auth", True)
+    if not all([gmail_user, gmail_password or not use_auth, recipient]):
         print("❌ エラー: メール送信に必要な環境変数が設定されていません")
         print(f"GMAIL_USER: {'設定済み' if gmail_user else '未設定'}")
         print(f"GMAIL_APP_PASSWORD: {'設定済み' if gmail_password else '未設定'}")
-        print(f"RECIPIENT_EMAIL: {'設定済み' if recipient else '未設定'}")
+        print(f"{recipients_env}: {'設定済み' if recipient else '未設定'}")
         sys.exit(1)
 
     # カンマ区切りで複数の受信者に対応
-    recipients = [email.strip() for email in recipient.split(",")]
+    recipients = [email.strip() for email in recipient.split(",") if email.strip()]
     print(f"📮 送信先: {len(recipients)}名")
 
     # 日付をフォーマット（20251021 → 2025/10/21）
     date_str = report_info["date"]
     formatted_date = f"{date_str[:4]}/{date_str[4:6]}/{date_str[6:8]}"
 
-    # メール作成
-    msg = MIMEMultipart()
-    msg["From"] = gmail_user
-    msg["To"] = ", ".join(recipients)  # 複数の受信者をカンマ区切りで設定
-
     # 件名テンプレート
     subject_template = config.get("email.subject_template", "{date} 週次レポート｜海外スキルベース調査レポート")
-    msg["Subject"] = subject_template.format(date=formatted_date)
+    subject = subject_template.format(date=formatted_date)
 
     # メール本文（HTML形式）
     # summaryがすでにHTMLの<html>...</html>を含んでいる場合、bodyタグの中身だけを抽出
@@ -243,44 +432,56 @@ def send_email(summary, report_info, github_link):
 </html>
 """
 
-    msg.attach(MIMEText(body, "html", "utf-8"))
-
-    # Gmail SMTP経由で送信
-    smtp_server = config.get("email.smtp.server", "smtp.gmail.com")
-    smtp_port = config.get("email.smtp.port", 465)
-
+    # 1つのSMTP接続を使い回して、宛先ごと（またはグループごと）にバッチ送信
+    delivery = MailDelivery.from_config(gmail_user, gmail_password if use_auth else None)
+    print(f"📤 メール送信中...（{delivery.mode}）")
     try:
-        print("📤 メール送信中...")
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(gmail_user, gmail_password)
-            server.send_message(msg)
-
-        print("✓ メール送信完了")
-        print(f"   送信先: {', '.join(recipients)}")
-        print(f"   件名: {msg['Subject']}")
-
+        stats = delivery.send(subject, body, recipients)
     except Exception as e:
         print(f"❌ メール送信エラー: {str(e)}")
         sys.exit(1)
 
+    delivery.print_stats(stats)
+    print(f"   件名: {subject}")
+
+    # 1件も届けられなかった場合は失敗とする（再送キューに残ったメールは次回の実行で再送する）
+    if stats["recipients"] == 0:
+        if stats["queued"]:
+            print(f"❌ メール送信エラー: 再送しても送信できませんでした（{stats['queued']}件は再送キューに残し、次回の実行で再送します）")
+        else:
+            print("❌ メール送信エラー: 送信できた宛先がありません")
+        sys.exit(1)
+    print("✓ メール送信完了")
+
+
+def main(report_date=None):
+    """
+    メイン処理
 
-def main():
-    """メイン処理"""
+    Args:
+        report_date (str): 送信するレポートの日付（YYYY-MM-DD、省略時は最新）
+    """
     print("=" * 60)
     print("週次レポート メール送信スクリプト")
     print("=" * 60 + "\n")
+    get_recorder().set_phase("email")
 
     # 1. 最新レポートを検索
-    report_path = find_latest_report()
+    report_path, manifest_entry = find_latest_report(report_date)
 
     # 2. レポート情報を抽出
-    report_info = extract_report_info(report_path)
-
-    # 3. Gemini APIで要約を生成
-    summary = generate_email_summary(
-        report_info["content"],
-        report_info["article_count"]
-    )
+    report_info = extract_report_info(report_path, manifest_entry)
+
+    # 3. メール本文を生成（サイドカーがあればテンプレート＋リード文のみLLM）
+    sidecar = load_report_sidecar(report_path, manifest_entry)
+    if sidecar is not None:
+        print("✓ 構造化データ（サイドカー）からメール本文を組み立てます")
+        summary = render_email_body(sidecar, generate_email_lead(sidecar))
+    else:
+        summary = generate_email_summary(
+            report_info["content"],
+            report_info["article_count"]
+        )
 
     # 4. GitHubリンクを生成
     github_link = generate_github_link(report_info["filename"])
@@ -291,7 +492,11 @@ def main():
     print("\n" + "=" * 60)
     print("✓ 処理完了")
     print("=" * 60)
+    get_recorder().print_summary()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="週次レポートのメール送信")
+    parser.add_argument("--date", default=None, help="送信するレポートの日付（YYYY-MM-DD、既定: 最新）")
+    args = parser.parse_args()
+    main(report_date=args.date)
@@ -0,0 +1,247 @@
+"""
+パイプラインの差分実行スクリプト
+
+検索 → トレンド分析 → レポート生成 → メール送信の各ステージを、入力が前回から変わった場合だけ実行する
+（src/stage_runner.py）。入力・出力のハッシュは状態ファイル（stage_runner.state_path）に記録する。
+
+ステージと入力:
+- search:  config.yaml の検索関連の設定・検索期間（今日の日付・対象年・日数）・スクリプト → research_data.json・週次データ
+- trends:  週次データ（weekly_data_dir）・別名辞書・trends / entities の設定・スクリプト → トレンドデータ（trends_dir）
+- analyze: research_data.json・トレンドダイジェスト・分析モデルとプロンプトのテンプレート・スクリプト → レポート・サイドカー
+- email:   最新のレポートとサイドカー・メール設定・宛先・スクリプト（出力なし。同じレポートを同じ宛先に再送しない）
+（スクリプトは、スクリプトが import する src/ のモジュールも含めてハッシュする）
+
+trends は search が保存した今週の週次データ（weekly_data_dir）を読むため、search の完了を待つ。
+analyze はトレンドダイジェストをプロンプトに含める場合（trends.digest.enabled）、trends の完了も待つ。
+
+使い方:
+    # 検索 → トレンド分析 → レポート生成（変更のないステージはスキップ）
+    python run_pipeline.py
+
+    # メール送信まで実行
+    python run_pipeline.py --stages search,trends,analyze,email
+
+    # 何が実行されるかと、その所要時間・API使用量の見積もりを表示
+    python run_pipeline.py --dry-run
+
+    # 状態に関わらず、選んだステージを実行した場合の見積もりを表示
+    python run_pipeline.py --stages search,trends,analyze,email --estimate
+
+    # 入力に関わらずレポートを作り直す
+    python run_pipeline.py --force analyze
+"""
+
+import os
+import ast
+import sys
+import argparse
+from contextlib import nullcontext
+from datetime import date
+from pathlib import Path
+
+# プロジェクトルートをパスに追加（設定ファイル読み込みのため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from config_loader import get_config, use_profile
+from instrumentation import get_recorder
+from report_manifest import resolve_report
+from report_sidecar import sidecar_path_for
+from run_estimator import print_estimate
+from stage_runner import Stage, StagePrefixedOutput, StageRunner, print_results, value_hash
+from trend_digest import DIGEST_FILENAME
+
+STAGES = ("search", "trends", "analyze", "email")
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+# ステージごとに入力として扱う config.yaml の項目
+CONFIG_KEYS = {
+    "search": (
+        "search", "tavily", "ranking", "content_extraction", "llm.searcher", "llm.formatter", "model_router", "agent",
+        "formatting", "dedup", "filtering",
+        "prompts.search_topic", "prompts.search_focus", "prompts.search_priority_note",
+    ),
+    "trends": ("trends", "entities"),
+    "analyze": ("llm.analyzer", "model_router", "report", "trends.digest", "prompts.analysis_template"),
+    "email": ("email", "llm.email", "model_router"),
+}
+
+
+def local_modules(script):
+    """スクリプトと、そこから（間接的にも）import される src/ のモジュールのパス"""
+    src_dir = ROOT_DIR / "src"
+    found = {}
+    pending = [Path(script)]
+    while pending:
+        path = pending.pop()
+        if path in found.values():
+            continue
+        found[path.stem] = path
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = src_dir / f"{name.split('.')[0]}.py"
+                if module.stem not in found and module.exists():
+                    pending.append(module)
+    return sorted(found.values())
+
+
+def script_hash(hasher, script):
+    """スクリプトと、それが使う src/ のモジュールの内容のハッシュ（モジュールの変更でもステージを実行し直す）"""
+    return value_hash([
+        (path.relative_to(ROOT_DIR).as_posix(), hasher.file_hash(path)) for path in local_modules(script)
+    ])
+
+
+def config_hash(stage):
+    config = get_config()
+    return value_hash({key: config.get(key) for key in CONFIG_KEYS[stage]})
+
+
+def build_stages(target_year=None):
+    """パイプラインのステージ定義を作成"""
+    config = get_config()
+    research_data_path = config.get("data.research_data_path", "reports/research_data.json")
+    weekly_data_dir = config.get("data.weekly_data_dir", "reports/weekly_data")
+    trends_dir = Path(config.get("data.trends_dir", "reports/trends"))
+    use_digest = config.get("trends.digest.enabled", True)
+    produced = {}
+
+    def run_search():
+        from research_searcher import search_and_extract_data
+        search_and_extract_data(target_year=target_year)
+
+    def search_inputs(hasher):
+        window = f"{date.today().isoformat()}/{target_year or ''}/{config.get('search.days_back', 7)}"
+        return {
+            "config": config_hash("search"),
+            "window": value_hash(window),
+            "script": script_hash(hasher, ROOT_DIR / "src" / "research_searcher.py"),
+        }
+
+    def run_trends():
+        import analyze_trends
+        analyze_trends.main()
+
+    def trends_inputs(hasher):
+        return {
+            "weekly_data": hasher.path_hash(weekly_data_dir),
+            "entity_aliases": hasher.file_hash(config.get("entities.alias_path", "entity_aliases.yaml")),
+            "config": config_hash("trends"),
+            "script": script_hash(hasher, ROOT_DIR / "analyze_trends.py"),
+        }
+
+    def run_analyze():
+        from research_analyzer import generate_analysis_report
+        produced["report"] = generate_analysis_report(target_year=target_year)
+
+    def analyze_inputs(hasher):
+        inputs = {
+            "research_data": hasher.file_hash(research_data_path),
+            "model": value_hash(config.get("llm.analyzer.model", "gemini-2.5-flash")),
+            "config": config_hash("analyze"),
+            "script": script_hash(hasher, ROOT_DIR / "src" / "research_analyzer.py"),
+        }
+        template_path = config.get("prompts.analysis_template")
+        if template_path:
+            inputs["prompt_template"] = hasher.file_hash(template_path)
+        if use_digest:
+            inputs["trend_digest"] = hasher.file_hash(trends_dir / DIGEST_FILENAME)
+        return inputs
+
+    def analyze_outputs():
+        report_path = produced.get("report") or resolve_report()[0]
+        return [report_path, sidecar_path_for(report_path)] if report_path else []
+
+    def run_email():
+        import email_report
+        email_report.main()
+
+    def email_inputs(hasher):
+        report_path, entry = resolve_report()
+        sidecar = (entry or {}).get("sidecar") or (sidecar_path_for(report_path) if report_path else None)
+        recipients_env = config.get("email.recipients_env", "RECIPIENT_EMAIL")
+        return {
+            "report": hasher.file_hash(report_path) if report_path else "missing",
+            "sidecar": hasher.file_hash(sidecar) if sidecar else "missing",
+            "recipients": value_hash(os.environ.get(recipients_env, "")),
+            "config": config_hash("email"),
+            "script": script_hash(hasher, ROOT_DIR / "email_report.py"),
+        }
+
+    return [
+        Stage("search", run_search, search_inputs, lambda: [research_data_path, weekly_data_dir]),
+        Stage("trends", run_trends, trends_inputs, lambda: [trends_dir], deps=("search",)),
+        Stage("analyze", run_analyze, analyze_inputs, analyze_outputs,
+              deps=("search", "trends") if use_digest else ("search",)),
+        Stage("email", run_email, email_inputs, lambda: [], deps=("analyze",)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パイプラインの差分実行")
+    parser.add_argument("--stages", default="search,trends,analyze", help=f"実行するステージ（カンマ区切り: {', '.join(STAGES)}）")
+    parser.add_argument("--force", default="", help="入力に関わらず実行するステージ（カンマ区切り、all: すべて）")
+    parser.add_argument("--dry-run", action="store_true", help="実行せずに、各ステージを実行するか（理由）と見積もりを表示")
+    parser.add_argument("--estimate", action="store_true", help="実行せずに、選んだすべてのステージの所要時間・API使用量を見積もる")
+    parser.add_argument("--workers", type=int, default=None, help="同時に実行するステージ数")
+    parser.add_argument("--year", type=int, default=None, help="検索対象年")
+    parser.add_argument("--profile", default=None, help="調査プロファイル（config.yaml の profiles）")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    force = {stage.strip() for stage in args.force.split(",") if stage.strip()}
+    if "all" in force:
+        force = set(stages)
+    unknown = [stage for stage in stages + sorted(force) if stage not in STAGES]
+    if unknown:
+        print(f"❌ エラー: 未知のステージです: {', '.join(unknown)}（{' / '.join(STAGES)}）")
+        sys.exit(1)
+    stages = [stage for stage in STAGES if stage in stages]
+
+    with use_profile(args.profile) if args.profile else nullcontext():
+        config = get_config()
+        runner = StageRunner(
+            build_stages(target_year=args.year),
+            config.get("stage_runner.state_path", "reports/stage_state.json"),
+            workers=args.workers or config.get("stage_runner.max_workers", 2),
+        )
+
+        if args.estimate:
+            print_estimate(stages)
+            return
+        if args.dry_run:
+            plan = runner.plan(stages, force)
+            print_results(plan, title="実行計画（--dry-run）")
+            pending = [result["stage"] for result in plan if result["action"] == "pending"]
+            if pending:
+                print_estimate(pending)
+            return
+
+        print("=" * 60)
+        print(f"🔧 パイプラインを実行します: {' → '.join(stages)}")
+        print("=" * 60)
+        recorder = get_recorder()
+        # 並行実行するステージの内訳表は省略し、最後にまとめて表示する
+        recorder.defer_summary = True
+        stdout = sys.stdout
+        sys.stdout = StagePrefixedOutput(stdout)
+        try:
+            results = runner.run(stages, force)
+        finally:
+            sys.stdout.flush()
+            sys.stdout = stdout
+            recorder.defer_summary = False
+        print_results(results)
+        recorder.print_summary()
+
+    if any(result["action"] in ("failed", "blocked") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
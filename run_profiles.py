@@ -0,0 +1,185 @@
+"""
+調査プロファイルの並行実行スクリプト
+
+config.yaml の profiles に定義したテーマごとの調査（検索 → 分析 → メール送信）を
+1つのプロセスで並行して実行する。プロファイルごとに別のジョブを起動する場合と比べ、
+ライブラリの読み込みは1回で済み、次の3つを全プロファイルで共有する。
+
+- レート制限（src/rate_limiter.py）: Gemini・Tavily の1分あたりの呼び出し数を全体で制限
+- 検索キャッシュ（src/search_cache.py）: 同じ条件の検索結果を再利用
+- 重複排除インデックス（src/dedup_index.py）: 記事の重複を除外
+
+各プロファイルのキーワード・プロンプト・出力先・宛先は config_loader.use_profile() で切り替わる。
+出力はプロファイル名を行頭に付けて表示する。
+
+使い方:
+    # 有効なプロファイルをすべて実行（検索 → 分析）
+    python run_profiles.py
+
+    # プロファイルとステージを指定
+    python run_profiles.py --profiles skills,ai_workforce --stages search,analyze,email
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# プロジェクトルートをパスに追加（設定ファイル読み込みのため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from config_loader import active_profile, get_config, use_profile
+from instrumentation import get_recorder
+
+STAGES = ("search", "trends", "analyze", "email")
+
+
+class ProfilePrefixedOutput:
+    """実行中のプロファイル名を行頭に付けて出力する標準出力（行単位で書き出す）"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", "") + text
+        *lines, self._local.buffer = buffer.split("\n")
+        if lines:
+            profile = active_profile()
+            prefix = f"[{profile}] " if profile else ""
+            with self._lock:
+                self.stream.write("".join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def run_stage(stage, target_year=None):
+    """ステージを1つ実行する"""
+    if stage == "search":
+        from research_searcher import search_and_extract_data
+        search_and_extract_data(target_year=target_year)
+    elif stage == "trends":
+        import analyze_trends
+        analyze_trends.main()
+    elif stage == "analyze":
+        from research_analyzer import generate_analysis_report
+        generate_analysis_report(target_year=target_year)
+    elif stage == "email":
+        import email_report
+        email_report.main()
+    else:
+        raise ValueError(f"未知のステージです: {stage}")
+
+
+def run_profile(name, stages, target_year=None):
+    """
+    1つのプロファイルのステージを順に実行する
+
+    Returns:
+        dict: {"profile", "status", "stage", "elapsed_s"}
+    """
+    start = time.perf_counter()
+    result = {"profile": name, "status": "ok", "stage": None}
+    with use_profile(name):
+        for stage in stages:
+            result["stage"] = stage
+            try:
+                run_stage(stage, target_year)
+            except SystemExit as e:
+                # 各スクリプトはエラー時に sys.exit する（他のプロファイルは続行）
+                if e.code:
+                    result["status"] = f"exit({e.code})"
+                    break
+            except Exception as e:
+                result["status"] = f"error({type(e).__name__}: {e})"
+                break
+    result["elapsed_s"] = round(time.perf_counter() - start, 1)
+    return result
+
+
+def run_profiles(names, stages, workers=None, target_year=None):
+    """
+    プロファイルを並行実行する
+
+    Args:
+        names (list): プロファイル名
+        stages (list): 実行するステージ（STAGES の順に実行）
+        workers (int): 同時に実行するプロファイル数（既定: プロファイル数）
+        target_year (int): 検索対象年
+
+    Returns:
+        list: プロファイルごとの結果
+    """
+    stages = [stage for stage in STAGES if stage in stages]
+    workers = max(1, min(workers or len(names), len(names)))
+    recorder = get_recorder()
+    # 各ステージの終了時の内訳表は省略し、最後にまとめて表示する
+    recorder.defer_summary = True
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile") as executor:
+            futures = [executor.submit(run_profile, name, stages, target_year) for name in names]
+            results = [future.result() for future in futures]
+    finally:
+        recorder.defer_summary = False
+    return results
+
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="調査プロファイルの並行実行")
+    parser.add_argument("--profiles", default=None, help="実行するプロファイル（カンマ区切り、既定: 有効なものすべて）")
+    parser.add_argument("--stages", default="search,analyze", help=f"実行するステージ（カンマ区切り: {', '.join(STAGES)}）")
+    parser.add_argument("--workers", type=int, default=None, help="同時に実行するプロファイル数")
+    parser.add_argument("--year", type=int, default=None, help="検索対象年")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.profiles.split(",") if name.strip()] if args.profiles else config.profile_names()
+    if not names:
+        print("❌ エラー: config.yaml の profiles に有効なプロファイルがありません")
+        sys.exit(1)
+    for name in names:
+        config.profile_settings(name)  # 未定義の名前はここで KeyError にする
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"❌ エラー: 未知のステージです: {', '.join(unknown)}（{' / '.join(STAGES)}）")
+        sys.exit(1)
+
+    workers = args.workers or config.get("profiles_runner.max_workers", 0) or None
+    print("=" * 60)
+    print(f"🗂️ 調査プロファイルを並行実行します: {', '.join(names)}")
+    print(f"   ステージ: {' → '.join(s for s in STAGES if s in stages)} / 同時実行数: {workers or len(names)}")
+    print("=" * 60)
+
+    stdout = sys.stdout
+    sys.stdout = ProfilePrefixedOutput(stdout)
+    try:
+        results = run_profiles(names, stages, workers=workers, target_year=args.year)
+    finally:
+        sys.stdout.flush()
+        sys.stdout = stdout
+
+    print("\n" + "=" * 60)
+    print("📋 プロファイルごとの結果")
+    print("=" * 60)
+    for result in results:
+        mark = "✓" if result["status"] == "ok" else "❌"
+        detail = "" if result["status"] == "ok" else f"（{result['stage']}: {result['status']}）"
+        print(f"{mark} {result['profile']}: {result['elapsed_s']:.1f}秒{detail}")
+    get_recorder().print_summary()
+
+    if any(result["status"] != "ok" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+ReActエージェントのメッセージ履歴の圧縮
+create_react_agent は検索ツールの結果（JSON）をそのまま履歴に追加し、以降の推論のたびに全履歴を送り直すため、
+1バッチのトークン数は手順数のおおむね2乗で増える。モデルを呼び出す直前（pre_model_hook）に、
+モデルへ渡す履歴だけを次のように圧縮する（グラフの状態は変更しない）。
+
+- 検索結果は抽出に必要な項目（タイトル・URL・公開日・本文）だけを残し、本文は max_content_chars で切り詰める
+  （生コンテンツから抽出・要約した本文（content_extractor.py）は max_raw_content_chars まで残す）
+- 以前の検索結果と同じURLの記事は、タイトルだけの参照にする
+- 履歴の推定トークン数が max_history_tokens を超えた場合、直近 keep_recent 件を除く古い検索結果を
+  「タイトル・URL・公開日」の一覧に置き換える（それでも超える場合は一覧も省略する）
+
+圧縮前後のトークン数は実行ログ（kind: "compaction"）に記録する。
+"""
+import json
+
+from langchain_core.messages import ToolMessage
+
+from config_loader import get_config
+from instrumentation import get_recorder
+from token_estimate import estimate_tokens
+
+# 抽出プロンプト（タイトル・URL・媒体・公開日・要約）に必要な項目
+KEEP_FIELDS = ("title", "url", "published_date", "content")
+
+
+def _message_tokens(message):
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+    return estimate_tokens(content)
+
+
+def _truncate(text, max_chars):
+    text = " ".join(str(text or "").split())
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars].rstrip() + "…"
+    return text
+
+
+def _parse_results(content):
+    """検索ツールの出力（JSON）から結果のリストを取り出す（検索結果でない場合は None）"""
+    if not isinstance(content, str):
+        return None
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return data
+    return None
+
+
+class HistoryCompactor:
+    """
+    モデルに渡すメッセージ履歴の圧縮
+
+    Args:
+        max_content_chars (int): 検索結果1件あたりの本文の最大文字数（0: 切り詰めない）
+        max_raw_content_chars (int): 生コンテンツ・その要約（include_raw_content）の最大文字数（0: 含めない）
+        max_history_tokens (int): 履歴の推定トークン数の上限（0: 古い検索結果を要約しない）
+        keep_recent (int): 要約しない直近の検索結果の数
+    """
+
+    def __init__(self, max_content_chars=500, max_raw_content_chars=2000, max_history_tokens=6000, keep_recent=1):
+        self.max_content_chars = max_content_chars
+        self.max_raw_content_chars = max_raw_content_chars
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent = keep_recent
+
+    def compact_results(self, data, seen_urls):
+        """検索結果の必要な項目だけを残し、既出のURLはタイトルだけにする"""
+        results = []
+        for result in data["results"]:
+            if not isinstance(result, dict):
+                continue
+            url = result.get("url", "")
+            if url and url in seen_urls:
+                results.append({"title": result.get("title", ""), "url": url, "note": "既出"})
+                continue
+            seen_urls.add(url)
+            item = {field: result[field] for field in KEEP_FIELDS if result.get(field)}
+            if "content" in item:
+                max_chars = self.max_raw_content_chars if result.get("extracted") else self.max_content_chars
+                item["content"] = _truncate(item["content"], max_chars)
+            if self.max_raw_content_chars and result.get("raw_content"):
+                item["raw_content"] = _truncate(result["raw_content"], self.max_raw_content_chars)
+            results.append(item)
+        return {"query": data.get("query", ""), "results": results}
+
+    @staticmethod
+    def digest(data):
+        """古い検索結果の一覧（タイトル・URL・公開日）"""
+        lines = [f"（要約済みの検索結果: {data.get('query', '')}）"]
+        for result in data["results"]:
+            if result.get("note"):
+                continue
+            date = f"（{result['published_date']}）" if result.get("published_date") else ""
+            lines.append(f"- {result.get('title', '')} {result.get('url', '')}{date}")
+        return "\n".join(lines)
+
+    def compact(self, messages):
+        """
+        メッセージ履歴を圧縮したコピーを返す
+
+        Returns:
+            tuple: (圧縮後のメッセージのリスト, 圧縮前の推定トークン数, 圧縮後の推定トークン数)
+        """
+        before = sum(_message_tokens(message) for message in messages)
+        seen_urls = set()
+        compacted = list(messages)
+        tool_positions = []
+        parsed = {}
+        for index, message in enumerate(messages):
+            if not isinstance(message, ToolMessage):
+                continue
+            data = _parse_results(message.content)
+            if data is None:
+                continue
+            data = self.compact_results(data, seen_urls)
+            parsed[index] = data
+            tool_positions.append(index)
+            compacted[index] = message.model_copy(update={"content": json.dumps(data, ensure_ascii=False)})
+
+        if self.max_history_tokens:
+            total = sum(_message_tokens(message) for message in compacted)
+            old_positions = tool_positions[:-self.keep_recent] if self.keep_recent else tool_positions
+            # 古い検索結果から順に一覧に置き換え、それでも超える場合は一覧も省略する
+            for replacement in (self.digest, lambda data: f"（省略した検索結果: {data.get('query', '')}）"):
+                for index in old_positions:
+                    if total <= self.max_history_tokens:
+                        break
+                    current = _message_tokens(compacted[index])
+                    compacted[index] = compacted[index].model_copy(update={"content": replacement(parsed[index])})
+                    total += _message_tokens(compacted[index]) - current
+
+        after = sum(_message_tokens(message) for message in compacted)
+        return compacted, before, after
+
+    def __call__(self, state):
+        """create_react_agent の pre_model_hook（モデルへの入力だけを差し替える）"""
+        messages, before, after = self.compact(state["messages"])
+        if before != after:
+            get_recorder().record("compaction", messages=len(messages), before_tokens=before, after_tokens=after)
+        return {"llm_input_messages": messages}
+
+
+def get_history_compactor():
+    """設定に応じた履歴の圧縮（無効の場合は None）"""
+    config = get_config()
+    if not config.get("agent.compaction.enabled", True):
+        return None
+    return HistoryCompactor(
+        max_content_chars=config.get("agent.compaction.max_content_chars", 500),
+        max_raw_content_chars=config.get("agent.compaction.max_raw_content_chars", 2000),
+        max_history_tokens=config.get("agent.compaction.max_history_tokens", 6000),
+        keep_recent=config.get("agent.compaction.keep_recent", 1),
+    )
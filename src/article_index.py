@@ -0,0 +1,404 @@
+"""
+記事アーカイブのベクトル索引
+週次データ（reports/weekly_data/*.json）と検索データ（reports/research_data.json）の記事を
+title + summary_japanese + key_points でベクトル化し、類似する過去記事を検索する。
+
+- 既定はハッシュ化ベクトル（英単語＋日本語の文字バイグラム）で、ネットワーク・追加パッケージ不要
+- article_index.embedding_model を指定し sentence-transformers がインストールされていれば、そのモデルを使う
+- ベクトルは float32 の生バイナリ（vectors.f32）に追記し、検索時はメモリマップで読む
+- 検索は全件走査（numpy があれば行列積、なければクエリの非ゼロ次元だけを走査）
+
+使い方:
+    # アーカイブ全体を索引（登録済みの記事はスキップ）
+    python src/article_index.py build
+
+    # 関連する過去記事を検索
+    python src/article_index.py search "熟練工の技能伝承" -k 5
+"""
+import re
+import sys
+import json
+import math
+import mmap
+import zlib
+import heapq
+import argparse
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from config_loader import get_config
+from entity_normalizer import normalize_surface
+
+# numpy があれば行列積で検索する（なくても動作する）
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INDEX_VERSION = 1
+HEADER_FILENAME = "index.json"
+VECTORS_FILENAME = "vectors.f32"
+META_FILENAME = "meta.jsonl"
+
+# 英数字の単語と、それ以外（日本語など）の連続
+_ASCII_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+_NON_ASCII_RUN = re.compile(r"[^\x00-\x7f\s、。・「」『』（）()【】［］\[\]：:，,．！？!?]+")
+
+# タイトルは本文より重く扱う
+FIELD_WEIGHTS = {"title": 2.0, "summary_japanese": 1.0, "key_points": 1.0}
+
+
+def article_text_fields(article):
+    """索引対象のフィールドを (フィールド名, テキスト) で返す"""
+    key_points = article.get("key_points") or []
+    if isinstance(key_points, str):
+        key_points = [key_points]
+    return [
+        ("title", article.get("title") or ""),
+        ("summary_japanese", article.get("summary_japanese") or ""),
+        ("key_points", " ".join(str(point) for point in key_points)),
+    ]
+
+
+def tokenize(text):
+    """英単語（小文字）と日本語の文字バイグラムに分割"""
+    text = normalize_surface(text).lower()
+    tokens = _ASCII_WORD.findall(text)
+    for run in _NON_ASCII_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class HashingEmbedder:
+    """特徴ハッシュによる埋め込み（符号付き、TFは対数で減衰、L2正規化）"""
+
+    def __init__(self, dimension=512):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def sparse(self, fields):
+        """
+        (フィールド名, テキスト) のリストを疎ベクトル {次元: 値} に変換
+        """
+        weights = Counter()
+        for field, text in fields:
+            for token, tf in Counter(tokenize(text)).items():
+                h = zlib.crc32(token.encode("utf-8"))
+                sign = 1.0 if (h >> 31) & 1 else -1.0
+                weights[h % self.dimension] += sign * FIELD_WEIGHTS.get(field, 1.0) * (1.0 + math.log(tf))
+
+        norm = math.sqrt(sum(value * value for value in weights.values()))
+        if not norm:
+            return {}
+        return {i: value / norm for i, value in weights.items() if value}
+
+    def embed(self, fields):
+        """密ベクトル（list[float]）に変換"""
+        vector = [0.0] * self.dimension
+        for i, value in self.sparse(fields).items():
+            vector[i] = value
+        return vector
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers のモデルによる埋め込み（CPUで動く小型モデルを想定）"""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.name = f"st:{model_name}"
+
+    def sparse(self, fields):
+        return {i: value for i, value in enumerate(self.embed(fields)) if value}
+
+    def embed(self, fields):
+        text = "\n".join(text for _, text in fields if text)
+        return [float(value) for value in self.model.encode(text, normalize_embeddings=True)]
+
+
+def create_embedder(model_name=None, dimension=512):
+    """設定に応じた埋め込みを作成（モデルが使えない場合はハッシュ化ベクトル）"""
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"⚠️ 埋め込みモデル {model_name} を読み込めないため、ハッシュ化ベクトルを使用します: {e}")
+    return HashingEmbedder(dimension)
+
+
+class ArticleIndex:
+    """
+    記事のベクトル索引
+
+    ディレクトリ構成:
+        index.json   ... 埋め込みの種類・次元・件数
+        vectors.f32  ... float32 × 次元 × 件数（行優先）
+        meta.jsonl   ... 1行1記事のメタデータ（url, title, source, published_date, report_date）
+
+    index.json の件数を最後に更新するため、追記の途中で失敗しても件数までは整合している。
+    """
+
+    def __init__(self, index_dir, embedder):
+        self.index_dir = Path(index_dir)
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.count = 0
+        self.meta = []
+        self._urls = set()
+        self._load()
+
+    @property
+    def header_path(self):
+        return self.index_dir / HEADER_FILENAME
+
+    @property
+    def vectors_path(self):
+        return self.index_dir / VECTORS_FILENAME
+
+    @property
+    def meta_path(self):
+        return self.index_dir / META_FILENAME
+
+    def _load(self):
+        if not self.header_path.exists():
+            return
+
+        with open(self.header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("embedder") != self.embedder.name or header.get("dimension") != self.dimension:
+            raise ValueError(
+                f"索引の埋め込み（{header.get('embedder')}）が設定（{self.embedder.name}）と異なります。"
+                "`python src/article_index.py build --rebuild` で作り直してください。"
+            )
+
+        self.count = header["count"]
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if len(self.meta) >= self.count:
+                    break
+                self.meta.append(json.loads(line))
+        self._urls = {entry["url"] for entry in self.meta if entry.get("url")}
+
+    def _write_header(self):
+        tmp_path = self.header_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": INDEX_VERSION,
+                "embedder": self.embedder.name,
+                "dimension": self.dimension,
+                "count": self.count,
+            }, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.header_path)
+
+    @staticmethod
+    def article_key(article):
+        """記事の識別子（URL、なければタイトル）"""
+        return article.get("url") or article.get("title") or ""
+
+    def __contains__(self, article):
+        return self.article_key(article) in self._urls
+
+    def add_articles(self, articles, report_date=None):
+        """
+        記事を追加（登録済みのURLはスキップ）
+
+        Returns:
+            int: 追加した件数
+        """
+        new_entries = []
+        vectors = array("f")
+        for article in articles:
+            key = self.article_key(article)
+            if not key or key in self._urls:
+                continue
+            self._urls.add(key)
+            vectors.extend(self.embedder.embed(article_text_fields(article)))
+            new_entries.append({
+                "url": key,
+                "title": article.get("title", ""),
+                "source": article.get("source", ""),
+                "published_date": article.get("published_date", ""),
+                "report_date": report_date,
+            })
+
+        if not new_entries:
+            return 0
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # 前回の追記が途中で失敗していた場合に備え、件数の位置から書き直す
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(self.count * self.dimension * vectors.itemsize)
+            vectors.tofile(f)
+        with open(self.meta_path, "a", encoding="utf-8") as f:
+            f.truncate(self._meta_offset())
+            for entry in new_entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        self.meta.extend(new_entries)
+        self.count += len(new_entries)
+        self._write_header()
+        return len(new_entries)
+
+    def _meta_offset(self):
+        """登録済み件数分のメタデータのバイト数"""
+        if not self.meta_path.exists():
+            return 0
+        offset = 0
+        with open(self.meta_path, "rb") as f:
+            for _ in range(self.count):
+                line = f.readline()
+                if not line:
+                    break
+                offset += len(line)
+        return offset
+
+    def _scores(self, query):
+        """全記事とのコサイン類似度（ベクトルは正規化済みのため内積）"""
+        if not self.count:
+            return []
+
+        with open(self.vectors_path, "rb") as f:
+            if np is not None:
+                matrix = np.memmap(f, dtype=np.float32, mode="r", shape=(self.count, self.dimension))
+                dense = np.zeros(self.dimension, dtype=np.float32)
+                for i, value in query.items():
+                    dense[i] = value
+                return (matrix @ dense).tolist()
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped).cast("f")
+                try:
+                    items = list(query.items())
+                    dimension = self.dimension
+                    return [
+                        sum(view[base + i] * value for i, value in items)
+                        for base in range(0, self.count * dimension, dimension)
+                    ]
+                finally:
+                    view.release()
+
+    def search(self, text=None, k=5, article=None, min_score=0.0, exclude_urls=()):
+        """
+        関連する過去記事を検索
+
+        Args:
+            text (str): 検索文（article と排他）
+            k (int): 件数
+            article (dict): 記事（類似記事・重複の検出用）
+            min_score (float): 類似度の下限
+            exclude_urls (iterable): 除外するURL
+
+        Returns:
+            list: [{"score", "url", "title", "source", "published_date", "report_date"}, ...]
+        """
+        fields = article_text_fields(article) if article is not None else [("summary_japanese", text or "")]
+        query = self.embedder.sparse(fields)
+        if not query:
+            return []
+
+        exclude = set(exclude_urls)
+        if article is not None:
+            exclude.add(self.article_key(article))
+
+        candidates = (
+            (score, row)
+            for row, score in enumerate(self._scores(query))
+            if score >= min_score and self.meta[row]["url"] not in exclude
+        )
+        return [{"score": round(score, 4), **self.meta[row]} for score, row in heapq.nlargest(k, candidates)]
+
+
+def iter_archive_articles():
+    """
+    アーカイブの記事を (レポート日, 記事リスト) で返す
+
+    週次データ（古い順）のあとに、最新の検索データを返す。
+    """
+    config = get_config()
+    weekly_data_dir = Path(config.get("data.weekly_data_dir", "reports/weekly_data"))
+    for path in sorted(weekly_data_dir.glob("*.json")) if weekly_data_dir.exists() else []:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ {path.name} の読み込みに失敗しました: {e}")
+            continue
+        yield data.get("metadata", {}).get("report_date"), data.get("articles", [])
+
+    research_data_path = Path(config.get("data.research_data_path", "reports/research_data.json"))
+    if research_data_path.exists():
+        with open(research_data_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield None, data if isinstance(data, list) else data.get("articles", [])
+
+
+def open_index(index_dir=None, rebuild=False):
+    """設定に従って索引を開く（rebuild=True の場合は既存の索引を削除する）"""
+    config = get_config()
+    index_dir = Path(index_dir or config.get("article_index.index_dir", "reports/article_index"))
+    if rebuild:
+        for name in (HEADER_FILENAME, VECTORS_FILENAME, META_FILENAME):
+            (index_dir / name).unlink(missing_ok=True)
+    embedder = create_embedder(
+        config.get("article_index.embedding_model") or None,
+        config.get("article_index.dimension", 512),
+    )
+    return ArticleIndex(index_dir, embedder)
+
+
+def index_archive(index=None):
+    """
+    アーカイブ全体を索引に追加（登録済みの記事はスキップ）
+
+    Returns:
+        int: 追加した件数
+    """
+    index = index or open_index()
+    return sum(index.add_articles(articles, report_date) for report_date, articles in iter_archive_articles())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記事アーカイブのベクトル索引")
+    parser.add_argument("--index-dir", default=None, help="索引の保存先（既定: article_index.index_dir）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="アーカイブを索引に追加")
+    build.add_argument("--rebuild", action="store_true", help="既存の索引を削除して作り直す")
+
+    search = subparsers.add_parser("search", help="関連する過去記事を検索")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5, help="件数")
+    search.add_argument("--min-score", type=float, default=0.0, help="類似度の下限")
+
+    args = parser.parse_args()
+
+    try:
+        index = open_index(args.index_dir, rebuild=getattr(args, "rebuild", False))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.command == "build":
+        added = index_archive(index)
+        print(f"✓ {added}件を追加しました（合計 {index.count}件 / {index.embedder.name}）")
+        print(f"💾 保存先: {index.index_dir}")
+        return
+
+    results = index.search(args.query, k=args.k, min_score=args.min_score)
+    print(f"🔎 「{args.query}」に関連する過去記事（{index.count}件中）")
+    for rank, result in enumerate(results, start=1):
+        date = result["published_date"] or "日付不明"
+        print(f"  {rank}. [{result['score']:.3f}] {result['title']}｜{result['source']}｜{date}")
+        print(f"     {result['url']}")
+    if not results:
+        print("  （該当なし）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+記事データのモデル（全スクリプト共通）
+Phase 1 の記事（research_data.json・週次データの articles）を型付きの Article として扱う。
+
+- 取り込み時（整形結果・JSONファイルの読み込み）に1回だけ検証・型変換し、以降の処理では
+  .get() や float() の変換、"あり" の文字列比較を繰り返さない
+- __slots__ のデータクラスで、タグ・企業名などはタプル、公開日は date として保持する
+- カテゴリ・地域・媒体名・タグ・企業名は sys.intern で共有し、多数の記事を読み込んでもメモリを抑える
+- JSONの形式（キー名・キーの順・値の形）は従来の辞書と同じ（to_dict / from_dict で相互変換）
+- 全週の記事を読むトレンド集計は for_counting で集計に使う項目だけを変換する（公開日は解析しない）
+- 列ごとのリスト（to_columns / from_columns）にも変換でき、集計やファイル保存に使える
+- 週次データ（weekly_data/<YYYYMMDD>.json）の作成・保存（build_weekly_data / save_weekly_data）
+"""
+import re
+import sys
+import json
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from article_schema import LIST_FIELDS, coerce_list, coerce_relevance, coerce_score, coerce_string, validate_articles
+
+# JSONのキー順（整形プロンプト・保存済みの research_data.json・週次データと同じ）
+JSON_FIELDS = (
+    "title", "url", "source", "published_date", "region", "category", "related_companies", "summary_japanese",
+    "key_points", "tags", "manufacturing_relevance", "relevance_reason", "confidence_score",
+)
+
+_intern = sys.intern
+
+
+def parse_publication_date(date_str: str):
+    if not date_str:
+        return None
+
+    normalized = date_str.strip()
+    lowered = normalized.lower()
+    if lowered in {"", "n/a", "na", "unknown"}:
+        return None
+
+    if normalized in {"不明", "未設定", "不詳", "―"}:
+        return None
+
+    if '\ufffd' in normalized:
+        return None
+
+    # Handle relative expressions such as "3 days ago" or "last week"
+    relative_match = re.match(r"^(\d{1,2})\s+(day|days|hour|hours|week|weeks)\s+ago$", lowered)
+    if relative_match:
+        value, unit = relative_match.groups()
+        amount = int(value)
+        now = datetime.now()
+        if unit.startswith("day"):
+            return now - timedelta(days=amount)
+        if unit.startswith("hour"):
+            return now - timedelta(hours=amount)
+        if unit.startswith("week"):
+            return now - timedelta(weeks=amount)
+
+    if lowered in {"yesterday", "昨日"}:
+        return datetime.now() - timedelta(days=1)
+    if lowered in {"today", "本日", "きょう", "今日"}:
+        return datetime.now()
+
+    # Handle Japanese date expressions such as "2024年5月20日"
+    jp_date_match = re.match(r"^(\d{4})年(\d{1,2})月(\d{1,2})日$", normalized)
+    if jp_date_match:
+        year, month, day = map(int, jp_date_match.groups())
+        return datetime(year, month, day)
+
+    # Handle compact numeric formats such as 20240520
+    if re.fullmatch(r"\d{8}", normalized):
+        try:
+            return datetime.strptime(normalized, "%Y%m%d")
+        except ValueError:
+            pass
+
+    date_formats = [
+        "%Y-%m-%d",
+        "%Y/%m/%d",
+        "%Y.%m.%d",
+        "%d %B %Y",
+        "%d %b %Y",
+        "%B %d, %Y",
+        "%b %d, %Y",
+        "%B %d %Y",
+        "%b %d %Y",
+        "%m/%d/%Y",
+        "%m-%d-%Y",
+        "%d/%m/%Y",
+        "%d-%m-%Y",
+        "%Y-%m",
+        "%Y/%m",
+        "%Y.%m",
+        "%Y",
+    ]
+
+    # Remove ordinal suffixes from English dates (e.g., "May 5th, 2024")
+    normalized_no_suffix = re.sub(r"(\d+)(st|nd|rd|th)", r"\1", normalized, flags=re.IGNORECASE)
+
+    for fmt in date_formats:
+        try:
+            parsed = datetime.strptime(normalized_no_suffix, fmt)
+            if fmt in {"%Y-%m", "%Y/%m", "%Y.%m"}:
+                return parsed.replace(day=1)
+            if fmt == "%Y":
+                return parsed.replace(month=1, day=1)
+            return parsed
+        except ValueError:
+            continue
+
+    # Try ISO 8601 style formats (with or without timezone)
+    iso_candidate = normalized
+    if iso_candidate.endswith("Z"):
+        iso_candidate = iso_candidate[:-1] + "+00:00"
+
+    try:
+        parsed = datetime.fromisoformat(iso_candidate)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+        return parsed
+    except ValueError:
+        pass
+
+    # Fallback to RFC 2822 and other email style date strings
+    try:
+        parsed = parsedate_to_datetime(normalized_no_suffix)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+        return parsed
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    return None
+
+
+def _parse_date(text):
+    parsed = parse_publication_date(text)
+    return parsed.date() if parsed else None
+
+
+def _interned_tuple(value):
+    """リスト項目をタプルに変換（要素は intern する）"""
+    if isinstance(value, (list, tuple)) and all(type(item) is str for item in value):
+        return tuple(_intern(item) for item in value if item)
+    return tuple(_intern(item) for item in coerce_list(value))
+
+
+def _score(value):
+    if type(value) is float and 0.0 <= value <= 1.0:
+        return value
+    return coerce_score(value)
+
+
+@dataclass(slots=True)
+class Article:
+    """記事1件（JSONの1要素に対応）"""
+
+    title: str
+    url: str
+    source: str = ""
+    published_date: str = ""
+    region: str = ""
+    category: str = ""
+    summary_japanese: str = ""
+    relevance_reason: str = ""
+    related_companies: tuple = ()
+    key_points: tuple = ()
+    tags: tuple = ()
+    manufacturing_relevant: bool = False
+    confidence_score: float | None = None
+    published: date | None = None
+
+    @property
+    def manufacturing_relevance(self):
+        """JSON上の表記（"あり" / "なし"）"""
+        return "あり" if self.manufacturing_relevant else "なし"
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        JSONの辞書から作成（保存済みの記事データの読み込み用）
+
+        保存済みのデータは検証済みのため、必須項目がなくても作成する。
+        型の揺れ（文字列のタグ・文字列のスコアなど）は変換して受け入れる。
+        """
+        get = data.get
+        published_date = coerce_string(get("published_date"))
+        return cls(
+            title=coerce_string(get("title")),
+            url=coerce_string(get("url")),
+            source=_intern(coerce_string(get("source"))),
+            published_date=published_date,
+            region=_intern(coerce_string(get("region"))),
+            category=_intern(coerce_string(get("category"))),
+            summary_japanese=coerce_string(get("summary_japanese")),
+            relevance_reason=coerce_string(get("relevance_reason")),
+            related_companies=_interned_tuple(get("related_companies")),
+            key_points=tuple(coerce_list(get("key_points"))),
+            tags=_interned_tuple(get("tags")),
+            manufacturing_relevant=coerce_relevance(get("manufacturing_relevance")) == "あり",
+            confidence_score=_score(get("confidence_score")),
+            published=_parse_date(published_date),
+        )
+
+    @classmethod
+    def for_counting(cls, data):
+        """
+        集計用に軽量に作成（タグ・企業名・カテゴリだけを変換）
+
+        トレンド集計のように全週の記事を読み込む処理で使う。公開日の解析と本文の項目の変換は行わないため、
+        保存する用途には from_dict を使う。
+        """
+        get = data.get
+        return cls(
+            title="",
+            url="",
+            category=_intern(coerce_string(get("category"))),
+            related_companies=_interned_tuple(get("related_companies")),
+            tags=_interned_tuple(get("tags")),
+        )
+
+    def to_dict(self):
+        """JSONの辞書に変換（キー名・順序は従来の記事データと同じ: JSON_FIELDS）"""
+        return {
+            "title": self.title,
+            "url": self.url,
+            "source": self.source,
+            "published_date": self.published_date,
+            "region": self.region,
+            "category": self.category,
+            "related_companies": list(self.related_companies),
+            "summary_japanese": self.summary_japanese,
+            "key_points": list(self.key_points),
+            "tags": list(self.tags),
+            "manufacturing_relevance": self.manufacturing_relevance,
+            "relevance_reason": self.relevance_reason,
+            "confidence_score": self.confidence_score,
+        }
+
+
+def articles_from_records(records):
+    """
+    整形結果の記事を検証し、Article のリストに変換
+
+    Returns:
+        tuple: (Article のリスト, validate_articles と同じ検証結果)
+    """
+    articles, report = validate_articles(records)
+    return [Article.from_dict(article) for article in articles], report
+
+
+def articles_from_dicts(items):
+    """JSONの記事配列を Article のリストに変換（辞書でない要素は除く）"""
+    return [Article.from_dict(item) for item in items if isinstance(item, dict)]
+
+
+def articles_to_dicts(articles):
+    return [article.to_dict() for article in articles]
+
+
+def load_articles(path):
+    """記事データのJSONファイル（research_data.json など）を読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("articles", [])
+    return articles_from_dicts(data)
+
+
+def build_weekly_data(articles, report_date, start_date, end_date, execution_time=None):
+    """
+    週次データ（weekly_data/<YYYYMMDD>.json）の内容を作成
+
+    analyze_trends.py・記事索引が読む形式（metadata・articles・extracted_insights）。
+
+    Args:
+        articles (list): Article のリスト
+        report_date, start_date, end_date (date | datetime): レポート日・検索期間
+        execution_time (datetime): 実行日時（省略時は現在）
+    """
+    tag_counts = Counter(tag for article in articles for tag in article.tags)
+    company_counts = Counter(company for article in articles for company in article.related_companies)
+    category_counts = Counter(article.category for article in articles if article.category)
+    scores = [article.confidence_score for article in articles if article.confidence_score]
+    execution_time = execution_time or datetime.now()
+    return {
+        "metadata": {
+            "report_date": report_date.strftime("%Y-%m-%d"),
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "article_count": len(articles),
+            "execution_time": execution_time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "articles": articles_to_dicts(articles),
+        "extracted_insights": {
+            "top_keywords": [tag for tag, _ in tag_counts.most_common(10)],
+            "top_companies": [company for company, _ in company_counts.most_common(10)],
+            "category_distribution": dict(category_counts),
+            "manufacturing_related_count": sum(1 for article in articles if article.manufacturing_relevant),
+            "avg_confidence_score": round(sum(scores) / len(scores), 2) if scores else 0.0,
+        },
+    }
+
+
+def save_weekly_data(articles, weekly_data_dir, report_date, start_date, end_date):
+    """
+    週次データを weekly_data_dir/<YYYYMMDD>.json に保存（同じ日の再実行は上書き）
+
+    Returns:
+        Path: 保存したファイル
+    """
+    weekly_data_dir = Path(weekly_data_dir)
+    weekly_data_dir.mkdir(parents=True, exist_ok=True)
+    path = weekly_data_dir / f"{report_date.strftime('%Y%m%d')}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_weekly_data(articles, report_date, start_date, end_date), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def to_columns(articles, fields=JSON_FIELDS):
+    """
+    Article のリストを列ごとのリストに変換
+
+    Args:
+        articles (list): Article のリスト
+        fields (tuple): 取り出す項目（JSONのキー名）
+
+    Returns:
+        dict: {項目名: 値のリスト}（値はJSONの形）
+    """
+    columns = {}
+    for field in fields:
+        if field == "manufacturing_relevance":
+            columns[field] = ["あり" if a.manufacturing_relevant else "なし" for a in articles]
+        elif field in LIST_FIELDS:
+            columns[field] = [list(getattr(a, field)) for a in articles]
+        else:
+            columns[field] = [getattr(a, field) for a in articles]
+    return columns
+
+
+def from_columns(columns):
+    """列ごとのリスト（to_columns の出力）を Article のリストに変換"""
+    fields = list(columns)
+    rows = zip(*(columns[field] for field in fields))
+    return [Article.from_dict(dict(zip(fields, row))) for row in rows]
@@ -0,0 +1,227 @@
+"""
+記事データのスキーマと検証
+Phase 1 のJSON整形で、Gemini の構造化出力（response_schema）に渡すスキーマと、
+出力された記事を1件ずつ検証・型変換するバリデータを提供する。
+
+- 型の揺れは変換して受け入れる（"0.8" → 0.8、"なし" → []、"AI, DX" → ["AI", "DX"] など）
+- 必須項目（タイトル・URL）が欠けた記事だけを除外し、全体は失敗させない
+- 出力が途中で切れた・一部が壊れたJSON配列からも、読める記事を取り出す（parse_article_array）
+"""
+import re
+import json
+
+# 記事の項目（整形プロンプト・スキーマ・検証で共通）
+STRING_FIELDS = ("title", "url", "source", "published_date", "region", "category", "summary_japanese", "relevance_reason")
+LIST_FIELDS = ("related_companies", "key_points", "tags")
+REQUIRED_FIELDS = ("title", "url")
+RELEVANCE_VALUES = ("あり", "なし")
+
+# 「該当なし」を表す値（リスト項目では空リストにする）
+_EMPTY_VALUES = {"", "なし", "該当なし", "不明", "n/a", "na", "none", "null", "-", "―"}
+_LIST_SEPARATORS = re.compile(r"\s*[,、，/／;；]\s*")
+_YES_VALUES = {"あり", "有", "有り", "yes", "y", "true", "1", "○", "✓"}
+# 整形結果が {"articles": [...]} の場合の配列の開始位置
+_WRAPPED_ARRAY = re.compile(r'"articles"\s*:\s*\[')
+
+ARTICLE_JSON_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            **{field: {"type": "string"} for field in STRING_FIELDS},
+            **{field: {"type": "array", "items": {"type": "string"}} for field in LIST_FIELDS},
+            "manufacturing_relevance": {"type": "string", "enum": list(RELEVANCE_VALUES)},
+            "confidence_score": {"type": "number", "minimum": 0, "maximum": 1},
+        },
+        "required": list(REQUIRED_FIELDS),
+    },
+}
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, str) and value.strip().lower() in _EMPTY_VALUES)
+
+
+def coerce_string(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "、".join(str(v).strip() for v in value if not _is_empty(v))
+    return str(value).strip()
+
+
+def coerce_list(value):
+    """文字列・単一値・リストを文字列のリストに変換（「なし」などは空リスト）"""
+    if _is_empty(value):
+        return []
+    if isinstance(value, str):
+        items = _LIST_SEPARATORS.split(value.strip())
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = [value]
+    return [str(item).strip() for item in items if not _is_empty(item) and str(item).strip()]
+
+
+def coerce_score(value):
+    """信頼度スコアを 0.0〜1.0 の数値に変換（"0.8"・"80%"・8/10 形式などに対応、変換できない場合は None）"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        text = value.strip().rstrip("%％")
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)", text)
+        try:
+            value = float(match.group(1)) / float(match.group(2)) if match else float(text)
+        except (ValueError, ZeroDivisionError):
+            return None
+    if not isinstance(value, (int, float)):
+        return None
+    if 1 < value <= 100:
+        value = value / 100
+    return round(min(max(float(value), 0.0), 1.0), 3)
+
+
+def coerce_relevance(value):
+    if isinstance(value, bool):
+        return "あり" if value else "なし"
+    text = coerce_string(value).lower()
+    return "あり" if text in _YES_VALUES or text.startswith("あり") else "なし"
+
+
+def coerce_article(record):
+    """
+    記事を1件検証・変換
+
+    Returns:
+        tuple: (変換後の記事 または None, 問題点のリスト)
+    """
+    if not isinstance(record, dict):
+        return None, [f"オブジェクトではありません（{type(record).__name__}）"]
+
+    issues = []
+    article = {}
+    for field in STRING_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            issues.append(f"{field}: {type(value).__name__} → str")
+        article[field] = coerce_string(value)
+
+    for field in LIST_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, list):
+            issues.append(f"{field}: {value!r} → list")
+        article[field] = coerce_list(value)
+
+    relevance = record.get("manufacturing_relevance")
+    article["manufacturing_relevance"] = coerce_relevance(relevance)
+    if relevance not in RELEVANCE_VALUES:
+        issues.append(f"manufacturing_relevance: {relevance!r} → {article['manufacturing_relevance']}")
+
+    score = record.get("confidence_score")
+    article["confidence_score"] = coerce_score(score)
+    if article["confidence_score"] is None:
+        article["confidence_score"] = 0.0
+        issues.append(f"confidence_score: {score!r} → 0.0")
+    elif not isinstance(score, (int, float)) or isinstance(score, bool) or score != article["confidence_score"]:
+        issues.append(f"confidence_score: {score!r} → {article['confidence_score']}")
+
+    if not article["url"].startswith(("http://", "https://")):
+        article["url"] = ""
+    missing = [field for field in REQUIRED_FIELDS if not article[field]]
+    if missing:
+        return None, issues + [f"必須項目がありません: {', '.join(missing)}"]
+    return article, issues
+
+
+def validate_articles(records):
+    """
+    整形結果の記事を1件ずつ検証し、変換できたものだけを返す
+
+    Args:
+        records: 記事のリスト（{"articles": [...]} 形式も受け付ける）
+
+    Returns:
+        tuple: (記事のリスト, {"repaired": 修正した件数, "dropped": [(番号, 理由), ...]})
+    """
+    if isinstance(records, dict):
+        records = records.get("articles", [records])
+    if not isinstance(records, list):
+        return [], {"repaired": 0, "dropped": [(0, f"配列ではありません（{type(records).__name__}）")]}
+
+    articles = []
+    report = {"repaired": 0, "dropped": []}
+    for index, record in enumerate(records, start=1):
+        article, issues = coerce_article(record)
+        if article is None:
+            report["dropped"].append((index, "; ".join(issues[-1:])))
+            continue
+        if issues:
+            report["repaired"] += 1
+        articles.append(article)
+    return articles, report
+
+
+def strip_code_fence(text):
+    """前後のマークダウンのコードブロック記号（```json など）を取り除く"""
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def parse_article_array(text):
+    """
+    JSON配列を要素ごとに読み取り、途中で切れたり壊れたりしていても読めた記事を返す
+
+    配列の途中で解析できない要素があった場合は、次の「{」から読み直す。
+    出力が途中で切れている場合は、切れる直前までの完全な要素を返す（{"articles": [...]} の形で切れている場合も同じ）。
+
+    Args:
+        text (str): 整形モデルの出力
+
+    Returns:
+        tuple: (要素のリスト, 配列を最後まで正しく読めたか)
+
+    Raises:
+        json.JSONDecodeError: JSON配列・オブジェクトが見つからない場合
+    """
+    text = strip_code_fence(text)
+    decoder = json.JSONDecoder()
+    start = text.find("[")
+    if start < 0 or (0 <= text.find("{") < start):
+        # 配列でなく単一のオブジェクト（{"articles": [...]} など）が返った場合
+        try:
+            value, _ = decoder.raw_decode(text, max(text.find("{"), 0))
+        except json.JSONDecodeError:
+            # {"articles": [... が途中で切れている場合は、その配列を要素ごとに読む
+            wrapped = _WRAPPED_ARRAY.search(text)
+            if not wrapped:
+                raise
+            start = wrapped.end() - 1
+        else:
+            if isinstance(value, dict) and isinstance(value.get("articles"), list):
+                return value["articles"], True
+            return [value], True
+
+    items = []
+    complete = True
+    pos = start + 1
+    length = len(text)
+    while True:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length:
+            return items, False
+        if text[pos] == "]":
+            return items, complete
+        try:
+            value, pos = decoder.raw_decode(text, pos)
+            items.append(value)
+        except json.JSONDecodeError:
+            complete = False
+            next_object = text.find("{", pos + 1)
+            if next_object < 0:
+                return items, False
+            pos = next_object
@@ -1,11 +1,65 @@
 """
 設定ファイル読み込みユーティリティ
 config.yaml から設定を読み込み、辞書として提供する
+
+調査プロファイル（profiles）:
+    config.yaml の profiles に、テーマごとの上書き設定（キーワード・プロンプト・出力先・宛先）を
+    名前付きで並べる。use_profile() の中では get() がそのプロファイルを重ねた設定を返す。
+    有効なプロファイルはスレッド（コンテキスト）ごとに独立しているため、
+    複数のプロファイルを並行して実行できる。
+
+    with use_profile("ai_workforce"):
+        config.get("search.keywords")  # プロファイルのキーワード
 """
 import os
+import copy
 import yaml
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 
+# 出力先を指定しなかったプロファイルで、output_dir 配下に置き換えるキー（既定値は reports/ 配下）
+PROFILE_PATH_KEYS = (
+    "data.research_data_path",
+    "data.weekly_data_dir",
+    "data.trends_dir",
+    "data.reports_dir",
+    "data.report_manifest_path",
+    "article_index.index_dir",
+    "report_search.db_path",
+    "stage_runner.state_path",
+)
+
+# 実行中のプロファイル（名前, 重ねた設定）
+_active_profile = ContextVar("active_profile", default=None)
+
+
+def deep_merge(base, override):
+    """辞書を再帰的に重ねる（リストや値は override で置き換える）"""
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _lookup(config, key_path):
+    value = config
+    for key in key_path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _assign(config, key_path, value):
+    keys = key_path.split(".")
+    for key in keys[:-1]:
+        config = config.setdefault(key, {})
+    config[keys[-1]] = value
+
 
 class Config:
     """設定管理クラス（シングルトン）"""
@@ -35,6 +89,7 @@ class Config:
 
         with open(config_path, "r", encoding="utf-8") as f:
             self._config = yaml.safe_load(f)
+        self._profiles = {}
 
     def get(self, key_path, default=None):
         """
@@ -52,7 +107,8 @@ class Config:
             model = config.get("llm.searcher.model")  # "gemini-2.5-flash"
         """
         keys = key_path.split(".")
-        value = self._config
+        active = _active_profile.get()
+        value = active[1] if active else self._config
 
         for key in keys:
             if isinstance(value, dict) and key in value:
@@ -64,7 +120,74 @@ class Config:
 
     def get_all(self):
         """全設定を辞書として取得"""
-        return self._config.copy()
+        active = _active_profile.get()
+        return (active[1] if active else self._config).copy()
+
+    def profile_names(self, include_disabled=False):
+        """profiles に定義されたプロファイル名（定義順）"""
+        return [
+            profile["name"]
+            for profile in self._config.get("profiles") or []
+            if include_disabled or profile.get("enabled", True)
+        ]
+
+    def profile_settings(self, name):
+        """
+        プロファイルを重ねた設定を作成（作成済みの場合は再利用）
+
+        出力先（PROFILE_PATH_KEYS）を指定しなかった場合は、
+        reports/ 配下の既定値を output_dir（既定: reports/profiles/<name>）配下に置き換える。
+        """
+        if name in self._profiles:
+            return self._profiles[name]
+
+        profile = next((p for p in self._config.get("profiles") or [] if p.get("name") == name), None)
+        if profile is None:
+            raise KeyError(f"プロファイルが見つかりません: {name}（定義済み: {', '.join(self.profile_names(True))}）")
+
+        base = {key: value for key, value in self._config.items() if key != "profiles"}
+        overrides = {key: value for key, value in profile.items() if key not in ("name", "enabled", "output_dir")}
+        settings = deep_merge(base, overrides)
+
+        output_dir = Path(profile.get("output_dir", f"reports/profiles/{name}"))
+        for key_path in PROFILE_PATH_KEYS:
+            if _lookup(overrides, key_path) is not None:
+                continue
+            default = _lookup(base, key_path)
+            if default is None:
+                continue
+            try:
+                relative = Path(default).relative_to("reports")
+            except ValueError:
+                continue
+            _assign(settings, key_path, (output_dir / relative).as_posix())
+
+        self._profiles[name] = settings
+        return settings
+
+
+def active_profile():
+    """実行中のプロファイル名（プロファイル外では None）"""
+    active = _active_profile.get()
+    return active[0] if active else None
+
+
+@contextmanager
+def use_profile(name):
+    """
+    with ブロックの中で get_config().get() がプロファイルを重ねた設定を返すようにする
+
+    Args:
+        name (str): プロファイル名（None の場合はベースの設定のまま）
+    """
+    if name is None:
+        yield None
+        return
+    token = _active_profile.set((name, get_config().profile_settings(name)))
+    try:
+        yield name
+    finally:
+        _active_profile.reset(token)
 
 
 # グローバルインスタンス（簡単にアクセスできるように）
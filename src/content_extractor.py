@@ -0,0 +1,388 @@
+"""
+記事本文のローカル抽出と抽出型要約
+include_raw_content: true で取得したページ（HTML またはテキスト）から本文を取り出し、
+TextRank で重要な文だけを残して、スニペットと同程度の長さにしてからモデルに渡す。
+ネットワーク・外部ライブラリは使わない（標準ライブラリの html.parser のみ）。
+
+- 本文抽出（readability 方式）: 段落のテキスト量・読点の数・リンクの割合・class / id の語
+  （article, content / nav, footer, comment など）で要素を採点し、最も高い要素とその周辺の段落を本文とする
+- テキスト（Tavily の raw_content はテキスト・マークダウンのことが多い）は、短い行・リンクだけの行などの定型部分を除く
+- 要約（TextRank）: 文どうしの語の重なりを重みとするグラフで PageRank を計算し、上位 max_sentences 文を元の順に並べる
+
+保存したHTMLで確認できる:
+    python src/content_extractor.py benchmarks/fixtures/article_sample.html
+"""
+import re
+import sys
+import math
+import argparse
+from html.parser import HTMLParser
+
+from config_loader import get_config
+
+# 本文の候補になる要素・読み飛ばす要素
+BLOCK_TAGS = {"p", "div", "article", "section", "main", "td", "li", "pre", "blockquote", "h1", "h2", "h3", "h4"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "form", "button", "iframe", "head"}
+_POSITIVE = re.compile(r"article|body|content|entry|main|page|post|story|text|blog", re.I)
+_NEGATIVE = re.compile(r"comment|footer|footnote|header|menu|meta|nav|related|share|shoutbox|sidebar|"
+                       r"social|sponsor|promo|banner|advert|popup|cookie|subscribe|newsletter|(?:^|[\s_-])ads?(?:$|[\s_-])", re.I)
+
+# 要約の候補にする先頭からの文数（TextRank は文数の2乗で計算量が増えるため）
+MAX_CANDIDATE_SENTENCES = 120
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])[\"'”’)）]*\s+|(?<=[。！？])")
+_TERMINATED = re.compile(r"[.!?。！？][\"'”’)）]*$")
+_WORD = re.compile(r"[a-z0-9]+|[぀-ヿ一-鿿]{2,}")
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "we our you your they their he she his her not but can also more than been which who".split()
+)
+
+
+class _Node:
+    """HTMLの要素（本文抽出用の最小限の木）"""
+
+    __slots__ = ("tag", "attrs", "parent", "children", "text", "link_text")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self.text = []
+        self.link_text = 0
+
+    def class_weight(self):
+        names = f"{self.attrs.get('class', '')} {self.attrs.get('id', '')}"
+        weight = 0
+        if _NEGATIVE.search(names):
+            weight -= 25
+        if _POSITIVE.search(names):
+            weight += 25
+        return weight
+
+    def own_text(self):
+        return " ".join(" ".join(self.text).split())
+
+    def inner_text(self):
+        parts = [self.own_text()]
+        parts.extend(child.inner_text() for child in self.children)
+        return " ".join(part for part in parts if part)
+
+    def inner_link_chars(self):
+        return self.link_text + sum(child.inner_link_chars() for child in self.children)
+
+
+class _TreeBuilder(HTMLParser):
+    VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "base", "col", "embed", "param", "track"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("root", {}, None)
+        self.current = self.root
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.title = ""
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if self.skip_depth or tag in SKIP_TAGS:
+            if tag not in self.VOID_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in self.VOID_TAGS:
+            if tag == "br":
+                self.current.text.append("\n")
+            return
+        if tag == "a":
+            self.link_depth += 1
+        node = _Node(tag, {key: value or "" for key, value in attrs}, self.current)
+        self.current.children.append(node)
+        self.current = node
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if self.skip_depth:
+            if tag not in self.VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag == "a":
+            self.link_depth = max(0, self.link_depth - 1)
+        # 閉じタグの省略に対応して、対応する要素まで遡る
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self.skip_depth or not data.strip():
+            return
+        self.current.text.append(data)
+        if self.link_depth:
+            self.current.link_text += len(data.strip())
+
+
+def looks_like_html(text):
+    return bool(re.search(r"<(html|body|div|p|article)\b", text[:5000], re.I))
+
+
+def _iter_nodes(node):
+    yield node
+    for child in node.children:
+        yield from _iter_nodes(child)
+
+
+def extract_html(html, min_paragraph_chars=25):
+    """
+    HTMLから本文の段落を抽出（readability 方式）
+
+    段落（テキストを持つ要素）ごとに点数を付けて親・祖父の要素に加算し、
+    リンクの割合で割り引いた点数が最も高い要素の段落を本文とする。
+
+    Returns:
+        tuple: (タイトル, 段落のリスト)
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+
+    scores = {}
+    for node in _iter_nodes(builder.root):
+        if node.tag not in BLOCK_TAGS:
+            continue
+        text = node.own_text()
+        if len(text) < min_paragraph_chars:
+            continue
+        score = 1 + text.count(",") + text.count("、") + min(3, len(text) // 100)
+        for depth, ancestor in enumerate((node.parent, node.parent.parent if node.parent else None)):
+            if ancestor is None or ancestor is builder.root:
+                continue
+            if id(ancestor) not in scores:
+                scores[id(ancestor)] = [ancestor, ancestor.class_weight()]
+            scores[id(ancestor)][1] += score / (1 + depth)
+
+    best = None
+    best_score = 0
+    for node, score in scores.values():
+        text_length = len(node.inner_text()) or 1
+        score *= 1 - min(1.0, node.inner_link_chars() / text_length)
+        if score > best_score:
+            best, best_score = node, score
+
+    container = best or builder.root
+    paragraphs = []
+    for node in _iter_nodes(container):
+        if node.tag == "root":
+            continue
+        text = node.own_text()
+        if len(text) < min_paragraph_chars or node.link_text > len(text) * 0.5:
+            continue
+        if any(_NEGATIVE.search(f"{n.attrs.get('class', '')} {n.attrs.get('id', '')}")
+               for n in _ancestors(node, container)):
+            continue
+        paragraphs.append(text)
+    return " ".join(builder.title.split()), paragraphs
+
+
+def _ancestors(node, stop):
+    """node から stop の手前までの要素（stop 自体は含まない）"""
+    while node is not None and node is not stop:
+        yield node
+        node = node.parent
+
+
+def extract_text(text, min_paragraph_chars=25):
+    """テキスト・マークダウンから本文の段落を抽出（短い行・リンクだけの行・見出し記号などを除く）"""
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        lines = []
+        for line in block.splitlines():
+            stripped = line.strip().lstrip("#>*-•| ").strip()
+            plain = _MARKDOWN_LINK.sub(r"\1", stripped)
+            # リンクの文字が大半を占める行（メニュー・関連記事）は除く
+            link_chars = sum(len(match.group(1)) for match in _MARKDOWN_LINK.finditer(stripped))
+            if link_chars > len(plain) * 0.5:
+                continue
+            if plain:
+                lines.append(plain)
+        paragraph = " ".join(" ".join(lines).split())
+        if len(paragraph) >= min_paragraph_chars:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def split_sentences(paragraphs):
+    """段落を文に分割（句点で終わらない見出し・キャプションなどは除く）"""
+    sentences = []
+    for paragraph in paragraphs:
+        for sentence in _SENTENCE_END.split(paragraph):
+            sentence = sentence.strip()
+            if len(sentence) >= 20 and _TERMINATED.search(sentence):
+                sentences.append(sentence)
+    return sentences
+
+
+def _words(sentence):
+    return {word for word in _WORD.findall(sentence.lower()) if word not in _STOPWORDS}
+
+
+def textrank(sentences, damping=0.85, iterations=50, tolerance=1e-6):
+    """
+    文ごとの TextRank スコア
+
+    2文の類似度は共通する語の数 / (log(語数1) + log(語数2))（Mihalcea & Tarau, 2004）。
+
+    Returns:
+        list: sentences と同じ順のスコア
+    """
+    words = [_words(sentence) for sentence in sentences]
+    n = len(sentences)
+    weights = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            overlap = len(words[i] & words[j])
+            if not overlap or len(words[i]) < 2 or len(words[j]) < 2:
+                continue
+            weight = overlap / (math.log(len(words[i])) + math.log(len(words[j])))
+            weights[i][j] = weights[j][i] = weight
+    totals = [sum(row) for row in weights]
+    # 各文に票を入れる文と、その重み（入れる側の重みの合計で正規化）
+    incoming = [[(j, weights[j][i] / totals[j]) for j in range(n) if weights[j][i]] for i in range(n)]
+
+    scores = [1.0 / n] * n if n else []
+    for _ in range(iterations):
+        updated = [(1 - damping) / n + damping * sum(weight * scores[j] for j, weight in votes) for votes in incoming]
+        converged = max(abs(a - b) for a, b in zip(updated, scores)) < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def summarize(paragraphs, max_sentences=5, max_chars=800):
+    """
+    本文の段落から重要な文を選び、元の順に並べた要約を返す（max_chars を超える手前で打ち切る）
+
+    先頭の文（リード）は記事の要点であることが多いため、スコアを少し上乗せする。
+    """
+    sentences = split_sentences(paragraphs)[:MAX_CANDIDATE_SENTENCES]
+    if not sentences:
+        return ""
+    scores = textrank(sentences)
+    for i in range(min(2, len(scores))):
+        scores[i] *= 1.2 - 0.1 * i
+    ranked = sorted(range(len(sentences)), key=lambda i: -scores[i])[:max_sentences]
+
+    chosen = []
+    length = 0
+    for index in sorted(ranked):
+        sentence = sentences[index]
+        if chosen and length + len(sentence) + 1 > max_chars:
+            break
+        chosen.append(sentence[:max_chars])
+        length += len(sentence) + 1
+    return " ".join(chosen)
+
+
+class ContentExtractor:
+    """
+    ページの本文抽出と要約
+
+    Args:
+        max_sentences (int): 要約の最大文数
+        max_chars (int): 要約の最大文字数
+        min_paragraph_chars (int): 段落とみなす最小文字数
+    """
+
+    def __init__(self, max_sentences=5, max_chars=800, min_paragraph_chars=25):
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+        self.min_paragraph_chars = min_paragraph_chars
+
+    def extract(self, raw):
+        """
+        Returns:
+            dict: {"title": タイトル（HTMLの場合）, "paragraphs": 本文の段落, "summary": 要約}
+        """
+        raw = raw or ""
+        title = ""
+        if looks_like_html(raw):
+            title, paragraphs = extract_html(raw, self.min_paragraph_chars)
+        else:
+            paragraphs = extract_text(raw, self.min_paragraph_chars)
+        return {
+            "title": title,
+            "paragraphs": paragraphs,
+            "summary": summarize(paragraphs, self.max_sentences, self.max_chars),
+        }
+
+    def compress_result(self, result):
+        """
+        検索結果1件の生コンテンツを要約に置き換えたコピーを返す
+
+        要約がスニペットより短い（本文が取れなかった）場合はスニペットのまま残す。
+        """
+        raw = result.get("raw_content")
+        if not raw:
+            return result
+        summary = self.extract(raw)["summary"]
+        compressed = {key: value for key, value in result.items() if key != "raw_content"}
+        if len(summary) > len(result.get("content") or ""):
+            compressed["content"] = summary
+            compressed["extracted"] = True
+        return compressed
+
+    def compress_response(self, response):
+        """Tavily のレスポンスの全結果を compress_result したコピーを返す"""
+        if not isinstance(response, dict) or not isinstance(response.get("results"), list):
+            return response
+        return {**response, "results": [self.compress_result(result) if isinstance(result, dict) else result
+                                        for result in response["results"]]}
+
+
+def get_content_extractor():
+    """生コンテンツを取得する設定の場合の本文抽出（それ以外・無効の場合は None）"""
+    config = get_config()
+    if not config.get("tavily.include_raw_content", False) or not config.get("content_extraction.enabled", True):
+        return None
+    return ContentExtractor(
+        max_sentences=config.get("content_extraction.max_sentences", 5),
+        max_chars=config.get("content_extraction.max_chars", 800),
+        min_paragraph_chars=config.get("content_extraction.min_paragraph_chars", 25),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保存したページ（HTML・テキスト）の本文抽出と要約")
+    parser.add_argument("path", help="HTML またはテキストのファイル")
+    parser.add_argument("--sentences", type=int, default=None, help="要約の最大文数")
+    parser.add_argument("--chars", type=int, default=None, help="要約の最大文字数")
+    args = parser.parse_args()
+
+    config = get_config()
+    extractor = ContentExtractor(
+        max_sentences=args.sentences or config.get("content_extraction.max_sentences", 5),
+        max_chars=args.chars or config.get("content_extraction.max_chars", 800),
+        min_paragraph_chars=config.get("content_extraction.min_paragraph_chars", 25),
+    )
+    with open(args.path, "r", encoding="utf-8", errors="replace") as f:
+        raw = f.read()
+    result = extractor.extract(raw)
+    body = "\n\n".join(result["paragraphs"])
+    print(f"📄 {result['title'] or args.path}")
+    print(f"   元の文字数: {len(raw):,} → 本文: {len(body):,}（{len(result['paragraphs'])}段落）→ 要約: {len(result['summary']):,}")
+    print("\n--- 本文 ---")
+    print(body)
+    print("\n--- 要約 ---")
+    print(result["summary"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+記事の重複排除インデックス（プロセス全体で共有）
+URL（トラッキング用パラメータ・末尾のスラッシュなどを除いて正規化）とタイトルで記事を識別し、
+同じ記事が1つのレポートに重複して入らないようにする。
+
+- 同じプロファイル内の重複（バッチをまたいで同じ記事が抽出された場合など）は常に除外する
+- cross_profile: true の場合は、先に確定した別プロファイルの記事も除外する
+  （プロファイルを並行実行するため、どちらに残るかは確定順に依存する）
+"""
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from article_model import Article
+from config_loader import get_config
+
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|fbclid|gclid|mc_cid|mc_eid|ref|source)$", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_url(url):
+    """比較用にURLを正規化（スキーム・www・フラグメント・トラッキング用パラメータを除く）"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit(("", host, path, query, ""))
+
+
+def normalize_title(title):
+    """比較用にタイトルを正規化（大文字小文字・記号・空白を無視）"""
+    return _NON_WORD.sub("", (title or "").lower())
+
+
+class DedupIndex:
+    """記事の重複排除インデックス（スレッドセーフ）"""
+
+    def __init__(self, cross_profile=False):
+        self.cross_profile = cross_profile
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def article_keys(article):
+        """記事の識別キー（Article・辞書のどちらも受け付ける）"""
+        if not isinstance(article, Article):
+            if not isinstance(article, dict):
+                return []
+            article = Article.from_dict(article)
+        keys = []
+        url = normalize_url(article.url)
+        if url:
+            keys.append(f"url:{url}")
+        title = normalize_title(article.title)
+        if len(title) >= 8:
+            keys.append(f"title:{title}")
+        return keys
+
+    def filter(self, articles, profile=None):
+        """
+        重複を除いた記事を返し、残した記事をインデックスに登録
+
+        同じプロファイルで再度呼び出した場合は、前回の登録を置き換える。
+
+        Args:
+            articles (list): 記事データ（Article または辞書）
+            profile (str): プロファイル名（プロファイル外では None）
+
+        Returns:
+            tuple: (残した記事, 除外した件数)
+        """
+        profile = profile or ""
+        kept = []
+        seen = set()
+        with self._lock:
+            self._owners = {key: owner for key, owner in self._owners.items() if owner != profile}
+            for article in articles:
+                keys = self.article_keys(article)
+                if any(key in seen for key in keys):
+                    continue
+                if self.cross_profile and any(key in self._owners for key in keys):
+                    continue
+                seen.update(keys)
+                kept.append(article)
+            for key in seen:
+                self._owners.setdefault(key, profile)
+        return kept, len(articles) - len(kept)
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_dedup_index = None
+_global_lock = threading.Lock()
+
+
+def get_dedup_index():
+    """重複排除インデックスを取得（全プロファイルで共有）"""
+    global _global_dedup_index
+    with _global_lock:
+        if _global_dedup_index is None:
+            _global_dedup_index = DedupIndex(cross_profile=get_config().get("dedup.cross_profile", False))
+        return _global_dedup_index
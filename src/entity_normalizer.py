@@ -0,0 +1,259 @@
+"""
+エンティティ正規化ユーティリティ
+タグ・企業名の表記ゆれ（全角/半角、大文字/小文字、空白・記号、日英の別名）を
+1つの正規形にまとめる。別名は entity_aliases.yaml で管理し、
+未登録の表記ゆれ候補は文字トライグラムの類似度から提案する。
+
+使い方:
+    # 別名辞書に未登録の表記ゆれ候補を表示
+    python src/entity_normalizer.py suggest --dimension companies --threshold 0.5
+"""
+import re
+import sys
+import json
+import argparse
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import yaml
+
+from config_loader import get_config
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 照合キーを作る際に無視する区切り文字
+_SEPARATORS = re.compile(r"[\s\-_‐・･.,/&'’]+")
+_WHITESPACE = re.compile(r"\s+")
+
+DIMENSIONS = ("tags", "companies")
+
+
+def normalize_surface(name):
+    """表示用の正規化（NFKCで全角英数・半角カナを統一し、空白を詰める）"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(name))).strip()
+
+
+def match_key(name):
+    """照合用のキー（表示用の正規化に加えて大文字/小文字・空白・記号の差を無視する）"""
+    return _SEPARATORS.sub("", normalize_surface(name).casefold())
+
+
+class TrigramIndex:
+    """文字トライグラムの転置インデックス（表記ゆれ候補の検索用）"""
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._grams = {}
+
+    @staticmethod
+    def trigrams(name):
+        key = f"  {match_key(name)} "
+        return {key[i:i + 3] for i in range(len(key) - 2)}
+
+    def add(self, name):
+        if name in self._grams:
+            return
+        grams = self.trigrams(name)
+        self._grams[name] = grams
+        for gram in grams:
+            self._postings[gram].add(name)
+
+    def similar(self, name, threshold=0.5, limit=5):
+        """
+        類似するエンティティを返す
+
+        Returns:
+            list: [(エンティティ, Jaccard係数), ...]（類似度の高い順）
+        """
+        grams = self.trigrams(name)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                if candidate != name:
+                    shared[candidate] += 1
+
+        scored = []
+        for candidate, overlap in shared.items():
+            score = overlap / (len(grams) + len(self._grams[candidate]) - overlap)
+            if score >= threshold:
+                scored.append((candidate, round(score, 3)))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:limit]
+
+
+class EntityNormalizer:
+    """別名辞書と表記の正規化でエンティティを正規形にまとめる"""
+
+    def __init__(self, aliases=None, enabled=True):
+        """
+        Args:
+            aliases (dict): {"tags": {正規形: [別名, ...]}, "companies": {...}}
+            enabled (bool): False の場合は入力をそのまま返す
+        """
+        self.enabled = enabled
+        self._lookup = {dimension: {} for dimension in DIMENSIONS}
+        self._cache = {dimension: {} for dimension in DIMENSIONS}
+
+        for dimension, entries in (aliases or {}).items():
+            lookup = self._lookup.setdefault(dimension, {})
+            self._cache.setdefault(dimension, {})
+            for canonical, variants in (entries or {}).items():
+                canonical = normalize_surface(canonical)
+                lookup[match_key(canonical)] = canonical
+                for variant in variants or []:
+                    lookup[match_key(variant)] = canonical
+
+    @classmethod
+    def load(cls, path, enabled=True):
+        """別名辞書（YAML）を読み込む。ファイルがなければ表記の正規化のみ行う"""
+        path = Path(path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        aliases = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                aliases = yaml.safe_load(f) or {}
+        return cls(aliases, enabled=enabled)
+
+    def canonical(self, name, dimension):
+        """1つのエンティティ名を正規形に変換"""
+        if not self.enabled:
+            return name
+
+        cache = self._cache[dimension]
+        result = cache.get(name)
+        if result is None:
+            result = self._lookup[dimension].get(match_key(name)) or normalize_surface(name)
+            cache[name] = result
+        return result
+
+    def canonicalize_all(self, names, dimension):
+        """エンティティ名のリストを正規形に変換（同じ記事内の重複は1つにまとめる）"""
+        if not self.enabled:
+            return list(names)
+
+        result = []
+        seen = set()
+        for name in names:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            canonical = self.canonical(name, dimension)
+            if canonical not in seen:
+                seen.add(canonical)
+                result.append(canonical)
+        return result
+
+    def merge_variants(self, entity_dates):
+        """
+        別名辞書に未登録の表記ゆれ（大文字/小文字・空白の違いのみ）を統合
+
+        代表表記は総出現回数が最も多いもの（同数なら辞書順で先のもの）とする。
+        入力の順序に依存しないため、逐次・並列どちらの集計でも同じ結果になる。
+
+        Args:
+            entity_dates (dict): {エンティティ: {日付: 件数}}
+
+        Returns:
+            dict: {代表表記: {日付: 件数}}（最初に現れた順）
+        """
+        if not self.enabled:
+            return entity_dates
+
+        groups = {}
+        for entity, date_counts in entity_dates.items():
+            group = groups.setdefault(match_key(entity), {"dates": Counter(), "variants": Counter()})
+            group["dates"].update(date_counts)
+            group["variants"][entity] += sum(date_counts.values())
+
+        merged = {}
+        for group in groups.values():
+            representative = min(group["variants"].items(), key=lambda x: (-x[1], x[0]))[0]
+            merged[representative] = dict(group["dates"])
+        return merged
+
+    def suggest(self, names, dimension, threshold=0.5, limit=5):
+        """
+        別名辞書に未登録の表記ゆれ候補を提案
+
+        Args:
+            names (iterable): 出現したエンティティ名
+            dimension (str): "tags" | "companies"
+
+        Returns:
+            list: [(エンティティ, [(候補, 類似度), ...]), ...]
+        """
+        canonical_names = sorted(set(self.canonical(name, dimension) for name in names))
+        index = TrigramIndex()
+        for name in canonical_names:
+            index.add(name)
+
+        suggestions = []
+        reported = set()
+        for name in canonical_names:
+            candidates = [(c, score) for c, score in index.similar(name, threshold, limit) if (c, name) not in reported]
+            if candidates:
+                suggestions.append((name, candidates))
+                reported.update((name, c) for c, _ in candidates)
+        return suggestions
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_normalizer = None
+
+
+def get_normalizer():
+    """正規化インスタンスを取得"""
+    global _global_normalizer
+    if _global_normalizer is None:
+        config = get_config()
+        _global_normalizer = EntityNormalizer.load(
+            config.get("entities.alias_path", "entity_aliases.yaml"),
+            enabled=config.get("entities.enabled", True),
+        )
+    return _global_normalizer
+
+
+def _collect_entity_names(dimension):
+    """週次データと検索データから、出現したエンティティ名を集める"""
+    config = get_config()
+    field = "tags" if dimension == "tags" else "related_companies"
+    paths = sorted(Path(config.get("data.weekly_data_dir", "reports/weekly_data")).glob("*.json"))
+    paths.append(Path(config.get("data.research_data_path", "reports/research_data.json")))
+
+    names = Counter()
+    for path in paths:
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for article in data if isinstance(data, list) else data.get("articles", []):
+            names.update(name for name in article.get(field) or [] if isinstance(name, str))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エンティティの表記ゆれ候補を表示")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    suggest = subparsers.add_parser("suggest", help="別名辞書に未登録の表記ゆれ候補を表示")
+    suggest.add_argument("--dimension", choices=DIMENSIONS, default="companies")
+    suggest.add_argument("--threshold", type=float, default=0.5, help="トライグラムのJaccard係数の下限")
+    suggest.add_argument("--limit", type=int, default=5, help="1エンティティあたりの候補数")
+    args = parser.parse_args()
+
+    names = _collect_entity_names(args.dimension)
+    if not names:
+        print("⚠️ エンティティが見つかりません。")
+        sys.exit(0)
+
+    suggestions = get_normalizer().suggest(names, args.dimension, args.threshold, args.limit)
+    print(f"🔎 {args.dimension}: {len(names)}種類中 {len(suggestions)}件に表記ゆれ候補があります")
+    for name, candidates in suggestions:
+        listed = ", ".join(f"{candidate} ({score:.2f})" for candidate, score in candidates)
+        print(f"  • {name} ← {listed}")
+    if suggestions:
+        print("\n💡 統合する場合は entity_aliases.yaml に「正規形: [別名, ...]」の形式で追加してください。")
+
+
+if __name__ == "__main__":
+    main()
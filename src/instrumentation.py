@@ -0,0 +1,276 @@
+"""
+計測ユーティリティ
+LLM呼び出し・エージェント実行・Tavily検索・待機時間をフェーズ単位で記録し、
+JSONL形式の実行ログと実行終了時の内訳表を出力する
+"""
+import os
+import sys
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from config_loader import active_profile, get_config
+from quota_ledger import QuotaExhaustedError, get_quota_ledger, is_quota_error
+from rate_limiter import KIND_GROUPS, get_rate_limiter
+
+
+def extract_token_usage(response):
+    """
+    レスポンスのメタデータからトークン使用量を取り出す
+
+    Args:
+        response: AIMessage、またはエージェントの実行結果（{"messages": [...]}）
+
+    Returns:
+        tuple: (入力トークン数, 出力トークン数)
+    """
+    # エージェントの実行結果は含まれる全AIメッセージの合計とする
+    if isinstance(response, dict):
+        input_tokens = output_tokens = 0
+        for message in response.get("messages", []):
+            message_input, message_output = extract_token_usage(message)
+            input_tokens += message_input
+            output_tokens += message_output
+        return input_tokens, output_tokens
+
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0
+
+    # 古いバージョンのlangchain-google-genaiはresponse_metadataに格納する
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("usage_metadata") or {}
+    return usage.get("prompt_token_count", 0) or 0, usage.get("candidates_token_count", 0) or 0
+
+
+def _pad(text, width, align="<"):
+    """全角文字を2桁として表示幅を揃える"""
+    text = str(text)
+    display_width = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    padding = " " * max(0, width - display_width)
+    return text + padding if align == "<" else padding + text
+
+
+def _default_run_id():
+    """実行IDを決定（GitHub Actionsでは各ステップで同じIDを共有する）"""
+    run_id = os.environ.get("PIPELINE_RUN_ID") or os.environ.get("GITHUB_RUN_ID")
+    if run_id:
+        return run_id
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+class RunRecorder:
+    """実行ログの記録クラス"""
+
+    def __init__(self, log_dir, run_id=None, enabled=True):
+        self.run_id = run_id or _default_run_id()
+        self.log_path = Path(log_dir) / f"run_{self.run_id}.jsonl"
+        self.enabled = enabled
+        self.script = Path(sys.argv[0]).name if sys.argv and sys.argv[0] else "python"
+        # プロファイルを並行実行するため、フェーズはコンテキスト（スレッド）ごとに保持する
+        # （ツール実行などのコンテキストをコピーするスレッドには引き継がれる）
+        self._phase = ContextVar(f"phase_{id(self)}", default="main")
+        self._lock = threading.Lock()
+        self.defer_summary = False
+
+    @property
+    def phase(self):
+        """現在のフェーズ名"""
+        return self._phase.get()
+
+    def set_phase(self, phase):
+        """以降に記録するイベントのフェーズ名を設定"""
+        self._phase.set(phase)
+
+    def record(self, kind, **fields):
+        """イベントを1行のJSONとして実行ログに追記"""
+        event = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "run_id": self.run_id,
+            "script": self.script,
+            "phase": fields.pop("phase", None) or self.phase,
+            "kind": kind,
+        }
+        profile = active_profile()
+        if profile:
+            event["profile"] = profile
+        event.update(fields)
+
+        if not self.enabled:
+            return event
+
+        with self._lock:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return event
+
+    def track(self, kind, func, model=None, attempt=None, expected_requests=1, expected_tokens=0, **fields):
+        """
+        呼び出しの所要時間とトークン使用量を記録して結果を返す
+
+        Args:
+            kind (str): 呼び出し種別（"llm" | "agent" | "tavily" | "smtp"）
+            func (callable): 引数なしで呼び出す処理
+            model (str): モデル名
+            attempt (int): 試行回数（1始まり）
+            expected_requests (int): 見込みのLLM呼び出し数（エージェント実行は手順数、使用量台帳の予約に使う）
+            expected_tokens (int): 見込みのトークン数（プロンプトの概算、使用量台帳の予約に使う）
+        """
+        # プロセス・実行をまたいで共有する使用量台帳（1分・1日の上限に空きがなければ待機・中止）
+        ledger = get_quota_ledger()
+        provider = KIND_GROUPS.get(kind)
+        reservation = None
+        if ledger is None or provider is None:
+            # 台帳が無効の場合は、全プロファイルで共有するレート制限で1分あたりの上限を守る（枠が空くまで待機）
+            get_rate_limiter().acquire(kind, sleep=self.sleep)
+        else:
+            try:
+                reservation = ledger.reserve(
+                    provider, model, sleep=self.sleep, task=fields.get("task"),
+                    requests=expected_requests, tokens=expected_tokens,
+                )
+            except QuotaExhaustedError as e:
+                self.record(kind, model=model, attempt=attempt, status="quota_exhausted", error=str(e), **fields)
+                raise
+
+        start = time.perf_counter()
+        try:
+            response = func()
+        except Exception as e:
+            wall_s = round(time.perf_counter() - start, 3)
+            if reservation is not None:
+                ledger.settle(reservation, status="quota" if is_quota_error(e) else "error", wall_s=wall_s)
+            self.record(
+                kind,
+                model=model,
+                attempt=attempt,
+                status="error",
+                error=f"{type(e).__name__}: {str(e)[:200]}",
+                wall_s=wall_s,
+                **fields,
+            )
+            raise
+
+        wall_s = round(time.perf_counter() - start, 3)
+        if kind in ("llm", "agent"):
+            fields["input_tokens"], fields["output_tokens"] = extract_token_usage(response)
+        if kind == "agent" and isinstance(response, dict):
+            messages = response.get("messages", [])
+            fields.setdefault("llm_steps", sum(1 for m in messages if getattr(m, "type", "") == "ai"))
+            fields.setdefault("tool_calls", sum(1 for m in messages if getattr(m, "type", "") == "tool"))
+        if reservation is not None:
+            ledger.settle(
+                reservation,
+                requests=fields.get("llm_steps", 1),
+                input_tokens=fields.get("input_tokens", 0),
+                output_tokens=fields.get("output_tokens", 0),
+                wall_s=wall_s,
+            )
+
+        self.record(kind, model=model, attempt=attempt, status="ok", wall_s=wall_s, **fields)
+        return response
+
+    def sleep(self, seconds, reason=""):
+        """待機し、待機時間を記録"""
+        time.sleep(seconds)
+        self.record("sleep", seconds=seconds, reason=reason)
+
+    def retry(self, attempt, reason=""):
+        """再試行を記録"""
+        self.record("retry", attempt=attempt, reason=reason)
+
+    def load_events(self):
+        """この実行IDのイベントを全て読み込む（別プロセスの記録も含む）"""
+        if not self.log_path.exists():
+            return []
+
+        events = []
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    events.append(json.loads(line))
+        return events
+
+    def summarize(self):
+        """フェーズごとの内訳を集計"""
+        rows = OrderedDict()
+        for event in self.load_events():
+            phase = f"{event['profile']}/{event['phase']}" if event.get("profile") else event["phase"]
+            row = rows.setdefault(phase, {
+                "llm_calls": 0,
+                "tavily_calls": 0,
+                "retries": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "wall_s": 0.0,
+                "sleep_s": 0.0,
+            })
+            kind = event["kind"]
+            if kind in ("llm", "agent"):
+                row["llm_calls"] += 1
+                row["input_tokens"] += event.get("input_tokens", 0) or 0
+                row["output_tokens"] += event.get("output_tokens", 0) or 0
+                row["wall_s"] += event.get("wall_s", 0.0)
+            elif kind == "tavily":
+                row["tavily_calls"] += 1
+            elif kind == "smtp":
+                row["wall_s"] += event.get("wall_s", 0.0)
+            elif kind == "retry":
+                row["retries"] += 1
+            elif kind == "sleep":
+                row["sleep_s"] += event.get("seconds", 0.0)
+        return rows
+
+    def print_summary(self, force=False):
+        """実行終了時の内訳表を表示（defer_summary の間は force=True の場合のみ）"""
+        if not self.enabled or (self.defer_summary and not force):
+            return
+
+        rows = self.summarize()
+        if not rows:
+            return
+
+        columns = [("LLM", 5), ("検索", 6), ("再試行", 8), ("入力tok", 10), ("出力tok", 10), ("処理(s)", 10), ("待機(s)", 10)]
+        header = _pad("フェーズ", 24) + "".join(_pad(name, width, ">") for name, width in columns)
+        print("\n" + "=" * 78)
+        print(f"⏱️  実行内訳（run_id: {self.run_id}）")
+        print("=" * 78)
+        print(header)
+        totals = dict.fromkeys(next(iter(rows.values())), 0)
+        for phase, row in rows.items():
+            print(
+                f"{_pad(phase, 24)}{row['llm_calls']:>5}{row['tavily_calls']:>6}{row['retries']:>8}"
+                f"{row['input_tokens']:>10}{row['output_tokens']:>10}{row['wall_s']:>10.1f}{row['sleep_s']:>10.1f}"
+            )
+            for key, value in row.items():
+                totals[key] += value
+        print("-" * 78)
+        print(
+            f"{_pad('合計', 24)}{totals['llm_calls']:>5}{totals['tavily_calls']:>6}{totals['retries']:>8}"
+            f"{totals['input_tokens']:>10}{totals['output_tokens']:>10}{totals['wall_s']:>10.1f}{totals['sleep_s']:>10.1f}"
+        )
+        print(f"📁 実行ログ: {self.log_path}")
+        print("=" * 78 + "\n")
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_recorder = None
+
+
+def get_recorder():
+    """計測インスタンスを取得"""
+    global _global_recorder
+    if _global_recorder is None:
+        config = get_config()
+        _global_recorder = RunRecorder(
+            log_dir=config.get("instrumentation.log_dir", "reports/run_logs"),
+            enabled=config.get("instrumentation.enabled", True),
+        )
+    return _global_recorder
@@ -0,0 +1,483 @@
+"""
+メール配信ユーティリティ
+1つの認証済みSMTP接続を使い回して、宛先ごと（または宛先グループごと）のメールを
+バッチ単位・送信レート制限つきで送る。一時的なエラー（4xx・切断・タイムアウト）で
+送れなかったメールは再送キューに保存し、同じ実行の中で inline_retries 回まで再送する。
+それでも送れなかったメールはキューに残し、次回以降の実行で再送する
+（GitHub Actions ではキューのディレクトリを actions/cache で次回の実行に引き継ぐ）。
+
+- 宛先ごと（per_recipient）: 1通に1宛先。To に本人のアドレスが入る
+- グループごと（segment）: segment_size 件ずつ Bcc でまとめて送る
+- 送信数・失敗数・キュー件数・1通あたりの所要時間（p50/p95）・スループットを表示する
+
+ローカルで試す場合（aiosmtpd を別途インストール）:
+    python -m aiosmtpd -n -l localhost:8025
+    python src/mail_delivery.py send-test --host localhost --port 8025 --no-ssl --to a@example.com,b@example.com
+
+再送キューの確認・再送:
+    python src/mail_delivery.py status
+    python src/mail_delivery.py flush
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import smtplib
+import argparse
+import tempfile
+from copy import deepcopy
+from datetime import datetime, timedelta
+from email import message_from_bytes, policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import make_msgid
+from pathlib import Path
+
+from config_loader import get_config
+from instrumentation import get_recorder
+
+MODES = ("per_recipient", "segment")
+
+
+class PermanentDeliveryError(Exception):
+    """再送しても成功しないエラー（5xx、宛先拒否など）"""
+
+
+def is_transient_error(error):
+    """一時的なエラー（再送で成功する可能性がある）か判定"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.timeout, OSError))
+
+
+class SMTPSession:
+    """
+    認証済みのSMTP接続を使い回すセッション
+
+    - 最初の送信時に接続・ログインし、以降の送信で同じ接続を使う
+    - max_messages 通ごと、または切断を検知した場合は接続し直す
+    """
+
+    def __init__(self, host, port, user=None, password=None, use_ssl=True, starttls=False,
+                 timeout=30, max_messages=100):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.connections = 0
+        self._server = None
+        self._sent_on_connection = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self._server = server
+        self._sent_on_connection = 0
+        self.connections += 1
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def send(self, msg, from_addr, to_addrs):
+        """1通送信（切断されていた場合は1回だけ接続し直す）"""
+        if self._server is not None and self._sent_on_connection >= self.max_messages:
+            self.close()
+
+        for reconnect in (False, True):
+            if self._server is None:
+                self._connect()
+            try:
+                refused = self._server.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+                self._sent_on_connection += 1
+                return refused
+            except smtplib.SMTPServerDisconnected:
+                self._server = None
+                if reconnect:
+                    raise
+
+
+class RetryQueue:
+    """
+    再送キュー（ディレクトリに .eml とキューの状態 queue.json を保存）
+
+    queue.json は一時ファイル＋os.replace で書き換える。
+    """
+
+    def __init__(self, queue_dir):
+        self.queue_dir = Path(queue_dir)
+        self.state_path = self.queue_dir / "queue.json"
+        self.entries = []
+        if self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".queue_", suffix=".tmp", dir=self.queue_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def pending(self):
+        return [entry for entry in self.entries if entry["status"] == "pending"]
+
+    def due(self, now=None):
+        now = (now or datetime.now()).isoformat(timespec="seconds")
+        return [entry for entry in self.pending() if entry["next_attempt_at"] <= now]
+
+    def enqueue(self, msg, from_addr, to_addrs, error, attempts, backoff):
+        """メールをキューに追加（追加したエントリを返す）"""
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        entry_id = uuid.uuid4().hex
+        (self.queue_dir / f"{entry_id}.eml").write_bytes(msg.as_bytes())
+        self.entries.append({
+            "id": entry_id,
+            "status": "pending",
+            "subject": str(msg["Subject"] or ""),
+            "from_addr": from_addr,
+            "to_addrs": list(to_addrs),
+            "attempts": attempts,
+            "last_error": error,
+            "queued_at": datetime.now().isoformat(timespec="seconds"),
+            "next_attempt_at": (datetime.now() + timedelta(seconds=backoff)).isoformat(timespec="seconds"),
+        })
+        self.save()
+        return self.entries[-1]
+
+    def load_message(self, entry):
+        return message_from_bytes((self.queue_dir / f"{entry['id']}.eml").read_bytes(), policy=policy.SMTP)
+
+    def mark(self, entry, status, error=None, backoff=None):
+        """送信結果を反映（送信済みは .eml を削除する）"""
+        entry["status"] = status
+        if error is not None:
+            entry["last_error"] = error
+        if backoff is not None:
+            entry["next_attempt_at"] = (datetime.now() + timedelta(seconds=backoff)).isoformat(timespec="seconds")
+        if status == "sent":
+            (self.queue_dir / f"{entry['id']}.eml").unlink(missing_ok=True)
+            self.entries.remove(entry)
+        self.save()
+
+
+class DeliveryStats:
+    """配信結果の集計"""
+
+    def __init__(self):
+        self.sent = 0
+        self.recipients = 0
+        self.failed = []
+        self.queued = 0
+        self.retried = 0
+        self.latencies = []
+        self.started = time.perf_counter()
+
+    def percentile(self, q):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "sent": self.sent,
+            "recipients": self.recipients,
+            "failed": len(self.failed),
+            "queued": self.queued,
+            "retried": self.retried,
+            "elapsed_s": round(elapsed, 3),
+            "p50_s": round(self.percentile(0.5), 3),
+            "p95_s": round(self.percentile(0.95), 3),
+            "throughput_per_min": round(self.sent / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class MailDelivery:
+    """宛先ごと・グループごとのバッチ配信"""
+
+    def __init__(self, session, from_addr, mode="per_recipient", segment_size=50, batch_size=20,
+                 batch_delay=1.0, rate_per_minute=0, max_attempts=5, retry_backoff=300, queue_dir=None,
+                 inline_retries=0, inline_retry_delay=30):
+        if mode not in MODES:
+            raise ValueError(f"未対応の配信モードです: {mode}（{' / '.join(MODES)}）")
+        self.session = session
+        self.from_addr = from_addr
+        self.mode = mode
+        self.segment_size = max(1, segment_size)
+        self.batch_size = max(1, batch_size)
+        self.batch_delay = batch_delay
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.inline_retries = inline_retries
+        self.inline_retry_delay = inline_retry_delay
+        self.queue = RetryQueue(queue_dir) if queue_dir else None
+        self.recorder = get_recorder()
+        self.stats = DeliveryStats()
+        self._last_send = None
+
+    @classmethod
+    def from_config(cls, user, password, **overrides):
+        """config.yaml の email.smtp / email.delivery から作成"""
+        config = get_config()
+        session = SMTPSession(
+            host=overrides.pop("host", None) or config.get("email.smtp.server", "smtp.gmail.com"),
+            port=overrides.pop("port", None) or config.get("email.smtp.port", 465),
+            user=user,
+            password=password,
+            use_ssl=overrides.pop("use_ssl", config.get("email.smtp.use_ssl", True)),
+            starttls=config.get("email.smtp.starttls", False),
+            timeout=config.get("email.smtp.timeout", 30),
+            max_messages=config.get("email.delivery.max_messages_per_connection", 100),
+        )
+        options = {
+            "mode": config.get("email.delivery.mode", "per_recipient"),
+            "segment_size": config.get("email.delivery.segment_size", 50),
+            "batch_size": config.get("email.delivery.batch_size", 20),
+            "batch_delay": config.get("email.delivery.batch_delay", 1.0),
+            "rate_per_minute": config.get("email.delivery.rate_per_minute", 0),
+            "max_attempts": config.get("email.delivery.max_attempts", 5),
+            "retry_backoff": config.get("email.delivery.retry_backoff", 300),
+            "queue_dir": config.get("email.delivery.queue_dir", "reports/mail_queue"),
+            "inline_retries": config.get("email.delivery.inline_retries", 2),
+            "inline_retry_delay": config.get("email.delivery.inline_retry_delay", 30),
+        }
+        options.update(overrides)
+        return cls(session, user, **options)
+
+    # ------------------------------------------------------------------
+    # メッセージの作成
+    # ------------------------------------------------------------------
+    def build_messages(self, subject, html_body, recipients):
+        """
+        配信モードに応じてメッセージを作成
+
+        Returns:
+            list: [(メッセージ, 宛先リスト), ...]
+        """
+        base = MIMEMultipart()
+        base["From"] = self.from_addr
+        base["Subject"] = subject
+        base.attach(MIMEText(html_body, "html", "utf-8"))
+
+        messages = []
+        if self.mode == "per_recipient":
+            for recipient in recipients:
+                msg = deepcopy(base)
+                msg["To"] = recipient
+                msg["Message-ID"] = make_msgid()
+                messages.append((msg, [recipient]))
+        else:
+            for i in range(0, len(recipients), self.segment_size):
+                segment = recipients[i:i + self.segment_size]
+                msg = deepcopy(base)
+                # 宛先同士にアドレスが見えないよう、To は送信者・実際の宛先はエンベロープのみ
+                msg["To"] = self.from_addr
+                msg["Message-ID"] = make_msgid()
+                messages.append((msg, segment))
+        return messages
+
+    # ------------------------------------------------------------------
+    # 送信
+    # ------------------------------------------------------------------
+    def _throttle(self):
+        if self.min_interval and self._last_send is not None:
+            wait = self.min_interval - (time.perf_counter() - self._last_send)
+            if wait > 0:
+                self.recorder.sleep(wait, reason="smtp_rate_limit")
+        self._last_send = time.perf_counter()
+
+    def _send_one(self, msg, to_addrs):
+        """
+        1通送信し、結果を返す
+
+        Returns:
+            tuple: ("sent" | "transient" | "permanent", エラー内容)
+        """
+        self._throttle()
+        start = time.perf_counter()
+        try:
+            refused = self.recorder.track(
+                "smtp", lambda: self.session.send(msg, self.from_addr, to_addrs), recipients=len(to_addrs)
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)[:200]}"
+            return ("transient" if is_transient_error(e) else "permanent"), error
+
+        self.stats.latencies.append(time.perf_counter() - start)
+        self.stats.sent += 1
+        self.stats.recipients += len(to_addrs) - len(refused or {})
+        for address, (code, response) in (refused or {}).items():
+            self.stats.failed.append((address, f"{code} {response!r}"))
+        return "sent", None
+
+    def _retry_entries(self, entries):
+        """キューのメールを再送し、結果を反映（一時的なエラーは再送時刻を倍々に延ばす）"""
+        for entry in entries:
+            status, error = self._send_one(self.queue.load_message(entry), entry["to_addrs"])
+            self.stats.retried += 1
+            entry["attempts"] += 1
+            if status == "sent":
+                self.queue.mark(entry, "sent")
+            elif status == "transient" and entry["attempts"] < self.max_attempts:
+                self.recorder.retry(entry["attempts"], reason="smtp_queue")
+                self.queue.mark(entry, "pending", error, backoff=self.retry_backoff * 2 ** (entry["attempts"] - 1))
+            else:
+                self.queue.mark(entry, "failed", error)
+                self.stats.failed.extend((address, error) for address in entry["to_addrs"])
+
+    def flush_queue(self, now=None):
+        """再送キューのうち、再送時刻（now 時点）を過ぎたものを送信"""
+        if self.queue is None:
+            return
+        self._retry_entries(self.queue.due(now))
+
+    def _retry_inline(self, queued):
+        """この実行でキューに入れたメールを、待機を挟んで inline_retries 回まで再送"""
+        for round_number in range(self.inline_retries):
+            pending = [entry for entry in queued if entry["status"] == "pending"]
+            if not pending:
+                return
+            delay = self.inline_retry_delay * 2 ** round_number
+            print(f"⏳ 一時的なエラーのため {delay:.0f}秒後に再送します（{len(pending)}通、{round_number + 1}/{self.inline_retries}回目）")
+            self.recorder.sleep(delay, reason="smtp_inline_retry")
+            self._retry_entries(pending)
+            # キューに残っている宛先数（送信済み・失敗に変わった分を除く）
+            self.stats.queued = sum(len(entry["to_addrs"]) for entry in queued if entry["status"] == "pending")
+
+    def deliver(self, messages):
+        """
+        メッセージをバッチ単位で送信（一時的なエラーは再送キューへ入れ、inline_retries 回まで同じ実行で再送）
+
+        Args:
+            messages (list): build_messages の戻り値
+        """
+        queued = []
+        with self.session:
+            self.flush_queue()
+            for batch_start in range(0, len(messages), self.batch_size):
+                if batch_start:
+                    self.recorder.sleep(self.batch_delay, reason="smtp_batch")
+                for msg, to_addrs in messages[batch_start:batch_start + self.batch_size]:
+                    status, error = self._send_one(msg, to_addrs)
+                    if status == "sent":
+                        continue
+                    if status == "transient" and self.queue is not None:
+                        queued.append(
+                            self.queue.enqueue(msg, self.from_addr, to_addrs, error, attempts=1, backoff=self.retry_backoff)
+                        )
+                        self.stats.queued += len(to_addrs)
+                    else:
+                        self.stats.failed.extend((address, error) for address in to_addrs)
+            self._retry_inline(queued)
+
+        stats = self.stats.as_dict()
+        stats["connections"] = self.session.connections
+        self.recorder.record("smtp_delivery", mode=self.mode, messages=len(messages), **stats)
+        return stats
+
+    def send(self, subject, html_body, recipients):
+        """件名・本文・宛先からメッセージを作成して配信"""
+        return self.deliver(self.build_messages(subject, html_body, recipients))
+
+    def print_stats(self, stats):
+        """配信結果を表示"""
+        print(f"   送信: {stats['sent']}通 / 宛先 {stats['recipients']}件（接続 {stats['connections']}回）")
+        print(
+            f"   所要時間: {stats['elapsed_s']:.2f}秒 / 1通あたり p50 {stats['p50_s']:.3f}秒・p95 {stats['p95_s']:.3f}秒"
+            f" / {stats['throughput_per_min']:.1f}通/分"
+        )
+        if stats["retried"]:
+            print(f"   再送キューから再送: {stats['retried']}通")
+        if stats["queued"]:
+            print(f"⚠️ 一時的なエラーのため {stats['queued']}件を再送キューに保存しました: {self.queue.queue_dir}")
+        for address, error in self.stats.failed:
+            print(f"❌ 送信失敗: {address}（{error}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="メール配信ユーティリティ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # 接続先の指定（既定: config.yaml の email.smtp）
+    connection = argparse.ArgumentParser(add_help=False)
+    connection.add_argument("--host", default=None)
+    connection.add_argument("--port", type=int, default=None)
+    connection.add_argument("--no-ssl", action="store_true", help="SSL・認証を使わない（aiosmtpd など）")
+
+    subparsers.add_parser("status", help="再送キューの状態を表示")
+    subparsers.add_parser("flush", parents=[connection], help="再送キューのうち再送時刻を過ぎたものを送信")
+
+    send_test = subparsers.add_parser(
+        "send-test", parents=[connection], help="テストメールを送信（ローカルのSMTPサーバーでの確認用）"
+    )
+    send_test.add_argument("--to", required=True, help="宛先（カンマ区切り）")
+    send_test.add_argument("--mode", choices=MODES, default=None)
+    send_test.add_argument("--count", type=int, default=1, help="宛先リストを繰り返す回数（負荷確認用）")
+    args = parser.parse_args()
+
+    user = os.environ.get("GMAIL_USER", "sender@example.com")
+    password = os.environ.get("GMAIL_APP_PASSWORD")
+
+    if args.command == "status":
+        queue = RetryQueue(get_config().get("email.delivery.queue_dir", "reports/mail_queue"))
+        print(f"📮 再送キュー: 待機 {len(queue.pending())}件 / 失敗 {sum(1 for e in queue.entries if e['status'] == 'failed')}件")
+        for entry in queue.entries:
+            print(f"  • [{entry['status']}] {', '.join(entry['to_addrs'])}（{entry['attempts']}回 / 次回 {entry['next_attempt_at']}）")
+            print(f"     {entry['last_error']}")
+        return
+
+    overrides = {}
+    if args.host:
+        overrides["host"] = args.host
+    if args.port:
+        overrides["port"] = args.port
+    if args.no_ssl:
+        overrides["use_ssl"] = False
+        password = None
+    if getattr(args, "mode", None):
+        overrides["mode"] = args.mode
+
+    delivery = MailDelivery.from_config(user, password, **overrides)
+    if args.command == "flush":
+        with delivery.session:
+            delivery.flush_queue()
+        stats = delivery.stats.as_dict()
+        stats["connections"] = delivery.session.connections
+    else:
+        recipients = [address.strip() for address in args.to.split(",") if address.strip()] * args.count
+        print(f"📤 テストメールを送信中...（{len(recipients)}宛先 / {delivery.mode}）")
+        stats = delivery.send("配信テスト", "<p>メール配信のテストです。</p>", recipients)
+    delivery.print_stats(stats)
+    sys.exit(1 if delivery.stats.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+モデルの振り分け（タスクごとの候補・クォータ超過時の切り替え）
+タスク（agent / formatting / analysis / email）ごとに候補のモデルを並べ、次のように呼び出すモデルを選ぶ。
+
+- 候補は llm.<役割>.model を先頭に、model_router.tasks.<タスク>.fallbacks を続けたもの
+- prefer が quality の場合は設定の順、fast の場合は応答時間の短い順、cheap の場合はコストの低い順に並べる
+  （JSON整形のような構造的なタスクは fast にして、最も速いモデルに回す）
+- 応答時間は使用量台帳（quota_ledger.py）に記録した直近の実績（タスク・モデルごと）を使う。
+  実績のないモデルは、目安（model_router.models の latency）を実績のあるモデルとの比率で秒に換算して比べる
+- 直近の成功率が min_success_rate を下回るモデルと、cooldown_seconds 以内に429エラーを受けたモデルは後ろに回す
+- 呼び出しが429エラー・1日の上限（QuotaExhaustedError）で失敗した場合は、待機せずに次の候補に切り替える
+  （すべての候補が失敗した場合は最後のエラーを送出し、各スクリプトの既存の再試行で待機する）
+
+モデルの作成は各スクリプトが factory（モデル名 → モデル）として渡す。
+"""
+from config_loader import get_config
+from instrumentation import get_recorder
+from quota_ledger import QuotaLedger, get_quota_ledger, is_quota_error
+
+# タスクと設定（llm.<役割>）の対応
+TASK_ROLES = {
+    "agent": "searcher",
+    "formatting": "formatter",
+    "analysis": "analyzer",
+    "email": "email",
+}
+
+PREFERENCES = ("quality", "fast", "cheap")
+
+
+class ModelRouter:
+    """
+    タスクごとのモデルの振り分け
+
+    Args:
+        task (str): タスク名（TASK_ROLES のキー）
+        candidates (list): 候補のモデル名（設定の順）
+        factory (callable): factory(モデル名) → モデル（エージェントの場合は実行可能なグラフ）
+        prefer (str): "quality" | "fast" | "cheap"
+        hints (dict): {モデル名: {"cost", "latency"}}（相対値、省略は 1）
+        ledger (QuotaLedger): 実績を読む使用量台帳（None: 目安だけで並べる）
+        cooldown_seconds (float): 429エラーを受けたモデルを後ろに回す秒数
+        stats_window (int): 実績を求める直近の呼び出し数
+        min_samples (int): 実績を使うのに必要な呼び出し数
+        min_success_rate (float): これを下回るモデルは後ろに回す
+    """
+
+    def __init__(self, task, candidates, factory, prefer="quality", hints=None, ledger=None,
+                 cooldown_seconds=60, stats_window=20, min_samples=3, min_success_rate=0.5):
+        if prefer not in PREFERENCES:
+            raise ValueError(f"model_router の prefer は {', '.join(PREFERENCES)} のいずれかです: {prefer}")
+        self.task = task
+        self.candidates = list(dict.fromkeys(name for name in candidates if name))
+        self.factory = factory
+        self.prefer = prefer
+        self.hints = hints or {}
+        self.ledger = ledger
+        self.cooldown_seconds = cooldown_seconds
+        self.stats_window = stats_window
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.last_model = None
+        self._models = {}
+        # このプロセスで429エラーを受けた時刻（台帳が無効の場合も切り替え後に後ろに回す）
+        self._quota_errors = {}
+
+    def model(self, name):
+        """モデルを取得（候補ごとに1回だけ作成）"""
+        if name not in self._models:
+            self._models[name] = self.factory(name)
+        return self._models[name]
+
+    def _hint(self, name, key):
+        return float(self.hints.get(name, {}).get(key, 1.0))
+
+    def _latencies(self, stats):
+        """候補ごとの応答時間の見込み（実績がなければ目安を実績との比率で換算）"""
+        observed = {
+            name: entry["mean_wall_s"]
+            for name, entry in stats.items()
+            if entry["mean_wall_s"] is not None and entry["ok"] >= self.min_samples
+        }
+        ratios = [seconds / self._hint(name, "latency") for name, seconds in observed.items()]
+        scale = sum(ratios) / len(ratios) if ratios else 1.0
+        return {name: observed.get(name, self._hint(name, "latency") * scale) for name in self.candidates}
+
+    def order(self):
+        """呼び出す順の候補（後ろに回したモデルも最後に残す）"""
+        stats = self.ledger.model_stats(self.task, self.candidates, self.stats_window) if self.ledger else {}
+        now = QuotaLedger.clock()
+        healthy, degraded = [], []
+        for name in self.candidates:
+            entry = stats.get(name)
+            last_quota = max((entry or {}).get("last_quota_ts") or 0, self._quota_errors.get(name, 0))
+            cooling = last_quota and now - last_quota < self.cooldown_seconds
+            failing = entry and entry["calls"] >= self.min_samples and entry["ok"] / entry["calls"] < self.min_success_rate
+            (degraded if cooling or failing else healthy).append(name)
+
+        if self.prefer == "fast":
+            latencies = self._latencies(stats)
+            healthy.sort(key=lambda name: latencies[name])
+        elif self.prefer == "cheap":
+            healthy.sort(key=lambda name: self._hint(name, "cost"))
+        return healthy + degraded
+
+    def invoke(self, kind, call, attempt=None, **fields):
+        """
+        候補を順に呼び出し、429エラー・1日の上限の場合は待機せずに次の候補に切り替える
+
+        Args:
+            kind (str): 呼び出し種別（"llm" | "agent"）
+            call (callable): call(モデル) → レスポンス
+            attempt (int): 試行回数（1始まり）
+
+        Returns:
+            レスポンス（呼び出したモデル名は last_model）
+        """
+        recorder = get_recorder()
+        order = self.order()
+        for index, name in enumerate(order):
+            model = self.model(name)
+            try:
+                response = recorder.track(
+                    kind, lambda: call(model), model=name, attempt=attempt, task=self.task, **fields
+                )
+            except Exception as e:
+                if not is_quota_error(e) or index == len(order) - 1:
+                    raise
+                self._quota_errors[name] = QuotaLedger.clock()
+                print(f"🔀 {name} がクォータ上限に達したため、{order[index + 1]} に切り替えます")
+                recorder.record("failover", task=self.task, from_model=name, to_model=order[index + 1], attempt=attempt)
+                continue
+            self.last_model = name
+            return response
+
+
+def task_candidates(task):
+    """タスクの候補のモデル名（llm.<役割>.model と fallbacks）"""
+    config = get_config()
+    primary = config.get(f"llm.{TASK_ROLES[task]}.model", "gemini-2.5-flash")
+    if not config.get("model_router.enabled", True):
+        return [primary]
+    return list(dict.fromkeys([primary, *config.get(f"model_router.tasks.{task}.fallbacks", [])]))
+
+
+def get_model_router(task, factory):
+    """
+    現在の設定（プロファイルを含む）のモデルの振り分けを作成
+
+    model_router.enabled が false の場合は llm.<役割>.model だけを使う（切り替え・並べ替えなし）。
+    """
+    config = get_config()
+    if not config.get("model_router.enabled", True):
+        return ModelRouter(task, task_candidates(task), factory)
+    return ModelRouter(
+        task,
+        task_candidates(task),
+        factory,
+        prefer=config.get(f"model_router.tasks.{task}.prefer", "quality"),
+        hints=config.get("model_router.models", {}),
+        ledger=get_quota_ledger(),
+        cooldown_seconds=config.get("model_router.cooldown_seconds", 60),
+        stats_window=config.get("model_router.stats_window", 20),
+        min_samples=config.get("model_router.min_samples", 3),
+        min_success_rate=config.get("model_router.min_success_rate", 0.5),
+    )
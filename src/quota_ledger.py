@@ -0,0 +1,337 @@
+"""
+API使用量の台帳（プロセス・実行をまたいで共有）
+Gemini・Tavily の呼び出しを SQLite の台帳に記録し、呼び出し前に1分・1日あたりの上限に空きがあるかを確かめる。
+research_searcher.py・research_analyzer.py・email_report.py・当日の手動の再実行・並行するプロファイルが
+同じ台帳を使うため、429 エラーを受けてから待つのではなく、上限に達する前に自分で待機する。
+
+- 予約は BEGIN IMMEDIATE のトランザクション内で「集計 → 記録」を行うため、複数のプロセスが同時に予約しても上限を超えない
+- 1分・1日あたりのリクエスト数は実際のLLM呼び出しの回数（エージェント実行は内部の手順数）で数える
+- 予約の時点では呼び出し側の見込み（エージェントの手順数・プロンプトのトークン数）を記録し、
+  呼び出し後に実際のリクエスト数・トークン数で置き換える（トークン数の上限も呼び出し前に判定できる）
+- 1日の区切りは day_reset_timezone の0時（Gemini API の1日の上限は太平洋時間の0時にリセットされる）
+- 1分あたりの上限は空くまで待機し、1日の上限に達した場合は QuotaExhaustedError を送出する
+- 上限は提供元（gemini / tavily）ごとと、モデルごと（quota_ledger.models）の両方を判定する
+  （Gemini API の1日の上限はモデルごとのため、モデルに requests_per_day があれば提供元の1日の上限は判定しない。
+  上限に達したモデルだけが QuotaExhaustedError になり、model_router.py が次の候補に切り替えられる）
+- 呼び出しごとのタスク・応答時間・結果（ok / error / quota）も記録し、model_router.py がモデルの振り分けに使う
+
+RunRecorder.track から使われるため、各スクリプトから直接使う必要はない。
+今日の使用量の確認:
+    python src/quota_ledger.py
+"""
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from config_loader import get_config
+
+SCHEMA_VERSION = 2
+WINDOW = 60.0
+
+# 以前のバージョンの台帳に追加する列（記録はそのまま使う）
+ADDED_COLUMNS = (("task", "TEXT"), ("wall_s", "REAL"))
+
+LIMIT_FIELDS = ("requests_per_minute", "tokens_per_minute", "requests_per_day")
+
+
+def is_quota_error(error):
+    """APIのクォータ超過（429）・台帳の1日の上限によるエラーか"""
+    message = str(error)
+    return "429" in message or "ResourceExhausted" in message or "Quota exceeded" in message
+
+
+class QuotaExhaustedError(RuntimeError):
+    """1日の上限に達した（既存の429エラーの処理で扱えるよう、メッセージに "Quota exceeded" を含める）"""
+
+    def __init__(self, scope, used, limit):
+        self.scope = scope
+        super().__init__(f"Quota exceeded (quota ledger): {scope} は本日 {used}/{limit} リクエストを使用済みです")
+
+
+class QuotaLedger:
+    """SQLite の使用量台帳（スレッド・プロセスセーフ）"""
+
+    # 時刻の取得に使う時計（ベンチマークでは仮想時計に差し替える）
+    clock = staticmethod(time.time)
+
+    def __init__(self, db_path, limits=None, model_limits=None, timezone="America/Los_Angeles", retention_days=7):
+        """
+        Args:
+            db_path (str): 台帳のパス
+            limits (dict): {提供元: {"requests_per_minute", "tokens_per_minute", "requests_per_day"}}（0・省略は制限なし）
+            model_limits (dict): {モデル名: 同上}
+            timezone (str): 1日の区切りのタイムゾーン
+            retention_days (int): 記録を残す日数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.limits = {name: dict(value or {}) for name, value in (limits or {}).items()}
+        self.model_limits = {name: dict(value or {}) for name, value in (model_limits or {}).items()}
+        self.timezone = ZoneInfo(timezone)
+        self.retention = retention_days * 86400
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            # 読み取りが書き込みを待たないよう WAL にする（ファイルに保存される設定）
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._create_schema(conn)
+
+    def _connect(self):
+        # 自動コミットにして BEGIN IMMEDIATE で明示的にロックする（他プロセスのロック解除は timeout まで待つ）
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        # WAL では NORMAL でもコミットの整合性は保たれる（電源断時に直前の記録が失われうるだけ）
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, 1, SCHEMA_VERSION):
+                conn.execute("DROP TABLE IF EXISTS usage")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 1,
+                    requests INTEGER NOT NULL DEFAULT 1,
+                    input_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'reserved',
+                    task TEXT,
+                    wall_s REAL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(usage)")}
+            for column, column_type in ADDED_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE usage ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS usage_provider_ts ON usage(provider, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS usage_task_model_ts ON usage(task, model, ts)")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("DELETE FROM usage WHERE ts < ?", (self.clock() - self.retention,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def day_start(self, now):
+        """now を含む日の0時（day_reset_timezone）の時刻"""
+        local = datetime.fromtimestamp(now, self.timezone)
+        return local.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+    def _scopes(self, provider, model):
+        """判定する範囲: [(表示名, 条件のSQL, パラメータ, 上限)]"""
+        scopes = []
+        provider_limits = dict(self.limits.get(provider, {}))
+        model_limits = self.model_limits.get(model, {})
+        if model_limits.get("requests_per_day"):
+            # 1日の上限はモデルの分だけで判定する（提供元の分で止めると別のモデルに切り替えられない）
+            provider_limits.pop("requests_per_day", None)
+        if any(provider_limits.get(field) for field in LIMIT_FIELDS):
+            scopes.append((provider, "provider = ?", (provider,), provider_limits))
+        if any(model_limits.get(field) for field in LIMIT_FIELDS):
+            scopes.append((f"{provider}/{model}", "provider = ? AND model = ?", (provider, model), model_limits))
+        return scopes
+
+    def _wait_seconds(self, conn, now, where, params, limits, scope, requests=1, tokens=0):
+        """今回の見込み（リクエスト数・トークン数）の空きができるまでの秒数（空きがあれば 0）"""
+        daily = limits.get("requests_per_day")
+        if daily:
+            used = conn.execute(
+                f"SELECT COALESCE(SUM(requests), 0) FROM usage WHERE {where} AND ts >= ?",
+                (*params, self.day_start(now)),
+            ).fetchone()[0]
+            if used + requests > daily:
+                raise QuotaExhaustedError(scope, used, daily)
+
+        rows = conn.execute(
+            f"SELECT ts, requests, input_tokens + output_tokens FROM usage WHERE {where} AND ts > ? ORDER BY ts",
+            (*params, now - WINDOW),
+        ).fetchall()
+        wait = 0.0
+        for column, limit_field, need in ((1, "requests_per_minute", requests), (2, "tokens_per_minute", tokens)):
+            limit = limits.get(limit_field)
+            if not limit:
+                continue
+            # 1回で上限を超える見込みは、直近1分の記録がなくなれば通す
+            need = min(need, limit)
+            total = sum(row[column] for row in rows)
+            # 古い呼び出しから順に、1分前になれば今回の分が収まるところまで待つ
+            for row in rows:
+                if total < limit and total + need <= limit:
+                    break
+                total -= row[column]
+                wait = max(wait, row[0] + WINDOW - now)
+        return wait
+
+    def reserve(self, provider, model, sleep=None, task=None, requests=1, tokens=0):
+        """
+        呼び出し枠を予約（1分あたりの上限に達していれば空くまで待機）
+
+        Args:
+            provider (str): "gemini" | "tavily"
+            model (str): モデル名
+            sleep (callable): 待機関数 sleep(seconds, reason)（既定: time.sleep）
+            task (str): タスク（model_router.py の agent / formatting / analysis / email）
+            requests (int): 見込みのリクエスト数（エージェント実行は手順数）
+            tokens (int): 見込みのトークン数（settle で実際の数に置き換える）
+
+        Returns:
+            int: 予約ID（settle に渡す）
+
+        Raises:
+            QuotaExhaustedError: 1日の上限に達している場合
+        """
+        model = model or provider
+        requests = max(1, requests or 1)
+        tokens = max(0, tokens or 0)
+        scopes = self._scopes(provider, model)
+        while True:
+            with self._lock, closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = self.clock()
+                    wait = 0.0
+                    for scope, where, params, limits in scopes:
+                        wait = max(wait, self._wait_seconds(conn, now, where, params, limits, scope, requests, tokens))
+                    if wait <= 0:
+                        reservation = conn.execute(
+                            "INSERT INTO usage (ts, provider, model, task, requests, input_tokens) VALUES (?, ?, ?, ?, ?, ?)",
+                            (now, provider, model, task, requests, tokens),
+                        ).lastrowid
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            if wait <= 0:
+                return reservation
+            # 待機はロックの外で行い、待機後に改めて判定する
+            if sleep is not None:
+                sleep(wait, reason=f"quota_ledger.{provider}")
+            else:
+                time.sleep(wait)
+
+    def settle(self, reservation, requests=1, input_tokens=0, output_tokens=0, status="ok", wall_s=None):
+        """予約した呼び出しの結果（実際のリクエスト数・トークン数・応答時間、status: ok / error / quota）を記録"""
+        if reservation is None:
+            return
+        with self._lock, closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE usage SET requests = ?, input_tokens = ?, output_tokens = ?, status = ?, wall_s = ? WHERE id = ?",
+                (max(1, requests or 1), input_tokens or 0, output_tokens or 0, status, wall_s, reservation),
+            )
+
+    def model_stats(self, task, models, window=20):
+        """
+        タスク・モデルごとの直近 window 回の呼び出しの実績
+
+        Returns:
+            dict: {モデル名: {"calls", "ok", "mean_wall_s"（成功した呼び出しの平均、なければ None）, "last_quota_ts"}}
+        """
+        stats = {}
+        with closing(self._connect()) as conn:
+            for model in models:
+                rows = conn.execute(
+                    "SELECT ts, status, wall_s FROM usage WHERE task = ? AND model = ? AND status != 'reserved' "
+                    "ORDER BY ts DESC LIMIT ?",
+                    (task, model, window),
+                ).fetchall()
+                if not rows:
+                    continue
+                wall_times = [wall_s for _, status, wall_s in rows if status == "ok" and wall_s is not None]
+                quota_times = [ts for ts, status, _ in rows if status == "quota"]
+                stats[model] = {
+                    "calls": len(rows),
+                    "ok": sum(1 for _, status, _ in rows if status == "ok"),
+                    "mean_wall_s": sum(wall_times) / len(wall_times) if wall_times else None,
+                    "last_quota_ts": max(quota_times) if quota_times else None,
+                }
+        return stats
+
+    def usage(self, since=None):
+        """
+        提供元・モデルごとの使用量（既定: 今日）
+
+        Returns:
+            list: [{"provider", "model", "calls", "requests", "input_tokens", "output_tokens", "errors", "quota_errors"}]
+        """
+        since = self.day_start(self.clock()) if since is None else since
+        with closing(self._connect()) as conn:
+            rows = conn.execute("""
+                SELECT provider, model, SUM(calls), SUM(requests), SUM(input_tokens), SUM(output_tokens),
+                       SUM(status = 'error'), SUM(status = 'quota')
+                FROM usage WHERE ts >= ? GROUP BY provider, model ORDER BY provider, model
+            """, (since,)).fetchall()
+        keys = ("provider", "model", "calls", "requests", "input_tokens", "output_tokens", "errors", "quota_errors")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def remaining_today(self, provider, model=None):
+        """提供元（model を指定した場合はモデル）の1日の上限の残りリクエスト数（上限がなければ None）"""
+        limits = self.model_limits.get(model, {}) if model else self.limits.get(provider, {})
+        daily = limits.get("requests_per_day")
+        if not daily:
+            return None
+        used = sum(
+            row["requests"] for row in self.usage()
+            if row["provider"] == provider and (model is None or row["model"] == model)
+        )
+        return max(0, daily - used)
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_ledger = None
+_global_lock = threading.Lock()
+
+
+def get_quota_ledger():
+    """使用量台帳を取得（無効の場合は None、全プロファイル・全スレッドで共有）"""
+    global _global_ledger
+    config = get_config()
+    if not config.get("quota_ledger.enabled", True):
+        return None
+    with _global_lock:
+        if _global_ledger is None:
+            _global_ledger = QuotaLedger(
+                Path(config.get("quota_ledger.path", "reports/quota_ledger.sqlite")).resolve(),
+                limits=config.get("quota_ledger.limits", {}),
+                model_limits=config.get("quota_ledger.models", {}),
+                timezone=config.get("quota_ledger.day_reset_timezone", "America/Los_Angeles"),
+                retention_days=config.get("quota_ledger.retention_days", 7),
+            )
+        return _global_ledger
+
+
+def main():
+    ledger = get_quota_ledger()
+    if ledger is None:
+        print("ℹ️ 使用量台帳は無効です（quota_ledger.enabled: false）")
+        return
+    rows = ledger.usage()
+    print(f"📒 本日の使用量（{ledger.timezone.key} の0時から、{ledger.db_path}）")
+    if not rows:
+        print("  記録なし")
+    for row in rows:
+        errors = f" / エラー {row['errors']}回" if row["errors"] else ""
+        errors += f" / クォータ超過 {row['quota_errors']}回" if row["quota_errors"] else ""
+        print(
+            f"  • {row['provider']}/{row['model']}: 呼び出し {row['calls']}回 / リクエスト {row['requests']}回 / "
+            f"トークン 入力{row['input_tokens']:,}・出力{row['output_tokens']:,}{errors}"
+        )
+    for provider in ledger.limits:
+        remaining = ledger.remaining_today(provider)
+        if remaining is not None:
+            print(f"  残り（{provider}）: {remaining}リクエスト")
+    for model in ledger.model_limits:
+        remaining = ledger.remaining_today("gemini", model)
+        if remaining is not None:
+            print(f"  残り（gemini/{model}）: {remaining}リクエスト")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+APIの呼び出しレート制限（プロセス全体で共有）
+複数の調査プロファイルを並行して実行しても、Gemini・Tavily への呼び出しが
+1分あたりの上限を超えないよう、呼び出し前に空き枠を予約して待機する。
+
+RunRecorder.track から呼び出し種別ごとに使われるため、各スクリプトから直接使う必要はない。
+使用量台帳（quota_ledger.py）が有効な場合は台帳が1分あたりの上限も判定するため、台帳が無効の場合だけ使う。
+エージェント実行（"agent"）は内部で複数回LLMを呼び出すが、枠は1回分として数える（run_estimator.py の再現では手順数を指定する）。
+"""
+import time
+import threading
+from collections import deque
+
+from config_loader import get_config
+
+# 呼び出し種別 → 枠を共有するグループ
+KIND_GROUPS = {"llm": "gemini", "agent": "gemini", "tavily": "tavily"}
+
+
+class RateLimiter:
+    """スライディングウィンドウ方式のレート制限（スレッドセーフ）"""
+
+    # 経過時間の計測に使う時計（ベンチマークでは仮想時計に差し替える）
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, limits, window=60.0):
+        """
+        Args:
+            limits (dict): {グループ名: ウィンドウあたりの最大呼び出し数}（0 以下は制限なし）
+            window (float): ウィンドウの長さ（秒）
+        """
+        self.limits = {group: limit for group, limit in limits.items() if limit and limit > 0}
+        self.window = window
+        self._slots = {group: deque() for group in self.limits}
+        self._lock = threading.Lock()
+
+    def reserve(self, group, count=1):
+        """
+        呼び出し枠を count 個予約し、予約した時刻までの待機秒数を返す
+
+        予約はロック内で行うため、並行して呼び出しても上限を超えない。
+        """
+        limit = self.limits.get(group)
+        if limit is None:
+            return 0.0
+
+        # 1回で上限を超える分は、ウィンドウが空になれば通す
+        count = min(max(1, count), limit)
+        with self._lock:
+            now = self.clock()
+            slots = self._slots[group]
+            while slots and slots[0] <= now - self.window:
+                slots.popleft()
+            # 残りが limit - count 個になるまで、古い予約がウィンドウから外れるのを待つ
+            start = now if len(slots) + count <= limit else slots[len(slots) + count - limit - 1] + self.window
+            slots.extend([start] * count)
+            return max(0.0, start - now)
+
+    def acquire(self, kind, sleep=None, count=1):
+        """
+        呼び出し種別の枠を確保（必要なら待機）
+
+        Args:
+            kind (str): 呼び出し種別（"llm" | "agent" | "tavily" など）
+            sleep (callable): 待機関数 sleep(seconds, reason)（既定: time.sleep）
+            count (int): 予約する枠の数
+
+        Returns:
+            float: 待機した秒数
+        """
+        group = KIND_GROUPS.get(kind)
+        if group is None:
+            return 0.0
+        wait = self.reserve(group, count)
+        if wait > 0:
+            if sleep is not None:
+                sleep(wait, reason=f"rate_limit.{group}")
+            else:
+                time.sleep(wait)
+        return wait
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_rate_limiter = None
+_global_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """レート制限インスタンスを取得（全プロファイル・全スレッドで共有）"""
+    global _global_rate_limiter
+    with _global_lock:
+        if _global_rate_limiter is None:
+            config = get_config()
+            limits = {}
+            if config.get("rate_limit.enabled", True):
+                limits = {
+                    "gemini": config.get("rate_limit.gemini_per_minute", 10),
+                    "tavily": config.get("rate_limit.tavily_per_minute", 60),
+                }
+            _global_rate_limiter = RateLimiter(limits)
+        return _global_rate_limiter
@@ -0,0 +1,214 @@
+"""
+週次レポートのマニフェスト
+research_analyzer.py がレポートを保存するたびに、レポート日・パス・記事数・SHA-256 を
+reports/report_manifest.json に記録する。email_report.py はこのファイルを1回読むだけで
+最新（または指定日）のレポートを特定できる。
+
+- 書き込みは一時ファイル＋os.replace で行い、途中で失敗しても壊れたファイルを残さない
+- レポート日はファイル名の文字列ではなく日付で比較する
+  （週次レポート_20251013.md と 週次レポート_2025_20251014.md が混在しても正しく並ぶ）
+
+使い方:
+    # 既存のレポートからマニフェストを作り直す
+    python src/report_manifest.py rebuild
+
+    # 記録内容を表示
+    python src/report_manifest.py show
+"""
+import os
+import re
+import json
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from config_loader import get_config
+
+MANIFEST_VERSION = 1
+REPORT_GLOB = "週次レポート_*.md"
+
+_REPORT_DATE = re.compile(r"(\d{8})\.md$")
+_ARTICLE_COUNT = re.compile(r"\*\*調査対象データ件数\*\*:\s*(\d+)件")
+
+
+def report_date_from_path(path):
+    """ファイル名（..._YYYYMMDD.md）からレポート日（YYYY-MM-DD）を取り出す"""
+    match = _REPORT_DATE.search(Path(path).name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y%m%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def file_sha256(path):
+    """ファイルのSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_manifest_path():
+    return Path(get_config().get("data.report_manifest_path", "reports/report_manifest.json"))
+
+
+def load_manifest(manifest_path=None):
+    """
+    マニフェストを読み込む
+
+    Returns:
+        dict: {"version", "latest", "reports": {レポート日: エントリ}}（ファイルがない・壊れている場合は空）
+    """
+    manifest_path = Path(manifest_path or default_manifest_path())
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return {"version": MANIFEST_VERSION, "latest": None, "reports": {}}
+
+
+def save_manifest(manifest, manifest_path=None):
+    """マニフェストを原子的に書き出す（一時ファイルに書いてから置き換える）"""
+    manifest_path = Path(manifest_path or default_manifest_path())
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest["reports"] = dict(sorted(manifest["reports"].items()))
+    manifest["latest"] = max(manifest["reports"]) if manifest["reports"] else None
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".report_manifest_", suffix=".tmp", dir=manifest_path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def _relative_to_manifest(path, manifest_path=None):
+    base_dir = Path(manifest_path or default_manifest_path()).parent
+    try:
+        return Path(os.path.relpath(path, base_dir)).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+def make_entry(report_path, report_date, article_count, manifest_path=None, sidecar_path=None):
+    """マニフェストのエントリを作成（パスはマニフェストからの相対パス）"""
+    entry = {
+        "path": _relative_to_manifest(report_path, manifest_path),
+        "date": report_date,
+        "article_count": article_count,
+        "sha256": file_sha256(report_path),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if sidecar_path is not None:
+        entry["sidecar"] = _relative_to_manifest(sidecar_path, manifest_path)
+    return entry
+
+
+def record_report(report_path, report_date, article_count, manifest_path=None, sidecar_path=None):
+    """
+    レポートを1件記録（同じレポート日のエントリは置き換える）
+
+    Args:
+        report_path (str | Path): レポートのパス
+        report_date (str): レポート日（YYYY-MM-DD）
+        article_count (int): 調査対象データ件数
+        sidecar_path (str | Path): 構造化データ（サイドカー）のパス
+    """
+    manifest = load_manifest(manifest_path)
+    manifest["reports"][report_date] = make_entry(
+        report_path, report_date, article_count, manifest_path, sidecar_path
+    )
+    save_manifest(manifest, manifest_path)
+    return manifest
+
+
+def resolve_report(report_date=None, manifest_path=None):
+    """
+    マニフェストからレポートを特定
+
+    Args:
+        report_date (str): レポート日（YYYY-MM-DD、省略時は最新）
+
+    Returns:
+        tuple: (レポートのパス, エントリ) 見つからない場合は (None, None)
+    """
+    manifest_path = Path(manifest_path or default_manifest_path())
+    manifest = load_manifest(manifest_path)
+    entry = manifest["reports"].get(report_date or manifest.get("latest") or "")
+    if not entry:
+        return None, None
+    path = manifest_path.parent / entry["path"]
+    if not path.exists():
+        return None, None
+    if entry.get("sidecar"):
+        entry = {**entry, "sidecar": str(manifest_path.parent / entry["sidecar"])}
+    return path, entry
+
+
+def scan_reports(reports_dir=None):
+    """
+    レポートディレクトリを走査し、レポート日の古い順に返す（マニフェストがない場合の代替）
+
+    同じレポート日のファイルが複数ある場合は更新日時の新しいものを採用する。
+
+    Returns:
+        list: [(レポート日, パス), ...]
+    """
+    reports_dir = Path(reports_dir or get_config().get("data.reports_dir", "reports"))
+    by_date = {}
+    for path in reports_dir.glob(REPORT_GLOB) if reports_dir.exists() else []:
+        report_date = report_date_from_path(path)
+        if report_date is None:
+            continue
+        current = by_date.get(report_date)
+        if current is None or path.stat().st_mtime > current.stat().st_mtime:
+            by_date[report_date] = path
+    return sorted(by_date.items())
+
+
+def rebuild_manifest(reports_dir=None, manifest_path=None):
+    """既存のレポートからマニフェストを作り直す"""
+    manifest = {"version": MANIFEST_VERSION, "latest": None, "reports": {}}
+    for report_date, path in scan_reports(reports_dir):
+        match = _ARTICLE_COUNT.search(path.read_text(encoding="utf-8"))
+        article_count = int(match.group(1)) if match else None
+        manifest["reports"][report_date] = make_entry(path, report_date, article_count, manifest_path)
+    save_manifest(manifest, manifest_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="週次レポートのマニフェスト")
+    parser.add_argument("--manifest", default=None, help="マニフェストのパス（既定: data.report_manifest_path）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="既存のレポートからマニフェストを作り直す")
+    subparsers.add_parser("show", help="記録内容を表示")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        manifest = rebuild_manifest(manifest_path=args.manifest)
+        print(f"✓ マニフェストを作成しました: {len(manifest['reports'])}件（最新: {manifest['latest']}）")
+        print(f"💾 保存先: {args.manifest or default_manifest_path()}")
+        return
+
+    manifest = load_manifest(args.manifest)
+    print(f"📚 レポート: {len(manifest['reports'])}件（最新: {manifest['latest']}）")
+    for report_date, entry in manifest["reports"].items():
+        count = f"{entry['article_count']}件" if entry["article_count"] is not None else "件数不明"
+        print(f"  • {report_date}: {entry['path']}（{count} / {entry['sha256'][:12]}）")
+
+
+if __name__ == "__main__":
+    main()
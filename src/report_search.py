@@ -0,0 +1,490 @@
+"""
+レポート・記事の全文検索
+reports/ 配下の週次レポート（週次レポート_*.md）と記事データ（weekly_data/*.json, research_data.json）を
+SQLite FTS5 に索引し、フレーズ・AND/OR/NOT 検索とレポート日・媒体での絞り込みを行う。
+
+- 日本語は文字バイグラム、英数字は単語単位に前処理してから FTS5 に登録する
+  （検索語も同じ規則でフレーズに変換するため、「技能伝承」は「技能 能伝 伝承」の連続として一致する）
+- レポートは見出し（#）単位、記事は1件単位で登録する
+- ファイルの更新日時・サイズが変わったものだけを索引し直す（sync）
+
+使い方:
+    # 索引を最新化
+    python src/report_search.py sync
+
+    # 検索（AND/OR/NOT、"..." でフレーズ）
+    python src/report_search.py search "Kahuna AND 製造業" --from 2025-10-01 --source Forbes
+
+    # 初めて言及したレポート・記事
+    python src/report_search.py first Kahuna
+"""
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from config_loader import get_config
+from entity_normalizer import normalize_surface
+from report_manifest import REPORT_GLOB, report_date_from_path
+
+SCHEMA_VERSION = 1
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+")
+_NON_ASCII_RUN = re.compile(r"[^\x00-\x7f\s、。・「」『』（）()【】［］\[\]：:，,．！？!?*#|>`~-]+")
+_QUERY_TOKEN = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+SNIPPET_RADIUS = 40
+
+
+def bigram_tokens(text):
+    """英数字は単語、それ以外の連続は文字バイグラムに分割"""
+    text = normalize_surface(text).lower()
+    tokens = []
+    for match in re.finditer(r"[a-z0-9]+|" + _NON_ASCII_RUN.pattern, text):
+        run = match.group()
+        if _ASCII_WORD.fullmatch(run) or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def to_fts_text(text):
+    """FTS5 に登録する前処理済みテキスト"""
+    return " ".join(bigram_tokens(text))
+
+
+def _balance_parens(parts):
+    """対応する相手のない括弧を除く"""
+    unmatched = set()
+    opened = []
+    for i, part in enumerate(parts):
+        if part == "(":
+            opened.append(i)
+        elif part == ")":
+            if opened:
+                opened.pop()
+            else:
+                unmatched.add(i)
+    unmatched.update(opened)
+    return [part for i, part in enumerate(parts) if i not in unmatched]
+
+
+def _clean_operators(parts):
+    """
+    FTS5 の構文にならない演算子・括弧を除く
+
+    - 先頭・末尾・「(」の直後・「)」の直前・演算子の直後の演算子は除く
+    - 空の括弧「()」は除く
+    - 語・括弧が並ぶ場合は AND を補う（FTS5 は括弧の前後を省略した AND として扱わない）
+    """
+    cleaned = []
+    for part in parts:
+        if part in _OPERATORS:
+            if cleaned and cleaned[-1] not in _OPERATORS and cleaned[-1] != "(":
+                cleaned.append(part)
+            continue
+        if part == ")":
+            while cleaned and cleaned[-1] in _OPERATORS:
+                cleaned.pop()
+            if cleaned and cleaned[-1] == "(":
+                cleaned.pop()
+                continue
+        elif cleaned and cleaned[-1] not in _OPERATORS and cleaned[-1] != "(":
+            # 直前が語・「)」で、今回が語・「(」
+            cleaned.append("AND")
+        cleaned.append(part)
+    while cleaned and cleaned[-1] in _OPERATORS:
+        cleaned.pop()
+    return cleaned
+
+
+def to_fts_query(query):
+    """
+    検索式を FTS5 のクエリに変換
+
+    - 語は前処理したトークン列のフレーズにする
+    - AND / OR / NOT と括弧はそのまま使う（語を並べた場合は AND）
+    - 構文にならない演算子（先頭・末尾・連続）と対応しない括弧は除く（「Kahuna AND」は「Kahuna」）
+    """
+    parts = []
+    for token in _QUERY_TOKEN.findall(query):
+        if token in _OPERATORS or token in ("(", ")"):
+            parts.append(token)
+            continue
+        tokens = bigram_tokens(token.strip('"'))
+        if len(tokens) == 1 and len(tokens[0]) == 1 and not tokens[0].isascii():
+            # 1文字の日本語はバイグラムの前方一致で探す
+            parts.append(f'"{tokens[0]}" *')
+        elif tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+    return " ".join(_clean_operators(_balance_parens(parts)))
+
+
+def _query_terms(query):
+    """スニペット用に、検索式から語を取り出す（NOT の直後の語は除く）"""
+    terms = []
+    negate = False
+    for token in _QUERY_TOKEN.findall(query):
+        if token in _OPERATORS or token in ("(", ")"):
+            negate = token == "NOT"
+            continue
+        if not negate:
+            terms.append(normalize_surface(token.strip('"')).lower())
+        negate = False
+    return [term for term in terms if term]
+
+
+def make_snippet(body, terms, radius=SNIPPET_RADIUS):
+    """本文から最初に一致した語の前後を切り出す"""
+    text = normalize_surface(body)
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms if lowered.find(term) >= 0]
+    if not positions:
+        return text[:radius * 2] + ("…" if len(text) > radius * 2 else "")
+    start = max(0, min(positions) - radius)
+    end = min(len(text), min(positions) + radius)
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+def split_report_sections(text):
+    """
+    Markdownを見出し単位に分割
+
+    Returns:
+        list: [(見出し, 本文), ...]
+    """
+    sections = []
+    heading = ""
+    lines = []
+    for line in text.splitlines():
+        if line.startswith("#"):
+            if "".join(lines).strip():
+                sections.append((heading, "\n".join(lines).strip()))
+            heading = line.lstrip("#").strip()
+            lines = []
+        else:
+            lines.append(line)
+    if "".join(lines).strip() or heading:
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
+
+
+def article_body(article):
+    """記事の検索対象テキスト"""
+    key_points = article.get("key_points") or []
+    if isinstance(key_points, str):
+        key_points = [key_points]
+    return "\n".join([
+        article.get("summary_japanese") or "",
+        *[str(point) for point in key_points],
+        " ".join(str(tag) for tag in article.get("tags") or []),
+        " ".join(str(company) for company in article.get("related_companies") or []),
+    ]).strip()
+
+
+class ReportSearch:
+    """レポート・記事の全文索引"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def close(self):
+        self.conn.close()
+
+    def _create_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS entries_fts; DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS documents;"
+            )
+        try:
+            self.conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    kind TEXT NOT NULL,
+                    report_date TEXT,
+                    mtime REAL NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    doc_id INTEGER NOT NULL REFERENCES documents(id),
+                    kind TEXT NOT NULL,
+                    report_date TEXT,
+                    published_date TEXT,
+                    source TEXT,
+                    title TEXT,
+                    url TEXT,
+                    body TEXT
+                );
+                CREATE INDEX IF NOT EXISTS entries_doc ON entries(doc_id);
+                CREATE INDEX IF NOT EXISTS entries_date ON entries(report_date);
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                    title, body, tokenize = 'unicode61 remove_diacritics 0'
+                );
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"SQLite の FTS5 が利用できません: {e}") from e
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+    def _remove_document(self, doc_id):
+        self.conn.execute("DELETE FROM entries_fts WHERE rowid IN (SELECT id FROM entries WHERE doc_id = ?)", (doc_id,))
+        self.conn.execute("DELETE FROM entries WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def _add_entry(self, doc_id, kind, report_date, title, body, source="", url="", published_date=""):
+        cursor = self.conn.execute(
+            "INSERT INTO entries (doc_id, kind, report_date, published_date, source, title, url, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (doc_id, kind, report_date, published_date, source, title, url, body),
+        )
+        self.conn.execute(
+            "INSERT INTO entries_fts (rowid, title, body) VALUES (?, ?, ?)",
+            (cursor.lastrowid, to_fts_text(title), to_fts_text(body)),
+        )
+
+    def index_file(self, path, force=False):
+        """
+        1ファイルを索引（更新されていなければスキップ）
+
+        Returns:
+            bool: 索引し直した場合 True
+        """
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        row = self.conn.execute("SELECT id, mtime, size FROM documents WHERE path = ?", (key,)).fetchone()
+        if row and not force and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+            return False
+
+        if path.suffix == ".md":
+            kind, report_date = "report", report_date_from_path(path)
+            entries = [
+                (heading, body, {})
+                for heading, body in split_report_sections(path.read_text(encoding="utf-8"))
+            ]
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                articles = data
+                # 検索データ（research_data.json）は収集日をレポート日とする
+                report_date = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
+            else:
+                articles = data.get("articles", [])
+                report_date = data.get("metadata", {}).get("report_date")
+            kind = "article"
+            entries = [
+                (article.get("title") or "", article_body(article), {
+                    "source": article.get("source") or "",
+                    "url": article.get("url") or "",
+                    "published_date": article.get("published_date") or "",
+                })
+                for article in articles
+                if isinstance(article, dict)
+            ]
+
+        with self.conn:
+            if row:
+                self._remove_document(row["id"])
+            doc_id = self.conn.execute(
+                "INSERT INTO documents (path, kind, report_date, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, report_date, stat.st_mtime, stat.st_size),
+            ).lastrowid
+            for title, body, extra in entries:
+                self._add_entry(doc_id, kind, report_date, title, body, **extra)
+        return True
+
+    def sync(self, paths=None):
+        """
+        索引を最新化（新規・更新ファイルを索引し、削除されたファイルを除く）
+
+        Returns:
+            dict: {"indexed": 件数, "removed": 件数, "total": 件数}
+        """
+        paths = list(paths) if paths is not None else default_source_paths()
+        indexed = sum(1 for path in paths if self.index_file(path))
+
+        current = {str(Path(path).resolve()) for path in paths}
+        removed = 0
+        with self.conn:
+            for row in self.conn.execute("SELECT id, path FROM documents").fetchall():
+                if row["path"] not in current:
+                    self._remove_document(row["id"])
+                    removed += 1
+        total = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return {"indexed": indexed, "removed": removed, "total": total}
+
+    # ------------------------------------------------------------------
+    # 検索
+    # ------------------------------------------------------------------
+    def search(self, query, date_from=None, date_to=None, source=None, kind=None, limit=10, order="rank"):
+        """
+        全文検索
+
+        Args:
+            query (str): 検索式（AND/OR/NOT、"..." でフレーズ、語を並べた場合は AND）
+            date_from (str): レポート日の下限（YYYY-MM-DD、含む）
+            date_to (str): レポート日の上限（YYYY-MM-DD、含む）
+            source (str): 媒体名（部分一致）
+            kind (str): "report" | "article"
+            limit (int): 件数
+            order (str): "rank"（関連度順） | "date"（レポート日の古い順）
+
+        Returns:
+            list: [{"kind", "report_date", "published_date", "source", "title", "url", "snippet"}, ...]
+        """
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+
+        conditions = ["entries_fts MATCH ?"]
+        params = [fts_query]
+        if date_from:
+            conditions.append("e.report_date >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("e.report_date <= ?")
+            params.append(date_to)
+        if source:
+            conditions.append("e.source LIKE ?")
+            params.append(f"%{source}%")
+        if kind:
+            conditions.append("e.kind = ?")
+            params.append(kind)
+        order_by = "e.report_date ASC, bm25(entries_fts)" if order == "date" else "bm25(entries_fts)"
+
+        try:
+            rows = self.conn.execute(
+                "SELECT e.kind, e.report_date, e.published_date, e.source, e.title, e.url, e.body, d.path "
+                "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid JOIN documents d ON d.id = e.doc_id "
+                f"WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"❌ 検索式「{query}」で検索できませんでした: {e}")
+            return []
+
+        terms = _query_terms(query)
+        return [
+            {
+                "kind": row["kind"],
+                "report_date": row["report_date"],
+                "published_date": row["published_date"],
+                "source": row["source"],
+                "title": row["title"],
+                "url": row["url"],
+                "path": row["path"],
+                "snippet": make_snippet(row["body"] or row["title"], terms),
+            }
+            for row in rows
+        ]
+
+    def first_mention(self, query, kind=None):
+        """
+        最初に言及したレポート・記事（レポート日の最も古いもの）
+
+        Returns:
+            dict: 検索結果1件（見つからない場合は None）
+        """
+        results = self.search(query, kind=kind, limit=1, order="date")
+        return results[0] if results else None
+
+
+def default_source_paths():
+    """索引対象のファイル（週次レポート・週次データ・検索データ）"""
+    config = get_config()
+    reports_dir = Path(config.get("data.reports_dir", "reports"))
+    weekly_data_dir = Path(config.get("data.weekly_data_dir", "reports/weekly_data"))
+    research_data_path = Path(config.get("data.research_data_path", "reports/research_data.json"))
+
+    paths = sorted(reports_dir.glob(REPORT_GLOB)) if reports_dir.exists() else []
+    paths += sorted(weekly_data_dir.glob("*.json")) if weekly_data_dir.exists() else []
+    if research_data_path.exists():
+        paths.append(research_data_path)
+    return paths
+
+
+def open_report_search(db_path=None):
+    """設定に従って索引を開く"""
+    return ReportSearch(db_path or get_config().get("report_search.db_path", "reports/search_index.sqlite"))
+
+
+def _print_result(rank, result):
+    label = "📄 レポート" if result["kind"] == "report" else "📰 記事"
+    source = f"｜{result['source']}" if result["source"] else ""
+    print(f"  {rank}. {label}｜{result['report_date'] or '日付不明'}{source}｜{result['title']}")
+    print(f"     {result['snippet']}")
+    if result["url"]:
+        print(f"     {result['url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レポート・記事の全文検索")
+    parser.add_argument("--db", default=None, help="索引ファイル（既定: report_search.db_path）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("sync", help="索引を最新化")
+
+    search = subparsers.add_parser("search", help="全文検索")
+    search.add_argument("query", help='検索式（例: "Kahuna AND 製造業"、"\\"技能伝承\\" NOT AI"）')
+    search.add_argument("--from", dest="date_from", help="レポート日の下限（YYYY-MM-DD）")
+    search.add_argument("--to", dest="date_to", help="レポート日の上限（YYYY-MM-DD）")
+    search.add_argument("--source", help="媒体名（部分一致）")
+    search.add_argument("--kind", choices=["report", "article"])
+    search.add_argument("-k", type=int, default=10, help="件数")
+
+    first = subparsers.add_parser("first", help="最初に言及したレポート・記事")
+    first.add_argument("query")
+    first.add_argument("--kind", choices=["report", "article"])
+
+    args = parser.parse_args()
+
+    try:
+        index = open_report_search(args.db)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        stats = index.sync()
+        if args.command == "sync":
+            print(f"✓ 索引を更新しました: {stats['indexed']}件を索引 / {stats['removed']}件を削除（合計 {stats['total']}ファイル）")
+            print(f"💾 保存先: {index.db_path}")
+            return
+
+        if args.command == "search":
+            results = index.search(args.query, args.date_from, args.date_to, args.source, args.kind, args.k)
+            print(f"🔎 「{args.query}」の検索結果: {len(results)}件")
+            for rank, result in enumerate(results, start=1):
+                _print_result(rank, result)
+            return
+
+        result = index.first_mention(args.query, kind=args.kind)
+        if result is None:
+            print(f"ℹ️ 「{args.query}」への言及は見つかりませんでした。")
+            return
+        print(f"🕰️ 「{args.query}」の初出: {result['report_date'] or '日付不明'}")
+        _print_result(1, result)
+    except sqlite3.OperationalError as e:
+        print(f"❌ 索引の読み書きに失敗しました: {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
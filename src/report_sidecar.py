@@ -0,0 +1,189 @@
+"""
+週次レポートの構造化データ（サイドカー）
+research_analyzer.py がMarkdownレポートと同じ名前の .json を書き出し、
+email_report.py はこれを使ってメール本文を組み立てる（LLMは冒頭リードのみに使う）。
+
+サイドカーの形式:
+    {
+      "version": 1,
+      "report_date": "2025-11-30",
+      "report_file": "週次レポート_2025_20251130.md",
+      "article_count": 5,
+      "executive_summary": "...",
+      "topics": [{"number": 1, "title": "...", "content": "...", "implication": "...", "source_urls": [...]}],
+      "trends": [{"tag": "AI", "count": 3}],
+      "companies": [{"name": "Deloitte", "articles": [{"title", "url", "source", "summary", "relevance"}]}],
+      "sources": [{"title", "url", "source", "published_date", "region", "confidence_score", "manufacturing_relevance"}]
+    }
+"""
+import re
+import json
+from collections import Counter
+from pathlib import Path
+
+from article_model import Article
+from entity_normalizer import get_normalizer
+
+SIDECAR_VERSION = 1
+
+_TOPIC_HEADING = re.compile(r"^###\s*トピック\s*(\d+)\s*[：:]\s*(.+?)\s*$")
+_SECTION_HEADING = re.compile(r"^#{1,3}\s")
+_URL = re.compile(r"https?://[^\s<>()（）｜|\]]+")
+_LABEL_LINE = re.compile(r"^[-*\s]*\*\*(内容|経営的示唆)\*\*")
+
+
+def sidecar_path_for(report_path):
+    """レポートに対応するサイドカーのパス（拡張子を .json にしたもの）"""
+    return Path(report_path).with_suffix(".json")
+
+
+def _clean_lines(lines):
+    return " ".join(line.strip() for line in lines if line.strip()).strip()
+
+
+def parse_executive_summary(markdown):
+    """「エグゼクティブサマリー」見出しの本文を取り出す"""
+    lines = markdown.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith("## ") and "エグゼクティブサマリー" in line:
+            body = []
+            for following in lines[i + 1:]:
+                if _SECTION_HEADING.match(following) or following.strip() == "---":
+                    if body:
+                        break
+                    continue
+                body.append(following)
+            return _clean_lines(body)
+    return ""
+
+
+def parse_topics(markdown):
+    """
+    「### トピックN：タイトル」形式の注目トピックを取り出す
+
+    Returns:
+        list: [{"number", "title", "content", "implication", "source_urls"}, ...]
+    """
+    topics = []
+    current = None
+    field = None
+    for line in markdown.splitlines():
+        heading = _TOPIC_HEADING.match(line)
+        if heading:
+            current = {
+                "number": int(heading.group(1)),
+                "title": heading.group(2).strip("［］[] "),
+                "content": [],
+                "implication": [],
+                "source_urls": [],
+            }
+            topics.append(current)
+            field = None
+            continue
+        if current is None:
+            continue
+        if _SECTION_HEADING.match(line):
+            current = None
+            continue
+
+        label = _LABEL_LINE.match(line)
+        if label:
+            field = "content" if label.group(1) == "内容" else "implication"
+            # 「- **内容**：本文」のように同じ行に本文がある場合
+            rest = re.sub(r"^[-*\s]*\*\*(内容|経営的示唆)\*\*[（(][^）)]*[）)]|^[-*\s]*\*\*(内容|経営的示唆)\*\*", "", line)
+            rest = rest.lstrip("：: ")
+            if rest:
+                current[field].append(rest)
+            continue
+        if "**出典**" in line:
+            field = None
+            current["source_urls"].extend(url for url in _URL.findall(line) if url not in current["source_urls"])
+            continue
+        if field:
+            current[field].append(line)
+
+    for topic in topics:
+        topic["content"] = _clean_lines(topic["content"])
+        topic["implication"] = _clean_lines(topic["implication"])
+    return topics
+
+
+def build_sidecar(markdown, articles, report_date, report_file, top_tags=5):
+    """
+    レポートと記事データからサイドカーを作成
+
+    Args:
+        markdown (str): レポート本文（LLMの出力）
+        articles (list): Phase 1 の記事データ（Article または辞書）
+        report_date (str): レポート日（YYYY-MM-DD）
+        report_file (str): レポートのファイル名
+        top_tags (int): 注目タグの件数
+    """
+    normalizer = get_normalizer()
+    tag_counts = Counter()
+    companies = {}
+    sources = []
+    for article in articles:
+        if isinstance(article, dict):
+            article = Article.from_dict(article)
+        elif not isinstance(article, Article):
+            continue
+        tag_counts.update(normalizer.canonicalize_all(article.tags, "tags"))
+        link = {
+            "title": article.title,
+            "url": article.url,
+            "source": article.source,
+            "summary": article.summary_japanese,
+            "relevance": article.relevance_reason,
+        }
+        for company in normalizer.canonicalize_all(article.related_companies, "companies"):
+            companies.setdefault(company, []).append(link)
+        sources.append({
+            "title": article.title,
+            "url": article.url,
+            "source": article.source,
+            "published_date": article.published_date,
+            "region": article.region,
+            "confidence_score": article.confidence_score,
+            "manufacturing_relevance": article.manufacturing_relevance,
+        })
+
+    # 信頼性スコアの高い順、同スコアは公開日の新しい順（レポートの出典一覧と同じ並び）
+    sources.sort(key=lambda s: str(s["published_date"] or ""), reverse=True)
+    sources.sort(key=lambda s: -(s["confidence_score"] or 0.0))
+
+    return {
+        "version": SIDECAR_VERSION,
+        "report_date": report_date,
+        "report_file": report_file,
+        "article_count": len(articles),
+        "executive_summary": parse_executive_summary(markdown),
+        "topics": parse_topics(markdown),
+        "trends": [{"tag": tag, "count": count} for tag, count in tag_counts.most_common(top_tags)],
+        "companies": [
+            {"name": name, "articles": links}
+            for name, links in sorted(companies.items(), key=lambda x: (-len(x[1]), x[0]))
+        ],
+        "sources": sources,
+    }
+
+
+def write_sidecar(path, sidecar):
+    """サイドカーを書き出す"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False, indent=2)
+
+
+def load_sidecar(path):
+    """
+    サイドカーを読み込む
+
+    Returns:
+        dict: サイドカー（ファイルがない・形式が異なる場合は None）
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return sidecar if isinstance(sidecar, dict) and sidecar.get("version") == SIDECAR_VERSION else None
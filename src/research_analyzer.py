@@ -8,56 +8,48 @@ import sys
 import json
 import traceback
 from datetime import datetime
+from string import Template
 
 from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # 設定ファイル読み込み
+from article_model import articles_to_dicts, load_articles
 from config_loader import get_config
+from instrumentation import get_recorder
+from model_router import get_model_router
+from report_manifest import record_report
+from report_sidecar import build_sidecar, sidecar_path_for, write_sidecar
+from report_search import open_report_search
+from token_estimate import estimate_tokens
+from trend_digest import format_digest, load_digest
+
+
+def build_trend_section(trend_context):
+    """分析プロンプトに添える過去のトレンドの節（ダイジェストがない場合は空）"""
+    return f"""
+# 📈 過去のトレンド（参考・集計済み）
+---
+{trend_context}
+---
+- 上記は過去の週次データの集計である。「増加」「新たに注目」などの時系列の記述は、この集計で裏付けられる場合に限る。
+- 集計にない動向を「増加している」と推測で書かない。
+""" if trend_context else ""
 
-def generate_analysis_report(target_year: int = None):
-    """収集したデータから週次レポートを生成する"""
-    print("\n" + "=" * 60)
-    print("🧠 Phase 2: 分析レポート構造化を開始")
-    print("=" * 60)
-
-    # --- 0. 設定ファイル読み込み ---
-    config = get_config()
-
-    # --- 1. 環境変数の確認 ---
-    google_api_key = os.environ.get("GOOGLE_API_KEY")
-    if not google_api_key:
-        print("❌ エラー: GOOGLE_API_KEYが設定されていません")
-        sys.exit(1)
-
-    # --- 2. JSONデータの読み込み ---
-    research_data_path = config.get("data.research_data_path", "reports/research_data.json")
-    if not os.path.exists(research_data_path):
-        print(f"❌ エラー: 検索データファイルが見つかりません: {research_data_path}")
-        print("Phase 1 (research_searcher.py)が正常に実行され、ファイルが作成されているか確認してください。")
-        sys.exit(1)
-
-    with open(research_data_path, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
-
-    if not raw_data:
-        print("⚠️ 警告: JSONファイルにはデータが含まれていませんでした。レポートを生成できません。")
-        sys.exit(0)
-
-    # JSONデータをプロンプトに組み込むために文字列化
-    data_string = json.dumps(raw_data, indent=2, ensure_ascii=False)
 
-    print(f"✓ {len(raw_data)}件のデータが読み込まれました。")
+def build_analysis_prompt(data_string, trend_section=""):
+    """
+    分析レポート生成のプロンプト
 
-    # --- 3. LLMの準備 ---
-    model = ChatGoogleGenerativeAI(
-        model=config.get("llm.analyzer.model", "gemini-2.5-flash"),
-        temperature=config.get("llm.analyzer.temperature", 0.1),
-    )
-    print("✓ LLMを設定しました")
+    prompts.analysis_template にテンプレートファイルを指定した場合は、
+    $data / $trend_section を埋め込んだテンプレートを使う（プロファイルごとに差し替え可能）。
+    """
+    analysis_template_path = get_config().get("prompts.analysis_template")
+    if analysis_template_path:
+        with open(analysis_template_path, "r", encoding="utf-8") as f:
+            return Template(f.read()).safe_substitute(data=data_string, trend_section=trend_section)
 
-    # --- 4. レポート生成プロンプトの定義（経営層向け戦略レポート） ---
-    analysis_prompt = f"""
+    return f"""
 あなたは製造業の経営層向けにレポートを作成する**人材戦略コンサルタント**である。
 提供されたJSON形式の調査データをもとに、経営層が**5分以内で全体像を理解できる戦略レポート**をMarkdown形式で作成せよ。
 
@@ -67,7 +59,7 @@ def generate_analysis_report(target_year: int = None):
 ---
 {data_string}
 ---
-
+{trend_section}
 # 🎯 出力方針
 - 難解な専門用語や英語表現を避け、経営層が直感的に理解できる平易な日本語で書く。
 - 「何が起きているか」「何を意味するか」に集中し、「どうすべきか」や行動提案は不要である。
@@ -175,13 +167,86 @@ DX・人材戦略・スキル管理の観点から、今回のトレンドが製
 上記の構成に従って、Markdown形式で戦略レポートを作成せよ。
 """
 
+
+def generate_analysis_report(target_year: int = None):
+    """収集したデータから週次レポートを生成する"""
+    print("\n" + "=" * 60)
+    print("🧠 Phase 2: 分析レポート構造化を開始")
+    print("=" * 60)
+
+    # --- 0. 設定ファイル読み込み ---
+    config = get_config()
+    recorder = get_recorder()
+    recorder.set_phase("analyzer")
+
+    # --- 1. 環境変数の確認 ---
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    if not google_api_key:
+        print("❌ エラー: GOOGLE_API_KEYが設定されていません")
+        sys.exit(1)
+
+    # --- 2. JSONデータの読み込み ---
+    research_data_path = config.get("data.research_data_path", "reports/research_data.json")
+    if not os.path.exists(research_data_path):
+        print(f"❌ エラー: 検索データファイルが見つかりません: {research_data_path}")
+        print("Phase 1 (research_searcher.py)が正常に実行され、ファイルが作成されているか確認してください。")
+        sys.exit(1)
+
+    # 記事は読み込み時に Article へ変換（型の揺れはここで解消する）
+    articles = load_articles(research_data_path)
+
+    if not articles:
+        print("⚠️ 警告: JSONファイルにはデータが含まれていませんでした。レポートを生成できません。")
+        sys.exit(0)
+
+    # JSONデータをプロンプトに組み込むために文字列化
+    data_string = json.dumps(articles_to_dicts(articles), indent=2, ensure_ascii=False)
+
+    print(f"✓ {len(articles)}件のデータが読み込まれました。")
+
+    # 過去のトレンド（analyze_trends.py が生成したダイジェスト）
+    trend_context = ""
+    if config.get("trends.digest.enabled", True):
+        # 今回のデータの最新の公開日（不明な場合は今日）より古いダイジェストは使わない
+        published = [article.published for article in articles if article.published]
+        as_of = max(published) if published else datetime.now().date()
+        trend_context = format_digest(load_digest(as_of=as_of), max_chars=config.get("trends.digest.max_chars", 800))
+        if trend_context:
+            print(f"✓ トレンドダイジェストを読み込みました（{len(trend_context)}文字）")
+        else:
+            print("ℹ️ 使用できるトレンドダイジェストがないため、今週のデータのみで分析します。")
+
+    trend_section = build_trend_section(trend_context)
+
+    # --- 3. LLMの準備 ---
+    # クォータ超過時は候補の次のモデルに切り替える（model_router.py）
+    router = get_model_router(
+        "analysis",
+        lambda model_name: ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=config.get("llm.analyzer.temperature", 0.1),
+        ),
+    )
+    print(f"✓ LLMを設定しました（モデル候補: {', '.join(router.candidates)}）")
+
+    # --- 4. レポート生成プロンプトの定義（経営層向け戦略レポート） ---
+    analysis_prompt = build_analysis_prompt(data_string, trend_section)
+    analysis_template_path = config.get("prompts.analysis_template")
+    if analysis_template_path:
+        print(f"✓ 分析プロンプトのテンプレートを使用します: {analysis_template_path}")
+
     # --- 5. LLMの実行 ---
     today = datetime.now()
     year = target_year or today.year
     final_report = None
     
     try:
-        response = model.invoke([HumanMessage(content=analysis_prompt)])
+        response = router.invoke(
+            "llm",
+            lambda model: model.invoke([HumanMessage(content=analysis_prompt)]),
+            attempt=1,
+            expected_tokens=estimate_tokens(analysis_prompt),
+        )
         final_report = response.content or "（内容なし）"
 
     except Exception as e:
@@ -209,19 +274,44 @@ DX・人材戦略・スキル管理の観点から、今回のトレンドが製
             header = (
                 f"# {report_title}\n\n"
                 f"**作成者**: {author}  \n"
-                f"**調査対象データ件数**: {len(raw_data)}件  \n"
+                f"**調査対象データ件数**: {len(articles)}件  \n"
                 f"**生成日時**: {today.strftime('%Y年%m月%d日')}  \n\n"
                 f"---\n\n"
             )
             f.write(header + final_report)
 
+        # メール送信用の構造化データ（トピック・企業→記事URL・全出典）
+        report_date = today.strftime("%Y-%m-%d")
+        sidecar_path = sidecar_path_for(file_name)
+        write_sidecar(
+            sidecar_path,
+            build_sidecar(final_report, articles, report_date, os.path.basename(file_name)),
+        )
+
+        # マニフェストに記録（メール送信時の最新レポートの特定に使う）
+        record_report(file_name, report_date, len(articles), sidecar_path=sidecar_path)
+
         print("\n" + "=" * 60)
         print("✓ レポート生成完了（経営層向け戦略レポート）")
         print("=" * 60)
         print(f"📄 保存先: {file_name}")
         print(f"📊 文字数目安: 2,000〜2,500文字")
         print("=" * 60 + "\n")
-        
+
+        # 全文検索の索引を更新（失敗してもレポート生成には影響させない）
+        if config.get("report_search.enabled", True):
+            try:
+                index = open_report_search()
+                try:
+                    stats = index.sync()
+                finally:
+                    index.close()
+                print(f"🗂️ 全文検索の索引を更新しました（{stats['indexed']}ファイル）")
+            except Exception as e:
+                print(f"⚠️ 全文検索の索引の更新に失敗しました: {e}")
+        recorder.print_summary()
+        return file_name
+
     except Exception as e:
         print(f"\n❌ Markdownファイルの保存中にエラーが発生しました: {str(e)}")
         traceback.print_exc()
@@ -6,13 +6,11 @@ Phase 1: 事例検索・データ収集スクリプト（トークン最適化
 """
 import os
 import sys
-import time
 import json
 import traceback
 import warnings
 import re
-from datetime import datetime, timedelta, timezone
-from email.utils import parsedate_to_datetime
+from datetime import datetime, timedelta
 
 # Suppress LangGraph deprecation warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="langgraph")
@@ -25,120 +23,242 @@ from langchain_tavily import TavilySearch
 from langgraph.prebuilt import create_react_agent
 
 # 設定ファイル読み込み
-from config_loader import get_config
-
-
-def parse_publication_date(date_str: str):
-    if not date_str:
-        return None
-
-    normalized = date_str.strip()
-    lowered = normalized.lower()
-    if lowered in {"", "n/a", "na", "unknown"}:
-        return None
-
-    if normalized in {"不明", "未設定", "不詳", "―"}:
-        return None
-
-    if '\ufffd' in normalized:
-        return None
-
-    # Handle relative expressions such as "3 days ago" or "last week"
-    relative_match = re.match(r"^(\d{1,2})\s+(day|days|hour|hours|week|weeks)\s+ago$", lowered)
-    if relative_match:
-        value, unit = relative_match.groups()
-        amount = int(value)
-        now = datetime.now()
-        if unit.startswith("day"):
-            return now - timedelta(days=amount)
-        if unit.startswith("hour"):
-            return now - timedelta(hours=amount)
-        if unit.startswith("week"):
-            return now - timedelta(weeks=amount)
-
-    if lowered in {"yesterday", "昨日"}:
-        return datetime.now() - timedelta(days=1)
-    if lowered in {"today", "本日", "きょう", "今日"}:
-        return datetime.now()
-
-    # Handle Japanese date expressions such as "2024年5月20日"
-    jp_date_match = re.match(r"^(\d{4})年(\d{1,2})月(\d{1,2})日$", normalized)
-    if jp_date_match:
-        year, month, day = map(int, jp_date_match.groups())
-        return datetime(year, month, day)
-
-    # Handle compact numeric formats such as 20240520
-    if re.fullmatch(r"\d{8}", normalized):
-        try:
-            return datetime.strptime(normalized, "%Y%m%d")
-        except ValueError:
-            pass
-
-    date_formats = [
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-        "%Y.%m.%d",
-        "%d %B %Y",
-        "%d %b %Y",
-        "%B %d, %Y",
-        "%b %d, %Y",
-        "%B %d %Y",
-        "%b %d %Y",
-        "%m/%d/%Y",
-        "%m-%d-%Y",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%Y-%m",
-        "%Y/%m",
-        "%Y.%m",
-        "%Y",
-    ]
-
-    # Remove ordinal suffixes from English dates (e.g., "May 5th, 2024")
-    normalized_no_suffix = re.sub(r"(\d+)(st|nd|rd|th)", r"\1", normalized, flags=re.IGNORECASE)
-
-    for fmt in date_formats:
-        try:
-            parsed = datetime.strptime(normalized_no_suffix, fmt)
-            if fmt in {"%Y-%m", "%Y/%m", "%Y.%m"}:
-                return parsed.replace(day=1)
-            if fmt == "%Y":
-                return parsed.replace(month=1, day=1)
-            return parsed
-        except ValueError:
+from config_loader import active_profile, get_config
+from instrumentation import get_recorder
+from article_index import index_archive
+from article_schema import ARTICLE_JSON_SCHEMA, parse_article_array, strip_code_fence
+from article_model import articles_from_records, articles_to_dicts, save_weekly_data
+from dedup_index import get_dedup_index, normalize_title, normalize_url
+from search_cache import get_search_cache
+from snippet_ranker import get_snippet_ranker
+from agent_compaction import get_history_compactor
+from content_extractor import get_content_extractor
+from model_router import get_model_router
+from token_estimate import estimate_tokens, expected_agent_steps
+
+# 検索結果に影響するTavilySearchの設定（キャッシュキーに含める）
+CACHE_KEY_FIELDS = ("max_results", "search_depth", "include_raw_content", "start_date", "topic", "time_range")
+
+# プロンプトの既定値（プロファイルの prompts で上書き可能）
+DEFAULT_SEARCH_TOPIC = "製造業向けスキルマネジメント・タレントマネジメント"
+DEFAULT_SEARCH_FOCUS = [
+    "**製造業（manufacturing, industrial, plant, factory）に関連する記事を優先**",
+    "具体的な企業名・プロダクト名（AG5, Kahuna, Skills Base, iMocha, Indeavor等）が含まれる記事",
+    "Industry 4.0、スマートマニュファクチャリング、スキルギャップ分析に関する記事",
+    "実践的なケーススタディや導入事例",
+]
+DEFAULT_SEARCH_PRIORITY_NOTE = "製造業・工場・プラント関連の記事を優先的に選択してください"
+
+# エージェント出力（記事ごとのテキスト）の区切り・項目
+_ARTICLE_SEPARATOR = re.compile(r"(?m)^\s*(?:-{3,}|\**記事\s*\d+\**[:：]?)\s*$")
+_TITLE_LINE = re.compile(r"(?m)^\s*[-*]*\s*\**タイトル\**\s*[:：]\s*(.+)$")
+_URL_LINE = re.compile(r"(?m)^\s*[-*]*\s*\**URL\**\s*[:：]\s*(\S+)")
+
+
+class InstrumentedTavilySearch(TavilySearch):
+    """
+    検索1回ごとの所要時間と件数を実行ログに記録するTavilySearch
+
+    同じ条件の検索結果は共有の検索キャッシュ（search_cache.py）から返す。
+    結果はローカルで並べ替え（snippet_ranker.py）、上位の件数だけをエージェントに渡す。
+    生コンテンツを取得する設定では、ページ本文を抽出・要約したテキスト（content_extractor.py）に置き換える。
+    """
+
+    def _run(self, query, **kwargs):
+        run = super()._run
+        recorder = get_recorder()
+
+        def fetch():
+            return recorder.track("tavily", lambda: run(query, **kwargs), query=query)
+
+        cache = get_search_cache()
+        if cache is None:
+            response = fetch()
+        else:
+            params = {field: getattr(self, field, None) for field in CACHE_KEY_FIELDS}
+            params.update((key, value) for key, value in kwargs.items() if key != "run_manager" and value is not None)
+            response, cached = cache.get_or_fetch(query, fetch, **params)
+            if cached:
+                recorder.record("tavily_cache", query=query, hit=True)
+        if isinstance(response, dict):
+            results = len(response.get("results", []))
+            ranker = get_snippet_ranker()
+            if ranker is not None:
+                response = ranker.rank_response(response)
+            extractor = get_content_extractor()
+            if extractor is not None:
+                response = extractor.compress_response(response)
+            recorder.record("tavily_results", query=query, results=results, kept=len(response.get("results", [])))
+        return response
+
+
+def build_search_prompt(keyword_batch, end_date, days_back, articles_per_batch):
+    """バッチごとの検索プロンプト（調査テーマ・優先順位はプロファイルの prompts で上書き可能）"""
+    config = get_config()
+    search_topic = config.get("prompts.search_topic", DEFAULT_SEARCH_TOPIC)
+    search_priority_note = config.get("prompts.search_priority_note", DEFAULT_SEARCH_PRIORITY_NOTE)
+    keywords_str = "\n   - ".join([f'"{kw}"' for kw in keyword_batch])
+    search_focus = "\n   - ".join(config.get("prompts.search_focus", DEFAULT_SEARCH_FOCUS))
+
+    return f"""
+あなたは優秀なリサーチアナリストです。以下のタスクを**効率的に**実行してください。
+
+# 重要な前提情報
+**今日の日付: {end_date}**
+この日付を基準に、過去{days_back}日間の記事を検索してください。
+
+# タスク
+**過去{days_back}日間**（今日から{days_back}日前まで）の**{search_topic}**関連の欧米記事を**{articles_per_batch}件**収集し、簡潔に情報を抽出してください。
+
+# 検索方法
+1. 以下のキーワードで検索してください：
+   {keywords_str}
+
+2. 検索の優先順位：
+   - {search_focus}
+
+3. 検索結果から**最も関連性の高い{articles_per_batch}記事**を選んでください
+
+4. **web_fetchツールは使用せず**、検索結果のスニペット情報のみを使用してください（トークン節約のため）
+
+# 出力形式
+各記事を以下の**簡潔な形式**で出力してください：
+
+---
+記事 1
+タイトル: [タイトル]
+URL: [URL]
+情報源: [メディア名]
+公開日: [YYYY-MM-DD形式で記載。不明な場合は「不明」]
+地域: [国/地域]
+カテゴリー: [feature/case_study/partnership/etc]
+関連企業: [企業名、なければ「なし」]
+要約: [2～3文の日本語要約]
+重要ポイント: [ポイント1] / [ポイント2] / [ポイント3]
+タグ: [tag1, tag2, tag3]
+製造業関連: [あり/なし]
+関連性理由: [1文、なければ「該当なし」]
+信頼度: [0.0～1.0]
+---
+
+# 重要な制約
+- **最近の記事（過去{days_back}日以内）を優先的に選択してください**
+- 古い記事は除外してください
+- **{search_priority_note}**
+- 検索は**効率的に**実施してください
+- web_fetchは**使用しない**でください
+- 記事数は**{articles_per_batch}件**で十分です
+- 簡潔に情報をまとめてください
+"""
+
+
+def build_formatting_prompt(raw_text):
+    """JSON整形用のプロンプト（raw_text: エージェントが抽出した記事テキスト）"""
+    return f"""
+以下のテキストには記事情報が含まれています。これをJSON配列に整形してください。
+
+入力テキスト:
+{raw_text}
+
+出力: 以下の形式のJSON配列のみを出力（説明文やコードブロック記号なし）
+
+[
+  {{
+    "title": "記事タイトル",
+    "url": "URL",
+    "source": "情報源",
+    "published_date": "YYYY-MM-DD",
+    "region": "地域",
+    "category": "カテゴリー",
+    "related_companies": ["企業名"],
+    "summary_japanese": "要約",
+    "key_points": ["ポイント1", "ポイント2", "ポイント3"],
+    "tags": ["tag1", "tag2"],
+    "manufacturing_relevance": "あり or なし",
+    "relevance_reason": "理由 or 該当なし",
+    "confidence_score": 0.0～1.0の数値
+  }}
+]
+
+重要: JSON配列のみを出力。前後に一切の説明やマークダウンを含めないこと。
+"""
+
+
+def split_article_blocks(raw_text):
+    """
+    エージェントの出力を記事ごとのブロックに分割
+
+    Returns:
+        list: [(タイトル, URL, ブロックのテキスト), ...]（タイトルのないブロックは除く）
+    """
+    blocks = []
+    for block in _ARTICLE_SEPARATOR.split(raw_text or ""):
+        title = _TITLE_LINE.search(block)
+        if not title:
             continue
+        url = _URL_LINE.search(block)
+        blocks.append((title.group(1).strip(), url.group(1).strip() if url else "", block.strip()))
+    return blocks
+
+
+def missing_article_blocks(raw_text, records):
+    """整形結果（records）に含まれていない記事のブロックを返す（同じ記事のブロックは1つにまとめる）"""
+    recovered = set()
+    for record in records:
+        if isinstance(record, dict):
+            recovered.add(normalize_title(record.get("title")))
+            recovered.add(normalize_url(record.get("url")))
+    recovered.discard("")
+
+    missing = []
+    for title, url, block in split_article_blocks(raw_text):
+        keys = {normalize_title(title), normalize_url(url)} - {""}
+        if keys & recovered:
+            continue
+        recovered |= keys
+        missing.append(block)
+    return missing
 
-    # Try ISO 8601 style formats (with or without timezone)
-    iso_candidate = normalized
-    if iso_candidate.endswith("Z"):
-        iso_candidate = iso_candidate[:-1] + "+00:00"
 
-    try:
-        parsed = datetime.fromisoformat(iso_candidate)
-        if parsed.tzinfo is not None:
-            parsed = parsed.astimezone(timezone.utc)
-        return parsed
-    except ValueError:
-        pass
-
-    # Fallback to RFC 2822 and other email style date strings
-    try:
-        parsed = parsedate_to_datetime(normalized_no_suffix)
-        if parsed.tzinfo is not None:
-            parsed = parsed.astimezone(timezone.utc)
-        return parsed
-    except (TypeError, ValueError, OverflowError):
-        pass
+def salvage_missing_articles(records, raw_text, reformat, max_rounds=2):
+    """
+    途中で切れた整形結果を補う（読み取れなかった記事のブロックだけを整形し直す）
 
-    return None
+    Args:
+        records (list): 読み取れた記事
+        raw_text (str): 整形前のテキスト
+        reformat (callable): reformat(テキスト, 回数) → 整形モデルの出力
+        max_rounds (int): 再整形の最大回数
 
+    Returns:
+        list: 補った記事を含む記事のリスト
+    """
+    for round_number in range(1, max_rounds + 1):
+        missing = missing_article_blocks(raw_text, records)
+        if not missing:
+            break
+        print(f"🩹 整形結果が途中で切れていたため、未取得の{len(missing)}件だけを再整形します（{round_number}回目）")
+        try:
+            tail, _ = parse_article_array(reformat("\n\n---\n".join(missing), round_number))
+        except json.JSONDecodeError as e:
+            print(f"⚠️ 再整形の結果を読み取れませんでした: {e}")
+            continue
+        if not tail:
+            break
+        records = records + tail
+        print(f"✅ {len(tail)}件を補いました（合計{len(records)}件）")
+    return records
 
 
-def search_and_extract_data(target_year: int = None):
+def search_and_extract_data(target_year: int = None, days_back: int = None):
     """
     週次調査データをWeb検索し、構造化されたJSONとして保存する。
     Phase 1: エージェントで非構造化テキスト抽出
     Phase 2: 別LLMコールでJSON整形（トークン削減）
+
+    Args:
+        target_year (int): 検索対象年（省略時は今年）
+        days_back (int): 検索期間の日数（省略時は search.days_back）
     """
     print("\n" + "=" * 60)
     print("🚀 Phase 1: 事例検索とデータ抽出を開始")
@@ -146,6 +266,7 @@ def search_and_extract_data(target_year: int = None):
 
     # --- 0. 設定ファイル読み込み ---
     config = get_config()
+    recorder = get_recorder()
 
     # --- 1. 環境変数の確認 ---
     google_api_key = os.environ.get("GOOGLE_API_KEY")
@@ -158,7 +279,7 @@ def search_and_extract_data(target_year: int = None):
 
     # --- 2. 検索対象年の設定と期間の計算 ---
     today = datetime.now()
-    days_back = config.get("search.days_back", 7)
+    days_back = days_back or config.get("search.days_back", 7)
     start_date = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
     end_date = today.strftime("%Y-%m-%d")
     year = target_year or today.year
@@ -167,13 +288,8 @@ def search_and_extract_data(target_year: int = None):
     print(f"🗓️ 検索開始日: {start_date} (過去{days_back}日間)")
     print(f"🔄 段階的フォールバック: 7日 → 14日 → 30日（0件の場合）")
 
-    # --- 3. LLMとツールの準備 ---
-    model = ChatGoogleGenerativeAI(
-        model=config.get("llm.searcher.model", "gemini-2.5-flash"),
-        temperature=config.get("llm.searcher.temperature", 0),
-    )
-
-    search_tool = TavilySearch(
+    # --- 3. ツールの準備 ---
+    search_tool = InstrumentedTavilySearch(
         max_results=config.get("tavily.max_results", 5),
         search_depth=config.get("tavily.search_depth", "advanced"),
         include_raw_content=config.get("tavily.include_raw_content", False),
@@ -182,8 +298,21 @@ def search_and_extract_data(target_year: int = None):
     tools = [search_tool]
 
     # --- 4. エージェントの作成 ---
-    agent_executor = create_react_agent(model, tools)
-    print("✓ ReActエージェントを設定しました")
+    # 検索結果の履歴はモデルに渡す前に圧縮する（agent_compaction.py）
+    compactor = get_history_compactor()
+
+    def build_agent(model_name):
+        model = ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=config.get("llm.searcher.temperature", 0),
+        )
+        if compactor is not None:
+            return create_react_agent(model, tools, pre_model_hook=compactor)
+        return create_react_agent(model, tools)
+
+    # クォータ超過時は候補の次のモデルに切り替える（model_router.py）
+    agent_router = get_model_router("agent", build_agent)
+    print(f"✓ ReActエージェントを設定しました（モデル候補: {', '.join(agent_router.candidates)}）")
 
     # --- 5. バッチ処理設定 ---
     min_articles = config.get("search.min_articles", 10)
@@ -217,63 +346,12 @@ def search_and_extract_data(target_year: int = None):
         print(f"📦 バッチ {batch_idx + 1}/{num_batches} を処理中...")
         print(f"🔑 キーワード: {', '.join(keyword_batch[:3])}{'...' if len(keyword_batch) > 3 else ''}")
         print(f"{'='*60}")
+        recorder.set_phase(f"phase1.batch_{batch_idx + 1:02d}")
 
-        keywords_str = "\n   - ".join([f'"{kw}"' for kw in keyword_batch])
-
-        # バッチ用プロンプト生成
-        search_prompt = f"""
-あなたは優秀なリサーチアナリストです。以下のタスクを**効率的に**実行してください。
-
-# 重要な前提情報
-**今日の日付: {end_date}**
-この日付を基準に、過去{days_back}日間の記事を検索してください。
-
-# タスク
-**過去{days_back}日間**（今日から{days_back}日前まで）の**製造業向けスキルマネジメント・タレントマネジメント**関連の欧米記事を**{articles_per_batch}件**収集し、簡潔に情報を抽出してください。
-
-# 検索方法
-1. 以下のキーワードで検索してください：
-   {keywords_str}
-
-2. 検索の優先順位：
-   - **製造業（manufacturing, industrial, plant, factory）に関連する記事を優先**
-   - 具体的な企業名・プロダクト名（AG5, Kahuna, Skills Base, iMocha, Indeavor等）が含まれる記事
-   - Industry 4.0、スマートマニュファクチャリング、スキルギャップ分析に関する記事
-   - 実践的なケーススタディや導入事例
-
-3. 検索結果から**最も関連性の高い{articles_per_batch}記事**を選んでください
-
-4. **web_fetchツールは使用せず**、検索結果のスニペット情報のみを使用してください（トークン節約のため）
-
-# 出力形式
-各記事を以下の**簡潔な形式**で出力してください：
-
----
-記事 1
-タイトル: [タイトル]
-URL: [URL]
-情報源: [メディア名]
-公開日: [YYYY-MM-DD形式で記載。不明な場合は「不明」]
-地域: [国/地域]
-カテゴリー: [feature/case_study/partnership/etc]
-関連企業: [企業名、なければ「なし」]
-要約: [2～3文の日本語要約]
-重要ポイント: [ポイント1] / [ポイント2] / [ポイント3]
-タグ: [tag1, tag2, tag3]
-製造業関連: [あり/なし]
-関連性理由: [1文、なければ「該当なし」]
-信頼度: [0.0～1.0]
----
-
-# 重要な制約
-- **最近の記事（過去{days_back}日以内）を優先的に選択してください**
-- 古い記事は除外してください
-- **製造業・工場・プラント関連の記事を優先的に選択してください**
-- 検索は**効率的に**実施してください
-- web_fetchは**使用しない**でください
-- 記事数は**{articles_per_batch}件**で十分です
-- 簡潔に情報をまとめてください
-"""
+        search_prompt = build_search_prompt(keyword_batch, end_date, days_back, articles_per_batch)
+        # 使用量台帳の予約に使う見込み（手順ごとにプロンプトを送り直す）
+        expected_steps = expected_agent_steps(len(keyword_batch), recursion_limit)
+        expected_tokens = expected_steps * estimate_tokens(search_prompt)
 
         raw_text_output = None
 
@@ -283,12 +361,19 @@ URL: [URL]
                     # APIクォータリセット待ち（1分間隔を考慮）
                     delay = max(60, INITIAL_DELAY * (2 ** (attempt - 1)))
                     print(f"\n⚠️ APIクォータ超過のため、{delay:.0f}秒待機します... (試行 {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(delay)
+                    recorder.retry(attempt + 1)
+                    recorder.sleep(delay, reason="retry")
 
                 print(f"📡 エージェント実行中... (試行 {attempt + 1}/{MAX_RETRIES})")
-                response = agent_executor.invoke(
-                    {"messages": [HumanMessage(content=search_prompt)]},
-                    config={"recursion_limit": recursion_limit}
+                response = agent_router.invoke(
+                    "agent",
+                    lambda agent_executor: agent_executor.invoke(
+                        {"messages": [HumanMessage(content=search_prompt)]},
+                        config={"recursion_limit": recursion_limit}
+                    ),
+                    attempt=attempt + 1,
+                    expected_requests=expected_steps,
+                    expected_tokens=expected_tokens,
                 )
 
                 messages = response.get("messages", [])
@@ -368,7 +453,7 @@ URL: [URL]
         # 次のバッチまで待機（最後のバッチでない場合）
         if batch_idx < num_batches - 1:
             print(f"\n⏳ 次のバッチまで{batch_delay}秒待機します（APIクォータリセット待ち）...")
-            time.sleep(batch_delay)
+            recorder.sleep(batch_delay, reason="batch_delay")
 
     # すべてのバッチの結果を統合
     if not all_raw_texts:
@@ -382,78 +467,80 @@ URL: [URL]
     print("\n" + "=" * 60)
     print("🔄 Phase 2: JSONフォーマットへの変換を開始")
     print("=" * 60)
+    recorder.set_phase("phase1.formatting")
     
     # クォータリセット待ち
     print("⏳ APIクォータリセットのため60秒待機します...")
-    time.sleep(60)
+    recorder.sleep(60, reason="quota_reset")
     
-    # JSON整形用の軽量LLMインスタンス（エージェント履歴なし）
-    formatting_model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
+    # JSON整形用の軽量LLMインスタンス（エージェント履歴なし、構造的なタスクのため速いモデルを優先）
+    # 構造化出力モードでは記事スキーマ（article_schema.py）に沿ったJSON配列のみが返る
+    structured_output = {}
+    if config.get("formatting.structured_output", True):
+        structured_output = {"response_mime_type": "application/json", "response_schema": ARTICLE_JSON_SCHEMA}
+    formatting_router = get_model_router(
+        "formatting",
+        lambda model_name: ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=config.get("llm.formatter.temperature", 0),
+            **structured_output,
+        ),
     )
     
-    json_formatting_prompt = f"""
-以下のテキストには記事情報が含まれています。これをJSON配列に整形してください。
-
-入力テキスト:
-{raw_text_output}
-
-出力: 以下の形式のJSON配列のみを出力（説明文やコードブロック記号なし）
-
-[
-  {{
-    "title": "記事タイトル",
-    "url": "URL",
-    "source": "情報源",
-    "published_date": "YYYY-MM-DD",
-    "region": "地域",
-    "category": "カテゴリー",
-    "related_companies": ["企業名"],
-    "summary_japanese": "要約",
-    "key_points": ["ポイント1", "ポイント2", "ポイント3"],
-    "tags": ["tag1", "tag2"],
-    "manufacturing_relevance": "あり or なし",
-    "relevance_reason": "理由 or 該当なし",
-    "confidence_score": 0.0～1.0の数値
-  }}
-]
-
-重要: JSON配列のみを出力。前後に一切の説明やマークダウンを含めないこと。
-"""
-
+    quota_exceeded = False
     for attempt in range(MAX_RETRIES):
         try:
             if attempt > 0:
-                delay = 60
-                print(f"\n⚠️ 待機中... (試行 {attempt + 1}/{MAX_RETRIES})")
-                time.sleep(delay)
+                recorder.retry(attempt + 1)
+                # 待機はAPIクォータ超過の場合のみ（出力の不備はすぐに再試行する）
+                if quota_exceeded:
+                    delay = 60
+                    print(f"\n⚠️ 待機中... (試行 {attempt + 1}/{MAX_RETRIES})")
+                    recorder.sleep(delay, reason="retry")
+                quota_exceeded = False
 
             print(f"🔄 JSON変換中... (試行 {attempt + 1}/{MAX_RETRIES})")
-            formatting_response = formatting_model.invoke([HumanMessage(content=json_formatting_prompt)])
-            json_output = formatting_response.content
-            
-            # マークダウンのコードブロックを削除
-            json_output = json_output.strip()
-            if json_output.startswith("```json"):
-                json_output = json_output[7:]
-            if json_output.startswith("```"):
-                json_output = json_output[3:]
-            if json_output.endswith("```"):
-                json_output = json_output[:-3]
-            json_output = json_output.strip()
-            
-            # JSONパースを試行
-            parsed_data = json.loads(json_output)
+            formatting_prompt = build_formatting_prompt(raw_text_output)
+            formatting_response = formatting_router.invoke(
+                "llm",
+                lambda formatting_model: formatting_model.invoke([HumanMessage(content=formatting_prompt)]),
+                attempt=attempt + 1,
+                expected_tokens=estimate_tokens(formatting_prompt),
+            )
+            json_output = strip_code_fence(formatting_response.content)
+
+            # 配列を要素ごとに読み取る（途中で切れていても、読めた記事は使う）
+            records, complete = parse_article_array(json_output)
+            salvage_rounds = config.get("formatting.salvage_rounds", 2)
+            if not complete:
+                print(f"⚠️ 整形結果が途中で切れているか壊れています（読み取れた記事: {len(records)}件）")
+            if not complete and salvage_rounds:
+                def reformat(text, round_number):
+                    prompt = build_formatting_prompt(text)
+                    response = formatting_router.invoke(
+                        "llm",
+                        lambda formatting_model: formatting_model.invoke([HumanMessage(content=prompt)]),
+                        attempt=attempt + 1,
+                        expected_tokens=estimate_tokens(prompt),
+                        salvage=round_number,
+                    )
+                    return response.content
+
+                records = salvage_missing_articles(records, raw_text_output, reformat, max_rounds=salvage_rounds)
+
+            # 記事を1件ずつ検証・型変換（不備のある記事だけを除外）
+            parsed_data, validation = articles_from_records(records)
+            if validation["repaired"]:
+                print(f"🔧 型や表記の揺れを修正した記事: {validation['repaired']}件")
+            for index, reason in validation["dropped"]:
+                print(f"[WARN] Dropping article #{index}: {reason}")
 
             # デバッグ情報の出力
             if config.get("debug.enabled", False) or attempt > 0:
-                print(f"\n📊 デバッグ: JSON型 = {type(parsed_data)}")
-                if isinstance(parsed_data, list):
-                    print(f"📊 デバッグ: 配列の長さ = {len(parsed_data)}")
+                print(f"📊 デバッグ: 記事数 = {len(parsed_data)}")
                 print(f"📊 デバッグ: JSON出力（最初の500文字）:\n{json_output[:500]}\n")
 
-            if isinstance(parsed_data, list) and len(parsed_data) > 0:
+            if len(parsed_data) > 0:
                 # 日付フィルタリング: start_date以降の記事のみを保持
                 start_date_limit = datetime.strptime(start_date, "%Y-%m-%d").date()
                 end_date_limit = datetime.strptime(end_date, "%Y-%m-%d").date()
@@ -461,23 +548,17 @@ URL: [URL]
                 original_count = len(parsed_data)
                 filtered_data = []
                 for article in parsed_data:
-                    pub_date_str = article.get("published_date")
-
-                    # Filter articles to the requested 7-day window
-                    parsed_datetime = parse_publication_date(pub_date_str)
-
-                    if not parsed_datetime:
+                    # Filter articles to the requested 7-day window（公開日は取り込み時に解析済み）
+                    if article.published is None:
                         # 日付が解析できない場合はスキップする
                         print(
-                            f"[WARN] Skipping article with unparsed date: {article.get('title', 'Unknown title')[:50]}..."
-                            f" (published_date={pub_date_str})"
+                            f"[WARN] Skipping article with unparsed date: {article.title[:50]}..."
+                            f" (published_date={article.published_date})"
                         )
                         continue
 
-                    published_date = parsed_datetime.date()
-
-                    if published_date < start_date_limit or published_date > end_date_limit:
-                        print(f"[WARN] Skipping article outside window: {article.get('title', 'Unknown title')[:50]}... (published_date={pub_date_str})")
+                    if article.published < start_date_limit or article.published > end_date_limit:
+                        print(f"[WARN] Skipping article outside window: {article.title[:50]}... (published_date={article.published_date})")
                         continue
 
                     filtered_data.append(article)
@@ -492,36 +573,29 @@ URL: [URL]
                     print("⚠️ フィルタリング後の記事が0件です。")
                     print(f"📊 フィルタリング前の記事数: {original_count}件")
                     print(f"📊 検索期間: {start_date} ～ {end_date}")
-                    if attempt == MAX_RETRIES - 1:
-                        print(f"\n📊 入力テキスト（最初の500文字）:\n{raw_text_output[:500]}\n")
-
-                        # 段階的フォールバック: 検索期間を拡大
-                        if days_back < 30:
-                            if days_back < 14:
-                                new_days_back = 14
-                            else:
-                                new_days_back = 30
-
-                            print("\n" + "⚠️ " * 30)
-                            print(f"⚠️ 検索期間を拡大して再検索します: {days_back}日 → {new_days_back}日")
-                            print("⚠️ " * 30 + "\n")
-
-                            # 再帰呼び出しで検索期間を拡大して再検索
-                            # config.yamlの値を一時的に上書き
-                            original_days_back = config.get("search.days_back")
-                            config["search.days_back"] = new_days_back
-                            result = search_and_extract_data(target_year=year)
-                            config["search.days_back"] = original_days_back  # 元に戻す
-                            return result
+                    # 同じ入力を整形し直しても公開日は変わらないため、再試行せずに検索期間を広げる
+                    print(f"\n📊 入力テキスト（最初の500文字）:\n{raw_text_output[:500]}\n")
+
+                    # 段階的フォールバック: 検索期間を拡大
+                    if days_back < 30:
+                        if days_back < 14:
+                            new_days_back = 14
                         else:
-                            # 30日でもダメな場合はエラー
-                            raise ValueError("有効な記事が見つかりませんでした（フィルタリング後0件）。検索期間を30日まで拡大しましたが、記事がありませんでした。")
-                    continue
+                            new_days_back = 30
+
+                        print("\n" + "⚠️ " * 30)
+                        print(f"⚠️ 検索期間を拡大して再検索します: {days_back}日 → {new_days_back}日")
+                        print("⚠️ " * 30 + "\n")
+
+                        # 検索期間を拡大して再検索（設定は書き換えない）
+                        return search_and_extract_data(target_year=year, days_back=new_days_back)
+                    else:
+                        # 30日でもダメな場合はエラー
+                        print("❌ 有効な記事が見つかりませんでした（フィルタリング後0件）。検索期間を30日まで拡大しましたが、記事がありませんでした。")
+                        sys.exit(1)
             else:
-                # JSONが配列でない、または空配列の場合
-                error_msg = f"JSONの形式が期待通りではありません。型: {type(parsed_data)}"
-                if isinstance(parsed_data, list):
-                    error_msg = "JSONは配列ですが、空です（長さ0）。"
+                # 検証を通過した記事が1件もない場合
+                error_msg = f"有効な記事がありません（検証で除外: {len(validation['dropped'])}件）。"
                 print(f"⚠️ {error_msg}")
                 print(f"📊 JSON出力（最初の1000文字）:\n{json_output[:1000]}\n")
                 print(f"📊 入力テキスト（最初の500文字）:\n{raw_text_output[:500]}\n")
@@ -545,29 +619,61 @@ URL: [URL]
                     print(f"\n❌ 最大再試行回数に達しました。")
                     traceback.print_exc()
                     sys.exit(1)
+                quota_exceeded = True
                 continue
 
+            if structured_output and "INVALID_ARGUMENT" in error_message:
+                # スキーマが拒否された場合は再試行しても通らないため、構造化出力なしで続けずに中止する
+                print(f"\n❌ 構造化出力のスキーマ（article_schema.py）が拒否されました: {error_message}")
+                print("💡 スキーマを修正するか、formatting.structured_output: false で構造化出力を無効にしてください")
+                sys.exit(1)
+
             print(f"\n❌ 予期せぬエラーが発生しました: {error_message}")
             traceback.print_exc()
             if attempt == MAX_RETRIES - 1:
                 sys.exit(1)
             continue
 
-    # --- 8. JSONデータの保存 ---
+    # --- 8. 重複の除外（バッチをまたいで抽出された同じ記事など） ---
+    if config.get("dedup.enabled", True):
+        parsed_data, removed = get_dedup_index().filter(parsed_data, active_profile())
+        if removed:
+            print(f"🧹 重複記事を{removed}件除外しました（残り{len(parsed_data)}件）")
+
+    # --- 9. JSONデータの保存 ---
     research_data_path = config.get("data.research_data_path", "reports/research_data.json")
     reports_dir = os.path.dirname(research_data_path) or "reports"
     os.makedirs(reports_dir, exist_ok=True)
 
     try:
         with open(research_data_path, "w", encoding="utf-8") as f:
-            json.dump(parsed_data, f, indent=2, ensure_ascii=False)
+            json.dump(articles_to_dicts(parsed_data), f, indent=2, ensure_ascii=False)
 
         print("\n" + "=" * 60)
         print("✅ データ収集完了")
         print(f"💾 保存先: {research_data_path}")
         print(f"📊 記事数: {len(parsed_data)}件")
+
+        # 週次データ（トレンド分析・記事索引が読む）も保存
+        weekly_data_path = save_weekly_data(
+            parsed_data,
+            config.get("data.weekly_data_dir", "reports/weekly_data"),
+            report_date=today,
+            start_date=today - timedelta(days=days_back),
+            end_date=today,
+        )
+        print(f"📅 週次データ: {weekly_data_path}")
         print("=" * 60 + "\n")
 
+        # 過去記事の検索用に索引へ追加（失敗しても収集結果には影響させない）
+        if config.get("article_index.enabled", True):
+            try:
+                added = index_archive()
+                print(f"🗂️ 記事索引に{added}件を追加しました")
+            except Exception as e:
+                print(f"⚠️ 記事索引の更新に失敗しました: {e}")
+
+        recorder.print_summary()
         return research_data_path
 
     except Exception as e:
@@ -0,0 +1,431 @@
+"""
+実行前の所要時間・API使用量の見積もり
+config.yaml の設定（キーワード数・バッチサイズ・待機時間・再試行回数など）から、実際と同じプロンプトを組み立てて
+トークン数をローカルで概算し、バッチの実行スケジュール（待機・レート制限・再試行・検索期間の拡大）を
+仮想時計で再現して、所要時間・LLM呼び出し回数・トークン数・Tavilyクレジットを見積もる。
+
+- API は呼び出さない（APIキーも不要）
+- 実行ログ（instrumentation.log_dir）があれば、エージェントの手順数・出力トークン数・応答時間などを実測値で補正する
+- 「標準」は再試行なし、「最悪」は全呼び出しが上限まで再試行し、検索期間を 7 → 14 → 30 日と拡大した場合
+
+run_pipeline.py --dry-run / --estimate から呼び出す。
+"""
+import json
+import math
+import statistics
+from datetime import date
+from pathlib import Path
+
+from article_model import articles_to_dicts, load_articles
+from config_loader import get_config
+from instrumentation import _pad
+from model_router import TASK_ROLES, task_candidates
+from quota_ledger import get_quota_ledger
+from rate_limiter import RateLimiter
+from report_manifest import resolve_report
+from report_sidecar import load_sidecar, sidecar_path_for
+from token_estimate import estimate_tokens, expected_agent_steps
+
+# 実行ログがない場合の仮定値
+DEFAULT_ASSUMPTIONS = {
+    "agent_wall_s": 30.0,             # エージェント1回の応答時間（検索を含む）
+    "llm_wall_s_per_1k_output": 12.0,  # LLMの出力1,000トークンあたりの応答時間
+    "llm_wall_s_min": 3.0,            # LLM呼び出し1回の最短応答時間
+    "tavily_result_tokens": 250,      # 検索結果1件あたりのトークン数（スニペット）
+    "tavily_raw_content_tokens": 2000,  # include_raw_content: true の場合の1件あたりのトークン数
+    "tool_call_tokens": 40,           # 検索ツール呼び出し1回分の出力トークン
+    "article_text_tokens": 550,       # エージェント出力の1記事あたりのトークン数
+    "article_json_tokens": 700,       # 整形後のJSONの1記事あたりのトークン数
+    "report_tokens": 3000,            # 分析レポートのトークン数
+    "email_lead_tokens": 300,         # メールのリード文のトークン数
+}
+
+# Tavily の検索1回あたりのクレジット（search_depth 別）
+TAVILY_CREDITS = {"basic": 1, "advanced": 2}
+
+# 検索期間の段階的フォールバック（research_searcher.py と同じ）
+FALLBACK_DAYS = (7, 14, 30)
+
+ROW_FIELDS = ("llm_calls", "requests", "tavily_calls", "tavily_credits", "input_tokens", "output_tokens", "wall_s", "sleep_s")
+
+
+def _mean(values, default=None):
+    values = [v for v in values if isinstance(v, (int, float))]
+    return statistics.fmean(values) if values else default
+
+
+def load_history(log_dir=None, max_runs=10):
+    """
+    実行ログから呼び出し種別ごとの実測値を集計
+
+    Returns:
+        dict: {"runs": 読み込んだ実行数, "agent"|"formatting"|"analyzer"|"email"|"tavily": イベントのリスト}
+    """
+    config = get_config()
+    log_dir = Path(log_dir or config.get("instrumentation.log_dir", "reports/run_logs"))
+    history = {"runs": 0, "agent": [], "formatting": [], "analyzer": [], "email": [], "tavily": []}
+    if not log_dir.exists():
+        return history
+
+    log_files = sorted(log_dir.glob("run_*.jsonl"), key=lambda p: p.stat().st_mtime)[-max_runs:]
+    for log_file in log_files:
+        history["runs"] += 1
+        with open(log_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("status") != "ok":
+                    continue
+                kind = event.get("kind")
+                phase = event.get("phase", "")
+                if kind == "agent":
+                    history["agent"].append(event)
+                elif kind == "tavily":
+                    history["tavily"].append(event)
+                elif kind == "llm":
+                    for name in ("formatting", "analyzer", "email"):
+                        if phase.endswith(name):
+                            history[name].append(event)
+    return history
+
+
+class ScheduleSimulator:
+    """仮想時計で実行スケジュールを再現し、ステージごとに使用量を積算する"""
+
+    def __init__(self):
+        config = get_config()
+        self.now = 0.0
+        limits = {}
+        # 実際と同じ1分あたりの上限を仮想時計で動かす（台帳が有効な場合は台帳の上限をリクエスト数で数える）
+        self.by_requests = config.get("quota_ledger.enabled", True)
+        if self.by_requests:
+            limits = {
+                provider: config.get(f"quota_ledger.limits.{provider}.requests_per_minute", 0)
+                for provider in ("gemini", "tavily")
+            }
+        elif config.get("rate_limit.enabled", True):
+            limits = {
+                "gemini": config.get("rate_limit.gemini_per_minute", 10),
+                "tavily": config.get("rate_limit.tavily_per_minute", 60),
+            }
+        self.limiter = RateLimiter(limits)
+        self.limiter.clock = lambda: self.now
+        self.rows = {}
+        self.stage = None
+
+    def row(self):
+        return self.rows.setdefault(self.stage, dict.fromkeys(ROW_FIELDS, 0))
+
+    def sleep(self, seconds, reason=""):
+        self.now += seconds
+        self.row()["sleep_s"] += seconds
+
+    def call(self, kind, wall_s, requests=1, input_tokens=0, output_tokens=0):
+        """
+        呼び出しを1回再現する
+
+        Args:
+            kind (str): "llm" | "agent" | "tavily"（レート制限のグループ分けに使う）
+            wall_s (float): 応答時間
+            requests (int): 実際のAPIリクエスト数（エージェントは手順数）
+        """
+        self.limiter.acquire(kind, sleep=self.sleep, count=requests if self.by_requests else 1)
+        self.now += wall_s
+        row = self.row()
+        row["wall_s"] += wall_s
+        if kind == "tavily":
+            row["tavily_calls"] += 1
+            return
+        row["llm_calls"] += 1
+        row["requests"] += requests
+        row["input_tokens"] += input_tokens
+        row["output_tokens"] += output_tokens
+
+
+class RunEstimator:
+    """config.yaml と実行ログから実行1回分を見積もる"""
+
+    def __init__(self, history=None):
+        self.config = get_config()
+        self.history = history if history is not None else load_history(
+            max_runs=self.config.get("estimator.history_runs", 10)
+        )
+        self.assumptions = dict(DEFAULT_ASSUMPTIONS)
+
+    # --- 実測値による補正 ---
+
+    def _measured(self, name, field, minimum=1):
+        events = self.history.get(name, [])
+        if len(events) < minimum:
+            return None
+        return _mean(event.get(field) for event in events)
+
+    def llm_wall_s(self, name, output_tokens):
+        """LLM呼び出しの応答時間（実測があれば実測の平均）"""
+        measured = self._measured(name, "wall_s")
+        if measured is not None:
+            return measured
+        per_1k = self.assumptions["llm_wall_s_per_1k_output"]
+        return max(self.assumptions["llm_wall_s_min"], output_tokens / 1000 * per_1k)
+
+    def output_tokens(self, name, default):
+        measured = self._measured(name, "output_tokens")
+        return round(measured) if measured else default
+
+    # --- ステージごとの見積もり ---
+
+    def _agent_batch(self, keyword_batch, days_back, end_date):
+        """エージェント1回（バッチ1つ）の見積もり: (リクエスト数, 入力トークン, 出力トークン, 検索回数, 応答時間)"""
+        from research_searcher import build_search_prompt
+
+        articles_per_batch = self.config.get("search.articles_per_batch", 3)
+        recursion_limit = self.config.get("agent.recursion_limit", 30)
+        prompt_tokens = estimate_tokens(build_search_prompt(keyword_batch, end_date, days_back, articles_per_batch))
+
+        steps = expected_agent_steps(len(keyword_batch), recursion_limit)
+        tool_calls = steps - 1
+        per_result = self.assumptions["tavily_result_tokens"]
+        if self.config.get("tavily.include_raw_content", False):
+            per_result = self.assumptions["tavily_raw_content_tokens"]
+            if self.config.get("content_extraction.enabled", True):
+                # ページ本文は要約（max_chars 文字まで）に置き換わる
+                per_result = 30 + math.ceil(self.config.get("content_extraction.max_chars", 800) / 3)
+        results = self.config.get("tavily.max_results", 5)
+        if self.config.get("ranking.enabled", True) and self.config.get("ranking.top_n", 3):
+            # エージェントに渡るのは事前ランキングの上位だけ
+            results = min(results, self.config.get("ranking.top_n", 3))
+        history_cap = None
+        if self.config.get("agent.compaction.enabled", True):
+            # 履歴の圧縮で本文が切り詰められ、古い検索結果は上限を超えた分が一覧に置き換わる
+            max_chars = self.config.get("agent.compaction.max_content_chars", 500)
+            if max_chars and not self.config.get("tavily.include_raw_content", False):
+                # タイトル・URL・公開日（30トークン程度）＋切り詰めた本文（英語は3文字で1トークン程度）
+                per_result = min(per_result, 30 + math.ceil(max_chars / 3))
+            history_cap = self.config.get("agent.compaction.max_history_tokens", 6000) or None
+        result_tokens = per_result * results
+
+        # 検索1回ごとにモデルを呼び出し、履歴（プロンプト＋これまでの検索結果）を毎回送る
+        input_tokens = 0
+        for i in range(steps):
+            history = i * (result_tokens + self.assumptions["tool_call_tokens"])
+            if history_cap:
+                history = min(history, max(history_cap, result_tokens))
+            input_tokens += prompt_tokens + history
+        answer_tokens = self.assumptions["article_text_tokens"] * articles_per_batch
+        output_tokens = tool_calls * self.assumptions["tool_call_tokens"] + answer_tokens
+        wall_s = self.assumptions["agent_wall_s"]
+
+        if self.history["agent"]:
+            steps = round(self._measured("agent", "llm_steps") or steps)
+            tool_calls = round(self._measured("agent", "tool_calls") or tool_calls)
+            input_tokens = round(self._measured("agent", "input_tokens") or input_tokens)
+            output_tokens = round(self._measured("agent", "output_tokens") or output_tokens)
+            wall_s = self._measured("agent", "wall_s") or wall_s
+        return steps, input_tokens, output_tokens, tool_calls, wall_s
+
+    def simulate_search(self, sim, worst=False):
+        """検索ステージ（バッチ → 整形）の再現"""
+        from research_searcher import build_formatting_prompt
+
+        config = self.config
+        keywords = config.get("search.keywords", [])
+        batch_size = max(1, config.get("search.batch_size", 3))
+        batches = [keywords[i:i + batch_size] for i in range(0, len(keywords), batch_size)]
+        batch_delay = config.get("search.batch_delay", 70)
+        max_retries = max(1, config.get("agent.max_retries", 3))
+        initial_delay = config.get("agent.initial_delay", 60)
+        articles_per_batch = config.get("search.articles_per_batch", 3)
+        max_articles = config.get("search.max_articles", 15)
+        credits = TAVILY_CREDITS.get(config.get("tavily.search_depth", "advanced"), 2)
+        attempts = max_retries if worst else 1
+        days_back = config.get("search.days_back", 7)
+        windows = [days_back] + ([d for d in FALLBACK_DAYS if d > days_back] if worst else [])
+        end_date = date.today().isoformat()
+        for window in windows:
+            for index, batch in enumerate(batches):
+                steps, input_tokens, output_tokens, tool_calls, wall_s = self._agent_batch(batch, window, end_date)
+                for attempt in range(attempts):
+                    if attempt > 0:
+                        sim.sleep(max(60, initial_delay * (2 ** (attempt - 1))), reason="retry")
+                    for _ in range(tool_calls):
+                        sim.call("tavily", 0.0)
+                        sim.row()["tavily_credits"] += credits
+                    sim.call("agent", wall_s, requests=steps, input_tokens=input_tokens, output_tokens=output_tokens)
+                if index < len(batches) - 1:
+                    sim.sleep(batch_delay, reason="batch_delay")
+
+            # 整形（クォータリセット待ちの60秒のあと、全バッチのテキストを1回で整形）
+            sim.sleep(60, reason="quota_reset")
+            article_count = min(max_articles, len(batches) * articles_per_batch)
+            raw_tokens = self.assumptions["article_text_tokens"] * len(batches) * articles_per_batch
+            input_tokens = estimate_tokens(build_formatting_prompt("")) + raw_tokens
+            output_tokens = self.output_tokens("formatting", self.assumptions["article_json_tokens"] * article_count)
+            salvage_rounds = config.get("formatting.salvage_rounds", 2) if worst else 0
+            for attempt in range(attempts):
+                if attempt > 0:
+                    sim.sleep(60, reason="retry")
+                sim.call("llm", self.llm_wall_s("formatting", output_tokens), input_tokens=input_tokens, output_tokens=output_tokens)
+            for _ in range(salvage_rounds):
+                # 途中で切れた場合は未取得の記事（最大で半分程度）だけを再整形する
+                sim.call("llm", self.llm_wall_s("formatting", output_tokens // 2),
+                         input_tokens=input_tokens // 2, output_tokens=output_tokens // 2)
+
+    def current_articles(self):
+        """既存の記事データ（research_data.json、ない場合は空）"""
+        research_data_path = self.config.get("data.research_data_path", "reports/research_data.json")
+        try:
+            return articles_to_dicts(load_articles(research_data_path))
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    def simulate_analyze(self, sim, search_runs=False):
+        """レポート生成ステージ（LLM 1回）の再現"""
+        from research_analyzer import build_analysis_prompt, build_trend_section
+        from trend_digest import format_digest, load_digest
+
+        config = self.config
+        articles = self.current_articles()
+        data_tokens = estimate_tokens(json.dumps(articles, indent=2, ensure_ascii=False))
+        if search_runs:
+            # 検索後の件数（目標の上限）に合わせて、既存データの1記事あたりのトークン数で見積もる
+            keywords = config.get("search.keywords", [])
+            batches = math.ceil(len(keywords) / max(1, config.get("search.batch_size", 3)))
+            count = min(config.get("search.max_articles", 15), batches * config.get("search.articles_per_batch", 3))
+            per_article = data_tokens / len(articles) if articles else self.assumptions["article_json_tokens"]
+            data_tokens = round(per_article * count)
+
+        trend_context = ""
+        if config.get("trends.digest.enabled", True):
+            trend_context = format_digest(load_digest(), max_chars=config.get("trends.digest.max_chars", 800))
+        input_tokens = estimate_tokens(build_analysis_prompt("", build_trend_section(trend_context))) + data_tokens
+        output_tokens = self.output_tokens("analyzer", self.assumptions["report_tokens"])
+        sim.call("llm", self.llm_wall_s("analyzer", output_tokens), input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def simulate_email(self, sim):
+        """メール送信ステージ（リード文の LLM 1回）の再現"""
+        import email_report
+
+        max_chars = self.config.get("email.lead_max_chars", 300)
+        report_path, entry = resolve_report()
+        sidecar = None
+        if report_path:
+            sidecar = load_sidecar((entry or {}).get("sidecar") or sidecar_path_for(report_path))
+        input_tokens = estimate_tokens(email_report.build_email_lead_prompt(sidecar or {}, max_chars))
+        output_tokens = self.output_tokens("email", self.assumptions["email_lead_tokens"])
+        sim.call("llm", self.llm_wall_s("email", output_tokens), input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def estimate(self, stages, worst=False):
+        """
+        ステージを順に再現して見積もる
+
+        Returns:
+            dict: {ステージ名: {"llm_calls", "requests", "tavily_calls", "tavily_credits",
+                               "input_tokens", "output_tokens", "wall_s", "sleep_s", "elapsed_s"}}
+        """
+        sim = ScheduleSimulator()
+        for stage in stages:
+            sim.stage = stage
+            start = sim.now
+            if stage == "search":
+                self.simulate_search(sim, worst=worst)
+            elif stage == "analyze":
+                self.simulate_analyze(sim, search_runs="search" in stages)
+            elif stage == "email":
+                self.simulate_email(sim)
+            row = sim.row()
+            row["elapsed_s"] = sim.now - start
+        return sim.rows
+
+    def calibration_note(self):
+        """実測値で補正した項目の説明"""
+        counts = {name: len(self.history[name]) for name in ("agent", "formatting", "analyzer", "email")}
+        used = [f"{name} {count}件" for name, count in counts.items() if count]
+        if not used:
+            return "実行ログなし（仮定値で見積もり）"
+        return f"実行ログ {self.history['runs']}回分で補正（{', '.join(used)}）"
+
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def gemini_daily_remaining():
+    """
+    Gemini の1日の上限と本日の残り
+
+    1日の上限はモデルごと（quota_ledger.models）のため、model_router で切り替えられる候補のモデルの合計とする。
+    候補のモデルに上限がなければ提供元の上限（quota_ledger.limits.gemini）を使う。
+
+    Returns:
+        tuple: (上限, 残り（上限がなければ None）, 使用量台帳の使用済みの分を差し引いたか)
+    """
+    config = get_config()
+    ledger = None
+    ledger_path = Path(config.get("quota_ledger.path", "reports/quota_ledger.sqlite"))
+    if config.get("quota_ledger.enabled", True) and ledger_path.exists():
+        ledger = get_quota_ledger()
+
+    model_limits = config.get("quota_ledger.models", {}) or {}
+    daily_limit = remaining = 0
+    for name in dict.fromkeys(name for task in TASK_ROLES for name in task_candidates(task)):
+        daily = (model_limits.get(name) or {}).get("requests_per_day")
+        if daily:
+            daily_limit += daily
+            remaining += ledger.remaining_today("gemini", name) if ledger else daily
+    if not daily_limit:
+        daily_limit = config.get("quota_ledger.limits.gemini.requests_per_day", 0)
+        remaining = ledger.remaining_today("gemini") if ledger else daily_limit
+    if not daily_limit:
+        return 0, None, False
+    return daily_limit, remaining, ledger is not None
+
+
+def print_estimate(stages, history=None):
+    """見積もりを表示し、標準・最悪の合計を返す"""
+    config = get_config()
+    estimator = RunEstimator(history=history)
+    scenarios = {"標準": estimator.estimate(stages), "最悪": estimator.estimate(stages, worst=True)}
+
+    print("\n" + "=" * 78)
+    print("🧮 実行の見積もり（APIは呼び出していません）")
+    print(f"   {estimator.calibration_note()}")
+    print("=" * 78)
+    columns = [("LLM", 5), ("要求", 6), ("検索", 6), ("credit", 8), ("入力tok", 10), ("出力tok", 10), ("所要", 10)]
+    print(_pad("ステージ", 23) + "".join(_pad(name, width, ">") for name, width in columns))
+    totals = {}
+    for name, rows in scenarios.items():
+        print(f"-- {name}（{'再試行なし' if name == '標準' else '全呼び出しが上限まで再試行・検索期間を拡大'}）")
+        total = dict.fromkeys(ROW_FIELDS + ("elapsed_s",), 0)
+        for stage in stages:
+            row = rows.get(stage)
+            if row is None:
+                continue
+            print(
+                f"{_pad(stage, 23)}{row['llm_calls']:>5}{row['requests']:>6}{row['tavily_calls']:>6}{row['tavily_credits']:>8}"
+                f"{row['input_tokens']:>10}{row['output_tokens']:>10}{_format_duration(row['elapsed_s']):>10}"
+            )
+            for key in total:
+                total[key] += row[key]
+        print(
+            f"{_pad('合計', 23)}{total['llm_calls']:>5}{total['requests']:>6}{total['tavily_calls']:>6}{total['tavily_credits']:>8}"
+            f"{total['input_tokens']:>10}{total['output_tokens']:>10}{_format_duration(total['elapsed_s']):>10}"
+        )
+        print(f"   うち待機 {_format_duration(total['sleep_s'])}（バッチ間・クォータ・レート制限・再試行）")
+        totals[name] = total
+    print("=" * 78)
+
+    # 無料枠との比較
+    daily_limit, remaining, measured = gemini_daily_remaining()
+    if measured and remaining is not None:
+        print(f"📒 Gemini: 本日の残り {remaining}/{daily_limit} リクエスト（候補のモデルの合計、使用量台帳）")
+    monthly_credits = config.get("estimator.tavily_credits_per_month", 1000)
+    for name, total in totals.items():
+        if remaining is not None and daily_limit and total["requests"] > remaining:
+            print(f"⚠️ {name}: Geminiのリクエスト数（{total['requests']}回）が本日の残り（{remaining}回）を超えます")
+    if monthly_credits and totals["標準"]["tavily_credits"]:
+        runs = monthly_credits // totals["標準"]["tavily_credits"]
+        print(f"ℹ️ Tavily: 1回あたり{totals['標準']['tavily_credits']}クレジット（月{monthly_credits}クレジットで約{runs}回実行可能、キャッシュ利用分は除く）")
+    return totals
@@ -0,0 +1,112 @@
+"""
+Tavily検索結果のキャッシュ（プロセス全体で共有）
+同じ検索条件（クエリ・検索深度・件数・開始日など）の結果を再利用し、
+複数の調査プロファイルで重なるキーワードや、再実行時の検索回数を減らす。
+
+- メモリ上のキャッシュに加え、cache_dir に1件1ファイルのJSONとして保存する（ttl_hours で失効）
+- 同じ条件の検索が並行して要求された場合は、1回だけ検索して結果を共有する
+"""
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from config_loader import get_config
+
+
+def cache_key(query, **params):
+    """検索条件からキャッシュキー（SHA-1）を作成"""
+    payload = json.dumps({"query": query, **params}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """検索結果のキャッシュ（スレッドセーフ）"""
+
+    def __init__(self, cache_dir=None, ttl_hours=24):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _load(self, key):
+        """メモリ、なければファイルからキャッシュを読み込む（失効済みは None）"""
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir is not None:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                entry = None
+        if entry is None or time.time() - entry["created_at"] > self.ttl:
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _store(self, key, query, response):
+        entry = {"query": query, "created_at": time.time(), "response": response}
+        self._entries[key] = entry
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(key).with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            tmp_path.replace(self._path(key))
+
+    def get_or_fetch(self, query, fetch, **params):
+        """
+        キャッシュがあれば返し、なければ fetch() の結果を保存して返す
+
+        Args:
+            query (str): 検索クエリ
+            fetch (callable): 引数なしで検索を実行する関数
+            **params: 結果に影響する検索条件
+
+        Returns:
+            tuple: (検索結果, キャッシュから返したか)
+        """
+        key = cache_key(query, **params)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return entry["response"], True
+
+            response = fetch()
+            # エラー応答（文字列など）は保存しない
+            if isinstance(response, dict) and "error" not in response:
+                self._store(key, query, response)
+            with self._lock:
+                self.misses += 1
+            return response, False
+
+
+# グローバルインスタンス（get_config と同じ使い方）
+_global_search_cache = None
+_global_lock = threading.Lock()
+
+
+def get_search_cache():
+    """検索キャッシュを取得（無効の場合は None）"""
+    global _global_search_cache
+    config = get_config()
+    if not config.get("search_cache.enabled", True):
+        return None
+    with _global_lock:
+        if _global_search_cache is None:
+            _global_search_cache = SearchCache(
+                cache_dir=config.get("search_cache.cache_dir", "reports/search_cache") or None,
+                ttl_hours=config.get("search_cache.ttl_hours", 24),
+            )
+        return _global_search_cache
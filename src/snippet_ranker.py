@@ -0,0 +1,158 @@
+"""
+検索結果のローカル事前ランキング
+Tavily の検索結果（スニペット）を、モデルに渡す前にローカルで並べ替え、上位 top_n 件だけを残す。
+プロンプトで「製造業・ベンダー名・導入事例を優先」と指示してモデルに全件を読ませる代わりに、
+読む件数そのものを減らして、バッチごとの入力トークンと応答時間を抑える。
+
+スコア = (BM25（語彙リストに対する関連度）+ Tavily の関連度 × tavily_weight) × 新しさ × ドメインの重み
+
+- 語彙リスト（ranking.lexicon）は {語句: 重み}。複数語の語句（"skills base" など）は連続する語として数える
+- 新しさは公開日からの経過日数による半減（recency_half_life_days）。公開日が不明な場合は補正しない
+- ドメインの重み（ranking.domain_priors）は、ホスト名が一致するか、そのサブドメインの場合に掛ける
+- 検索キャッシュには並べ替える前の結果を保存するため、語彙リストを変えてもキャッシュはそのまま使える
+"""
+import re
+import math
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from article_model import parse_publication_date
+from config_loader import get_config
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """英数字の語に分割（小文字化）"""
+    return _TOKEN.findall((text or "").lower())
+
+
+def _phrase_counts(tokens, phrases):
+    """語句（語のタプル）ごとの出現回数"""
+    counts = Counter()
+    lengths = {len(phrase) for phrase in phrases}
+    for length in lengths:
+        for i in range(len(tokens) - length + 1):
+            gram = tuple(tokens[i:i + length])
+            if gram in phrases:
+                counts[gram] += 1
+    return counts
+
+
+def _domain(url):
+    host = urlsplit(url or "").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class SnippetRanker:
+    """
+    検索結果のランキング
+
+    Args:
+        lexicon (dict): {語句: 重み}
+        top_n (int): 残す件数（0: すべて残して並べ替えだけ行う）
+        recency_half_life_days (float): 新しさの補正が半分になる日数（0: 補正しない）
+        recency_weight (float): 公開日当日の記事に掛ける補正の大きさ（1 + recency_weight 倍）
+        domain_priors (dict): {ドメイン: 重み}
+        tavily_weight (float): Tavily の関連度（score）に掛ける重み
+        k1, b (float): BM25 のパラメータ
+    """
+
+    def __init__(self, lexicon, top_n=3, recency_half_life_days=14, recency_weight=0.5,
+                 domain_priors=None, tavily_weight=1.0, k1=1.2, b=0.75):
+        self.weights = {}
+        for term, weight in (lexicon or {}).items():
+            phrase = tuple(tokenize(term))
+            if phrase:
+                self.weights[phrase] = float(weight)
+        self.top_n = top_n
+        self.half_life = recency_half_life_days
+        self.recency_weight = recency_weight
+        self.domain_priors = {domain.lower().removeprefix("www."): float(weight)
+                              for domain, weight in (domain_priors or {}).items()}
+        self.tavily_weight = tavily_weight
+        self.k1 = k1
+        self.b = b
+
+    def bm25_scores(self, documents):
+        """文書（語のリスト）ごとの BM25 スコア（語彙リストをクエリとし、IDF は結果の集合から求める）"""
+        counts = [_phrase_counts(tokens, self.weights) for tokens in documents]
+        n = len(documents)
+        average_length = sum(len(tokens) for tokens in documents) / n if n else 0
+        document_frequency = Counter(phrase for count in counts for phrase in count)
+        scores = []
+        for tokens, count in zip(documents, counts):
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / average_length) if average_length else self.k1
+            score = 0.0
+            for phrase, tf in count.items():
+                df = document_frequency[phrase]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += self.weights[phrase] * idf * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def recency(self, published_date, today=None):
+        if not self.half_life or not published_date:
+            return 1.0
+        parsed = parse_publication_date(str(published_date))
+        if parsed is None:
+            return 1.0
+        today = today or datetime.now().date()
+        age_days = max(0, (today - parsed.date()).days)
+        return 1.0 + self.recency_weight * 0.5 ** (age_days / self.half_life)
+
+    def domain_prior(self, url):
+        domain = _domain(url)
+        while domain:
+            if domain in self.domain_priors:
+                return self.domain_priors[domain]
+            domain = domain.partition(".")[2]
+        return 1.0
+
+    def score(self, results, today=None):
+        """結果ごとのスコア（results と同じ順）"""
+        documents = [tokenize(f"{result.get('title', '')} {result.get('content', '')}") for result in results]
+        bm25 = self.bm25_scores(documents)
+        scores = []
+        for result, relevance in zip(results, bm25):
+            tavily_score = result.get("score")
+            base = relevance + self.tavily_weight * (tavily_score if isinstance(tavily_score, (int, float)) else 0.0)
+            scores.append(base * self.recency(result.get("published_date"), today) * self.domain_prior(result.get("url")))
+        return scores
+
+    def rank(self, results, today=None):
+        """
+        スコアの高い順に並べ替え、上位 top_n 件を返す（同点は元の順）
+
+        Returns:
+            list: 残した結果
+        """
+        if not results:
+            return []
+        scores = self.score(results, today)
+        order = sorted(range(len(results)), key=lambda i: -scores[i])
+        if self.top_n:
+            order = order[:self.top_n]
+        return [results[i] for i in order]
+
+    def rank_response(self, response, today=None):
+        """Tavily のレスポンス（{"results": [...]}）の結果を並べ替えたコピーを返す"""
+        if not isinstance(response, dict) or not isinstance(response.get("results"), list):
+            return response
+        return {**response, "results": self.rank(response["results"], today)}
+
+
+def get_snippet_ranker():
+    """現在の設定（プロファイルを含む）のランキングを作成（無効の場合は None）"""
+    config = get_config()
+    if not config.get("ranking.enabled", True):
+        return None
+    return SnippetRanker(
+        lexicon=config.get("ranking.lexicon", {}),
+        top_n=config.get("ranking.top_n", 3),
+        recency_half_life_days=config.get("ranking.recency_half_life_days", 14),
+        recency_weight=config.get("ranking.recency_weight", 0.5),
+        domain_priors=config.get("ranking.domain_priors", {}),
+        tavily_weight=config.get("ranking.tavily_weight", 1.0),
+    )
@@ -0,0 +1,281 @@
+"""
+パイプラインのステージ実行（入力のハッシュによる差分実行）
+make のように、ステージごとに入力（データファイル・config.yaml の該当部分・プロンプトのテンプレート・
+モデル名など）と出力のハッシュを状態ファイルに記録し、前回から何も変わっていないステージは実行しない。
+
+- 入力・出力のハッシュが前回の成功時と同じステージはスキップする（理由を表示する）
+- 依存関係のないステージはスレッドで並行実行する
+- 失敗したステージは記録しないため、途中で失敗した実行をやり直すと、成功済みのステージはスキップされる
+- ファイルのハッシュはサイズ・更新時刻とともに状態ファイルに保存し、変わっていないファイルは読み直さない
+
+パイプラインの定義（どのステージが何を入力・出力とするか）は run_pipeline.py にある。
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from report_manifest import file_sha256
+
+STATE_VERSION = 1
+MISSING = "missing"
+
+# 実行中のステージ名（出力の行頭に付ける）
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+def value_hash(value):
+    """設定値などのハッシュ（JSONに変換して SHA-256）"""
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FileHasher:
+    """ファイル・ディレクトリのハッシュ（サイズと更新時刻が同じファイルは前回の値を使う）"""
+
+    def __init__(self, cache=None):
+        self.cache = dict(cache or {})
+        self._lock = threading.Lock()
+
+    def file_hash(self, path):
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return MISSING
+        key = path.as_posix()
+        with self._lock:
+            cached = self.cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = file_sha256(path)
+        with self._lock:
+            self.cache[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def path_hash(self, path):
+        """ファイルならその内容、ディレクトリなら配下の全ファイル（相対パスと内容）のハッシュ"""
+        path = Path(path)
+        if not path.is_dir():
+            return self.file_hash(path)
+        entries = [
+            (child.relative_to(path).as_posix(), self.file_hash(child))
+            for child in sorted(path.rglob("*"))
+            if child.is_file()
+        ]
+        return value_hash(entries)
+
+
+class StagePrefixedOutput:
+    """実行中のステージ名を行頭に付けて出力する標準出力（並行実行時に行が混ざらないよう行単位で書き出す）"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", "") + text
+        *lines, self._local.buffer = buffer.split("\n")
+        if lines:
+            stage = _current_stage.get()
+            prefix = f"[{stage}] " if stage else ""
+            with self._lock:
+                self.stream.write("".join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Stage:
+    """
+    パイプラインのステージ
+
+    Args:
+        name (str): ステージ名
+        run (callable): 実行関数（引数なし）
+        inputs (callable): 入力を返す関数 inputs(hasher) -> {ラベル: ハッシュ}（依存ステージの完了後に評価）
+        outputs (callable): 出力のパスを返す関数（実行後に評価）
+        deps (tuple): 先に完了している必要があるステージ名
+    """
+
+    def __init__(self, name, run, inputs, outputs, deps=()):
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = tuple(deps)
+
+
+class StageRunner:
+    """ステージの差分実行・並行実行"""
+
+    def __init__(self, stages, state_path, workers=2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = Path(state_path)
+        self.workers = max(1, workers)
+        self.state = self._load_state()
+        self.hasher = FileHasher(self.state.get("files"))
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                return state
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass
+        return {"version": STATE_VERSION, "stages": {}, "files": {}}
+
+    def _save_state(self):
+        """状態ファイルを原子的に書き出す（ロック内で呼ぶ）"""
+        self.state["files"] = dict(sorted(self.hasher.cache.items()))
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".stage_state_", suffix=".tmp", dir=self.state_path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def check(self, stage, force=False):
+        """
+        ステージを実行する必要があるか判定
+
+        Returns:
+            tuple: (実行が必要か, 理由, 入力のハッシュ)
+        """
+        inputs = stage.inputs(self.hasher)
+        record = self.state["stages"].get(stage.name)
+        if force:
+            return True, "強制実行（--force）", inputs
+        if record is None:
+            return True, "実行記録なし", inputs
+
+        changed = sorted(label for label in set(inputs) | set(record["inputs"])
+                         if inputs.get(label) != record["inputs"].get(label))
+        if changed:
+            return True, f"入力が変更: {', '.join(changed)}", inputs
+
+        for path, digest in record["outputs"].items():
+            current = self.hasher.path_hash(path)
+            if current != digest:
+                state = "削除" if current == MISSING else "変更"
+                return True, f"出力が{state}: {path}", inputs
+        return False, "入力・出力とも前回と同じ", inputs
+
+    def _record(self, stage, inputs):
+        outputs = {str(path): self.hasher.path_hash(path) for path in stage.outputs() if path}
+        with self._lock:
+            self.state["stages"][stage.name] = {
+                "inputs": inputs,
+                "outputs": outputs,
+                "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save_state()
+
+    def _execute(self, stage, force):
+        """1ステージを判定・実行する（ワーカースレッドで実行）"""
+        start = time.perf_counter()
+        result = {"stage": stage.name}
+        _current_stage.set(stage.name)
+        try:
+            needed, reason, inputs = self.check(stage, force)
+            result["reason"] = reason
+            if not needed:
+                result["action"] = "skip"
+                print(f"⏭️ {stage.name}: スキップ（{reason}）")
+                return result
+
+            print(f"▶ {stage.name}: 実行します（{reason}）")
+            try:
+                stage.run()
+            except SystemExit as e:
+                # 各スクリプトはエラー時に sys.exit する
+                if e.code:
+                    raise RuntimeError(f"exit({e.code})") from None
+            self._record(stage, inputs)
+            result["action"] = "run"
+        except Exception as e:
+            result["action"] = "failed"
+            result["reason"] = f"{type(e).__name__}: {e}"
+            print(f"❌ {stage.name}: 失敗しました（{result['reason']}）")
+        finally:
+            result["elapsed_s"] = round(time.perf_counter() - start, 2)
+        return result
+
+    def plan(self, names, force=()):
+        """実行せずに、各ステージを実行するか（理由）を返す（依存ステージの再実行は考慮しない）"""
+        results = []
+        for name in names:
+            needed, reason, _ = self.check(self.stages[name], name in force)
+            results.append({"stage": name, "action": "pending" if needed else "skip", "reason": reason})
+        return results
+
+    def run(self, names, force=()):
+        """
+        ステージを依存関係の順に実行（依存のないステージは並行実行）
+
+        選ばれていないステージへの依存は、既存の出力を使うものとして扱う。
+
+        Args:
+            names (list): 実行するステージ名
+            force (set): 入力に関わらず実行するステージ名
+
+        Returns:
+            list: ステージごとの結果 {"stage", "action": "run"|"skip"|"failed"|"blocked", "reason", "elapsed_s"}
+        """
+        pending = {name: self.stages[name] for name in names}
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name, stage in list(pending.items()):
+                        deps = [dep for dep in stage.deps if dep in names]
+                        failed = [dep for dep in deps if results.get(dep, {}).get("action") in ("failed", "blocked")]
+                        if failed:
+                            results[name] = {"stage": name, "action": "blocked", "reason": f"依存ステージが失敗: {', '.join(failed)}"}
+                        elif all(dep in results for dep in deps):
+                            # プロファイル・計測フェーズ（ContextVar）を引き継いで実行する
+                            context = contextvars.copy_context()
+                            running[executor.submit(context.run, self._execute, stage, name in force)] = name
+                        else:
+                            continue
+                        del pending[name]
+                        progressed = True
+                if not running:
+                    if pending:
+                        raise ValueError(f"ステージの依存関係が循環しています: {', '.join(pending)}")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return [results[name] for name in names]
+
+
+def print_results(results, title="ステージの実行結果"):
+    """実行結果（何をしたか・その理由）を表示"""
+    marks = {"run": "✓ 実行", "pending": "▶ 実行予定", "skip": "⏭️ スキップ", "failed": "❌ 失敗", "blocked": "⛔ 未実行"}
+    print("\n" + "=" * 60)
+    print(f"📋 {title}")
+    print("=" * 60)
+    for result in results:
+        elapsed = f" {result['elapsed_s']:.2f}秒" if "elapsed_s" in result else ""
+        print(f"{marks.get(result['action'], result['action'])} {result['stage']}{elapsed}: {result['reason']}")
+    print("=" * 60)
@@ -0,0 +1,27 @@
+"""
+トークン数・エージェントの呼び出し数の概算（API・トークナイザーを使わない）
+実行前の見積もり（run_estimator.py）、クォータの予約（各スクリプト）、履歴の圧縮（agent_compaction.py）で共通に使う。
+他のモジュールを import しないため、どこからでも軽く読み込める。
+"""
+import math
+
+
+def estimate_tokens(text):
+    """
+    トークン数の概算（ASCII は4文字で1トークン、日本語などはおおむね1文字1トークン）
+
+    実際のトークナイザーより多めに見積もる（クォータの見積もりは少なく見積もるより安全なため）。
+    """
+    text = text or ""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars))
+
+
+def expected_agent_steps(keyword_count, recursion_limit):
+    """
+    エージェント1回のLLM呼び出し数の見込み（キーワードごとに1回検索し、最後に回答する）
+
+    ReAct の1手順は「モデル → ツール」で再帰を2つ使う（最後の回答で1つ）ため、検索回数は recursion_limit で頭打ちになる。
+    """
+    max_tool_calls = max(0, (recursion_limit - 1) // 2)
+    return min(keyword_count, max_tool_calls) + 1
@@ -0,0 +1,172 @@
+"""
+トレンドダイジェスト
+analyze_trends.py の集計結果から、分析レポートのプロンプトに添える
+小さな要約（直近の上位・前週比の増減・新規出現）を作成する。
+
+- analyze_trends.py が reports/trends/digest.json に書き出す
+- research_analyzer.py が読み込み、文字数の上限内でテキスト化してプロンプトに加える
+- 最新週が今回のデータ（research_data.json）より max_age_weeks 週以上古いダイジェストは使わない
+  （週次データが更新されていない場合に、古い集計を「過去のトレンド」として渡さないため）
+- 内容が同じなら同じファイルになるよう、生成時刻は含めない（run_pipeline.py が入力のハッシュに使う）
+"""
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+from config_loader import get_config
+
+DIGEST_FILENAME = "digest.json"
+
+# ダイジェストに含める次元と表示名
+DIGEST_DIMENSIONS = {"keywords": "キーワード", "companies": "企業"}
+
+
+def _week_over_week(trend):
+    """最新週と前週の件数差（エンティティごと）"""
+    if len(trend.dates) < 2:
+        return []
+    rows = []
+    for entity, counts in trend.series.items():
+        latest, previous = counts[-1], counts[-2]
+        if latest != previous:
+            rows.append({"entity": entity, "latest": latest, "previous": previous, "delta": latest - previous})
+    return rows
+
+
+def _new_entities(trend, k):
+    """最新週に初めて出現したエンティティ（件数の多い順）"""
+    if len(trend.dates) < 2:
+        return []
+    # 前週までの件数が0で、最新週に件数があるもの
+    new = [(entity, counts[-1]) for entity, counts in trend.series.items() if counts[-1] > 0 and not any(counts[:-1])]
+    new.sort(key=lambda x: (-x[1], x[0]))
+    return [{"entity": entity, "count": count} for entity, count in new[:k]]
+
+
+def build_digest(store, window_weeks=4, top_k=5):
+    """
+    トレンドダイジェストを作成
+
+    Args:
+        store (TrendStore): トレンドデータ
+        window_weeks (int): 「直近の上位」を集計する週数
+        top_k (int): 各項目の件数
+
+    Returns:
+        dict: ダイジェスト
+    """
+    start, end = store.recent_range(window_weeks)
+    dates = store.dates
+    digest = {
+        "history": {"start": dates[0] if dates else None, "end": end, "weeks": len(dates)},
+        "window": {"start": start, "end": end, "weeks": min(window_weeks, len(dates))},
+        "latest": end,
+        "previous": dates[-2] if len(dates) >= 2 else None,
+        "dimensions": {},
+    }
+
+    for dimension in DIGEST_DIMENSIONS:
+        if dimension not in store:
+            continue
+        trend = store.dimensions[dimension]
+        changes = _week_over_week(trend)
+        rising = sorted((row for row in changes if row["delta"] > 0), key=lambda x: (-x["delta"], x["entity"]))
+        falling = sorted((row for row in changes if row["delta"] < 0), key=lambda x: (x["delta"], x["entity"]))
+        digest["dimensions"][dimension] = {
+            "top": [{"entity": entity, "count": count} for entity, count in store.top_k(dimension, start, end, top_k)],
+            "rising": rising[:top_k],
+            "falling": falling[:top_k],
+            "new": _new_entities(trend, top_k),
+        }
+    return digest
+
+
+def write_digest(path, digest):
+    """ダイジェストを書き出す"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(digest, f, ensure_ascii=False, indent=2)
+
+
+def is_stale(digest, as_of, max_age_weeks):
+    """ダイジェストの最新週が as_of（date）より max_age_weeks 週を超えて古いか（0: 判定しない）"""
+    if not max_age_weeks or as_of is None:
+        return False
+    try:
+        latest = date.fromisoformat(digest["latest"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return as_of - latest > timedelta(weeks=max_age_weeks)
+
+
+def load_digest(path=None, as_of=None, max_age_weeks=None):
+    """
+    ダイジェストを読み込む
+
+    Args:
+        path (str): ダイジェストのパス（省略時は data.trends_dir/digest.json）
+        as_of (date): 今回のデータの日付（research_data.json の最新の公開日など）
+        max_age_weeks (int): as_of より古い場合に使わない週数（省略時は trends.digest.max_age_weeks）
+
+    Returns:
+        dict: ダイジェスト（ファイルがない・壊れている・古い場合は None）
+    """
+    config = get_config()
+    if path is None:
+        path = Path(config.get("data.trends_dir", "reports/trends")) / DIGEST_FILENAME
+    if max_age_weeks is None:
+        max_age_weeks = config.get("trends.digest.max_age_weeks", 2)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            digest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if is_stale(digest, as_of, max_age_weeks):
+        print(
+            f"⚠️ トレンドダイジェストの最新週（{digest.get('latest')}）が今回のデータ（{as_of}）より"
+            f"{max_age_weeks}週を超えて古いため使用しません（analyze_trends.py で更新してください）"
+        )
+        return None
+    return digest
+
+
+def format_digest(digest, max_chars=800):
+    """
+    ダイジェストをプロンプト用のテキストに変換
+
+    行単位で追加し、max_chars を超える手前で打ち切る。
+
+    Returns:
+        str: テキスト（内容がない場合は空文字）
+    """
+    if not digest or not digest.get("latest"):
+        return ""
+
+    window = digest["window"]
+    lines = [
+        f"集計期間: {digest['history']['start']} ～ {digest['history']['end']}（{digest['history']['weeks']}週分）",
+        f"比較: 最新週 {digest['latest']} / 前週 {digest.get('previous') or 'なし'}",
+    ]
+    for dimension, label in DIGEST_DIMENSIONS.items():
+        entry = digest["dimensions"].get(dimension)
+        if not entry:
+            continue
+        lines.append(f"■ {label}")
+        if entry["top"]:
+            items = "、".join(f"{row['entity']}({row['count']})" for row in entry["top"])
+            lines.append(f"- 直近{window['weeks']}週の上位: {items}")
+        if entry["rising"]:
+            items = "、".join(f"{row['entity']}(+{row['delta']}: {row['previous']}→{row['latest']})" for row in entry["rising"])
+            lines.append(f"- 前週比で増加: {items}")
+        if entry["falling"]:
+            items = "、".join(f"{row['entity']}({row['delta']}: {row['previous']}→{row['latest']})" for row in entry["falling"])
+            lines.append(f"- 前週比で減少: {items}")
+        if entry["new"]:
+            items = "、".join(row["entity"] for row in entry["new"])
+            lines.append(f"- 新規出現: {items}")
+
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > max_chars:
+            break
+        text += line + "\n"
+    return text.rstrip()
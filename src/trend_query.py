@@ -0,0 +1,254 @@
+"""
+トレンドデータの問い合わせユーティリティ
+analyze_trends.py が出力した時系列データ（reports/trends/*.json）に対して、
+期間を指定した上位K件・エンティティごとの推移を問い合わせる。
+
+- 全期間の件数・順位は v2 形式に事前計算済みの total / rank をそのまま使う（v1 形式は読み込み時に合計する）
+- 任意期間の件数は、エンティティごとの日付方向の累積和（初めて問い合わせたときに作成）の二分探索＋引き算で求まる
+- 全期間の上位K件は順位の先頭K件を返すだけ（O(K)）
+- 期間を指定した上位K件は、全期間の件数の多い順にエンティティを調べてヒープで選び、
+  残りのエンティティの全期間の件数がK位の件数以下になった時点で打ち切る（期間内の件数は全期間の件数を超えないため）。
+  偏りのある実データでは上位の一部だけを調べて終わるが、最悪の場合（全エンティティの件数が同程度）は O(E log K)
+
+使い方:
+    python src/trend_query.py top companies --start 2025-10-01 --end 2025-12-31 -k 5
+    python src/trend_query.py series AI --start 2025-10-01
+"""
+import heapq
+import argparse
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from pathlib import Path
+
+from config_loader import get_config
+from entity_normalizer import get_normalizer
+from trend_store import read_trend_file
+
+DIMENSIONS = ("keywords", "companies", "categories")
+
+# 正規化辞書の次元名との対応
+_NORMALIZER_DIMENSIONS = {"keywords": "tags", "companies": "companies"}
+
+
+class TrendDimension:
+    """1つの次元（キーワード・企業・カテゴリ）の時系列と累積和"""
+
+    def __init__(self, dates, series, totals=None):
+        """
+        Args:
+            dates (list): 日付（昇順）
+            series (dict): {エンティティ: 件数配列}
+            totals (dict): {エンティティ: 全期間の件数}（順位の順、v2形式の total / rank。省略時は合計する）
+        """
+        self.dates = list(dates)
+        self.series = series
+        if totals is None:
+            # 全期間の件数順（同数は入力順）
+            totals = {entity: sum(counts) for entity, counts in series.items()}
+            totals = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+        self.totals = totals
+        self.ranked = list(totals)
+        self._prefix = {}
+
+    def prefix(self, entity):
+        """エンティティの累積和（初めて使うときに作成）"""
+        prefix = self._prefix.get(entity)
+        if prefix is None:
+            counts = self.series.get(entity)
+            if counts is None:
+                return None
+            prefix = self._prefix[entity] = [0, *accumulate(counts)]
+        return prefix
+
+    def index_range(self, start=None, end=None):
+        """日付範囲 [start, end] に対応する配列の添字範囲 [i, j)"""
+        i = bisect_left(self.dates, start) if start else 0
+        j = bisect_right(self.dates, end) if end else len(self.dates)
+        return i, max(i, j)
+
+    def total(self, entity, start=None, end=None):
+        """期間内の件数"""
+        i, j = self.index_range(start, end)
+        if i == 0 and j == len(self.dates):
+            return self.totals.get(entity, 0)
+        prefix = self.prefix(entity)
+        if prefix is None:
+            return 0
+        return prefix[j] - prefix[i]
+
+    def top_k(self, start=None, end=None, k=5):
+        """期間内の件数が多い上位K件（同数は全期間の順位の順）"""
+        i, j = self.index_range(start, end)
+        if i == 0 and j == len(self.dates):
+            ranked = ((entity, self.totals[entity]) for entity in islice(self.ranked, k))
+            return [(entity, count) for entity, count in ranked if count > 0]
+        if k <= 0:
+            return []
+
+        heap = []  # (期間内の件数, -順位, エンティティ) の最小ヒープ
+        for order, entity in enumerate(self.ranked):
+            # 以降のエンティティは期間内の件数が全期間の件数（K位以下）を超えないため打ち切る
+            if len(heap) == k and self.totals[entity] <= heap[0][0]:
+                break
+            prefix = self.prefix(entity)
+            count = prefix[j] - prefix[i]
+            if count <= 0:
+                continue
+            item = (count, -order, entity)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [(entity, count) for count, _, entity in sorted(heap, reverse=True)]
+
+    def window(self, entity, start=None, end=None):
+        """期間内の (日付, 件数) の推移"""
+        counts = self.series.get(entity)
+        if counts is None:
+            return []
+        i, j = self.index_range(start, end)
+        return list(zip(self.dates[i:j], counts[i:j]))
+
+
+class TrendStore:
+    """トレンドデータの問い合わせ窓口"""
+
+    def __init__(self, dimensions):
+        """
+        Args:
+            dimensions (dict): {次元名: (日付リスト, {エンティティ: 件数配列}[, {エンティティ: 全期間の件数}])}
+        """
+        self.dimensions = {name: TrendDimension(*value) for name, value in dimensions.items()}
+
+    @classmethod
+    def load(cls, trends_dir=None):
+        """トレンドディレクトリから読み込む（.json がなければ .json.gz を使う）"""
+        if trends_dir is None:
+            trends_dir = get_config().get("data.trends_dir", "reports/trends")
+        trends_dir = Path(trends_dir)
+
+        dimensions = {}
+        for name in DIMENSIONS:
+            for path in (trends_dir / f"{name}.json", trends_dir / f"{name}.json.gz"):
+                if path.exists():
+                    dimensions[name] = read_trend_file(path, with_totals=True)
+                    break
+        return cls(dimensions)
+
+    def __contains__(self, dimension):
+        return dimension in self.dimensions
+
+    @property
+    def dates(self):
+        """全次元を通した日付（昇順）"""
+        return sorted(set(date for dimension in self.dimensions.values() for date in dimension.dates))
+
+    def recent_range(self, weeks):
+        """
+        直近N週分の期間
+
+        Returns:
+            tuple: (開始日, 終了日) データがない場合は (None, None)
+        """
+        dates = self.dates
+        if not dates:
+            return None, None
+        return dates[max(0, len(dates) - weeks)], dates[-1]
+
+    def top_k(self, dimension, start=None, end=None, k=5):
+        """
+        期間内の上位K件
+
+        Args:
+            dimension (str): "keywords" | "companies" | "categories"
+            start (str): 開始日（YYYY-MM-DD、含む）
+            end (str): 終了日（YYYY-MM-DD、含む）
+            k (int): 件数
+
+        Returns:
+            list: [(エンティティ, 件数), ...]
+        """
+        if dimension not in self.dimensions:
+            return []
+        return self.dimensions[dimension].top_k(start, end, k)
+
+    def resolve(self, entity, dimension=None):
+        """
+        エンティティ名から (次元, 正規形) を探す（表記ゆれは正規化してから照合する）
+
+        Returns:
+            tuple: (次元名, エンティティ) 見つからない場合は (None, None)
+        """
+        names = [dimension] if dimension else list(self.dimensions)
+        normalizer = get_normalizer()
+        for name in names:
+            trend = self.dimensions.get(name)
+            if trend is None:
+                continue
+            candidates = [entity]
+            if name in _NORMALIZER_DIMENSIONS:
+                candidates.append(normalizer.canonical(entity, _NORMALIZER_DIMENSIONS[name]))
+            for candidate in candidates:
+                if candidate in trend.series:
+                    return name, candidate
+        return None, None
+
+    def series(self, entity, start=None, end=None, dimension=None):
+        """
+        エンティティの期間内の推移
+
+        Returns:
+            list: [(日付, 件数), ...]（エンティティが見つからない場合は空）
+        """
+        dimension, entity = self.resolve(entity, dimension)
+        if dimension is None:
+            return []
+        return self.dimensions[dimension].window(entity, start, end)
+
+    def total(self, entity, start=None, end=None, dimension=None):
+        """エンティティの期間内の件数"""
+        dimension, entity = self.resolve(entity, dimension)
+        if dimension is None:
+            return 0
+        return self.dimensions[dimension].total(entity, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="トレンドデータの問い合わせ")
+    parser.add_argument("--trends-dir", default=None, help="トレンドデータのディレクトリ（既定: data.trends_dir）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    top = subparsers.add_parser("top", help="期間内の上位K件")
+    top.add_argument("dimension", choices=DIMENSIONS)
+    top.add_argument("--start", help="開始日（YYYY-MM-DD）")
+    top.add_argument("--end", help="終了日（YYYY-MM-DD）")
+    top.add_argument("-k", type=int, default=5, help="件数")
+
+    series = subparsers.add_parser("series", help="エンティティの推移")
+    series.add_argument("entity")
+    series.add_argument("--dimension", choices=DIMENSIONS)
+    series.add_argument("--start", help="開始日（YYYY-MM-DD）")
+    series.add_argument("--end", help="終了日（YYYY-MM-DD）")
+
+    args = parser.parse_args()
+    store = TrendStore.load(args.trends_dir)
+    period = f"{args.start or '最初'} ～ {args.end or '最新'}"
+
+    if args.command == "top":
+        results = store.top_k(args.dimension, args.start, args.end, args.k)
+        print(f"🏆 {args.dimension} 上位{args.k}件（{period}）")
+        for rank, (entity, count) in enumerate(results, start=1):
+            print(f"  {rank}. {entity}: {count}回")
+        if not results:
+            print("  （該当なし）")
+    else:
+        points = store.series(args.entity, args.start, args.end, args.dimension)
+        print(f"📈 {args.entity} の推移（{period}）")
+        for date, count in points:
+            print(f"  {date}: {count}回")
+        if not points:
+            print("  （該当なし）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+トレンドデータの保存形式
+analyze_trends.py が書き出す keywords.json / companies.json / categories.json の
+読み書きを扱う。
+
+v1（従来形式）: エンティティ×日付ごとに {"date", "count"} のオブジェクトを持つ
+    {"AI": [{"date": "2025-10-08", "count": 5}, ...], ...}
+
+v2（コンパクト形式）: 日付配列を共有し、エンティティごとに件数配列を持つ
+    {
+      "format_version": 2,
+      "dates": ["2025-10-08", "2025-10-15", ...],
+      "entities": {
+        "AI": {"total": 25, "rank": 1, "counts": [5, 8, 12]},          # 密な配列
+        "Kahuna": {"total": 3, "rank": 9, "index": [2], "values": [3]}  # 0が多い場合は疎な表現
+      }
+    }
+"""
+import gzip
+import json
+from pathlib import Path
+
+FORMAT_VERSION = 2
+FORMATS = ("v1", "v2")
+
+
+def rank_entities(series):
+    """総件数の多い順の順位（同数は入力順）"""
+    ordered = sorted(series, key=lambda entity: sum(series[entity]), reverse=True)
+    return {entity: rank for rank, entity in enumerate(ordered, start=1)}
+
+
+def encode_v2(dates, series, sparse_threshold=0.5):
+    """
+    件数配列をv2形式の辞書に変換
+
+    Args:
+        dates (list): 日付（昇順）
+        series (dict): {エンティティ: [日付ごとの件数]}
+        sparse_threshold (float): 0以外の割合がこれ未満なら疎な表現で保存する
+    """
+    ranks = rank_entities(series)
+    entities = {}
+    for entity, counts in series.items():
+        nonzero = [(i, count) for i, count in enumerate(counts) if count]
+        entry = {"total": sum(counts), "rank": ranks[entity]}
+        if dates and len(nonzero) / len(dates) < sparse_threshold:
+            entry["index"] = [i for i, _ in nonzero]
+            entry["values"] = [count for _, count in nonzero]
+        else:
+            entry["counts"] = list(counts)
+        entities[entity] = entry
+
+    return {"format_version": FORMAT_VERSION, "dates": list(dates), "entities": entities}
+
+
+def encode_v1(dates, series):
+    """件数配列をv1形式の辞書に変換"""
+    return {
+        entity: [{"date": date, "count": count} for date, count in zip(dates, counts)]
+        for entity, counts in series.items()
+    }
+
+
+def decode_totals(doc):
+    """
+    v2形式の事前計算済みの総件数を順位の順に取り出す
+
+    Returns:
+        dict: {エンティティ: 総件数}（順位の順、v1形式の場合は None）
+    """
+    if not (isinstance(doc, dict) and doc.get("format_version") == FORMAT_VERSION):
+        return None
+    entities = doc["entities"]
+    ordered = sorted(entities, key=lambda entity: entities[entity]["rank"])
+    return {entity: entities[entity]["total"] for entity in ordered}
+
+
+def decode(doc):
+    """
+    v1/v2どちらの形式からも (日付, {エンティティ: 件数配列}) を取り出す
+    """
+    if isinstance(doc, dict) and doc.get("format_version") == FORMAT_VERSION:
+        dates = doc["dates"]
+        series = {}
+        for entity, entry in doc["entities"].items():
+            if "counts" in entry:
+                series[entity] = list(entry["counts"])
+            else:
+                counts = [0] * len(dates)
+                for i, value in zip(entry["index"], entry["values"]):
+                    counts[i] = value
+                series[entity] = counts
+        return dates, series
+
+    # v1: 全エンティティが同じ日付列を持つ（0埋め済み）
+    dates = []
+    series = {}
+    for entity, points in doc.items():
+        if not dates:
+            dates = [point["date"] for point in points]
+        series[entity] = [point["count"] for point in points]
+    return dates, series
+
+
+def write_trend_file(path, dates, series, trend_format="v2", gzip_sidecar=False):
+    """
+    トレンドデータを書き出す
+
+    Args:
+        path (Path): 出力先（例: reports/trends/keywords.json）
+        dates (list): 日付（昇順）
+        series (dict): {エンティティ: [日付ごとの件数]}
+        trend_format (str): "v1" | "v2"
+        gzip_sidecar (bool): 同じ内容の .gz ファイルも書き出すか
+    """
+    path = Path(path)
+    if trend_format == "v1":
+        text = json.dumps(encode_v1(dates, series), ensure_ascii=False, indent=2)
+    elif trend_format == "v2":
+        text = json.dumps(encode_v2(dates, series), ensure_ascii=False, separators=(",", ":"))
+    else:
+        raise ValueError(f"未対応のトレンド形式です: {trend_format}（{' / '.join(FORMATS)}）")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    if gzip_sidecar:
+        with gzip.open(path.with_name(path.name + ".gz"), "wt", encoding="utf-8") as f:
+            f.write(text)
+
+
+def read_trend_file(path, with_totals=False):
+    """
+    トレンドデータを読み込む（v1/v2、.gz のいずれにも対応）
+
+    Args:
+        with_totals (bool): v2形式の事前計算済みの総件数（decode_totals）も返すか
+
+    Returns:
+        tuple: (日付リスト, {エンティティ: 件数配列})、with_totals の場合は (日付, 件数配列, 総件数 or None)
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            doc = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+
+    dates, series = decode(doc)
+    if with_totals:
+        return dates, series, decode_totals(doc)
+    return dates, series
@@ -0,0 +1,19 @@
+"""
+テスト共通の設定
+src/ のモジュールをスクリプトと同じく直接 import できるようにし、
+実行ログ・再送キューなどの出力先（reports/ 配下の相対パス）を一時ディレクトリに向ける。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    """作業ディレクトリを一時ディレクトリにする"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,84 @@
+"""
+article_model.py の Article と JSON の相互変換のテスト
+"""
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from article_model import JSON_FIELDS, Article, articles_from_dicts, articles_to_dicts, save_weekly_data
+
+REPORTS_DIR = Path(__file__).resolve().parent.parent / "reports"
+WEEKLY_FILES = sorted((REPORTS_DIR / "weekly_data").glob("*.json"))
+SAVED_FILES = sorted([REPORTS_DIR / "research_data.json", *WEEKLY_FILES])
+
+
+def saved_articles(path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data if isinstance(data, list) else data.get("articles", [])
+
+
+@pytest.mark.parametrize("path", SAVED_FILES, ids=lambda path: path.name)
+def test_to_dict_keeps_saved_key_order(path):
+    items = saved_articles(path)
+    if not items:
+        pytest.skip("記事なし")
+
+    for original, converted in zip(items, articles_to_dicts(articles_from_dicts(items))):
+        assert list(converted) == list(original)
+        assert list(converted) == list(JSON_FIELDS)
+
+
+def test_round_trip_keeps_values():
+    item = {
+        "title": "記事",
+        "url": "https://example.com/a",
+        "source": "Example",
+        "published_date": "2026-10-15",
+        "region": "北米",
+        "category": "事例",
+        "related_companies": ["AG5"],
+        "summary_japanese": "要約",
+        "key_points": ["ポイント"],
+        "tags": ["skills"],
+        "manufacturing_relevance": "あり",
+        "relevance_reason": "工場の事例",
+        "confidence_score": 0.9,
+    }
+
+    article = Article.from_dict(item)
+
+    assert article.to_dict() == item
+    assert article.published.isoformat() == "2026-10-15"
+
+
+def test_for_counting_matches_from_dict_for_counted_fields():
+    items = [item for path in SAVED_FILES for item in saved_articles(path) if isinstance(item, dict)]
+    items.append({"tags": "AI, DX", "related_companies": "なし", "category": "事例"})
+
+    full = articles_from_dicts(items)
+    light = [Article.for_counting(item) for item in items]
+
+    for field in ("tags", "related_companies", "category"):
+        assert [getattr(article, field) for article in light] == [getattr(article, field) for article in full]
+    assert all(article.published is None for article in light)
+
+
+def test_saved_weekly_data_has_the_archive_shape(workspace):
+    items = [item for path in SAVED_FILES for item in saved_articles(path) if isinstance(item, dict)]
+    articles = articles_from_dicts(items)
+
+    path = save_weekly_data(articles, "reports/weekly_data", date(2026, 10, 19), date(2026, 10, 12), date(2026, 10, 19))
+
+    assert path == Path("reports/weekly_data/20261019.json")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["metadata"]["report_date"] == "2026-10-19"
+    assert data["metadata"]["article_count"] == len(articles)
+    assert data["articles"] == articles_to_dicts(articles)
+    if WEEKLY_FILES:
+        # analyze_trends.py が読む既存の週次データと同じキー
+        existing = json.loads(WEEKLY_FILES[-1].read_text(encoding="utf-8"))
+        assert list(data) == list(existing)
+        assert list(data["metadata"]) == list(existing["metadata"])
+        assert list(data["extracted_insights"]) == list(existing["extracted_insights"])
@@ -0,0 +1,131 @@
+"""
+article_schema.py の整形結果の読み取り・検証と、構造化出力の設定のテスト
+"""
+import json
+
+import pytest
+
+from article_schema import ARTICLE_JSON_SCHEMA, parse_article_array, strip_code_fence, validate_articles
+
+
+def article(index):
+    return {
+        "title": f"記事{index}",
+        "url": f"https://example.com/{index}",
+        "source": "Example",
+        "published_date": "2026-10-15",
+        "related_companies": ["AG5"],
+        "key_points": ["ポイント"],
+        "tags": ["skills"],
+        "manufacturing_relevance": "あり",
+        "confidence_score": 0.8,
+    }
+
+
+def test_code_fenced_array_is_read():
+    text = "```json\n" + json.dumps([article(1), article(2)], ensure_ascii=False, indent=2) + "\n```"
+
+    records, complete = parse_article_array(text)
+
+    assert complete is True
+    assert [record["title"] for record in records] == ["記事1", "記事2"]
+    assert strip_code_fence("```\n[]\n```") == "[]"
+
+
+def test_truncated_final_object_keeps_complete_articles():
+    text = json.dumps([article(1), article(2), article(3)], ensure_ascii=False, indent=2)
+    truncated = text[: text.index('"記事3"') + 10]
+
+    records, complete = parse_article_array(truncated)
+
+    assert complete is False
+    assert [record["title"] for record in records] == ["記事1", "記事2"]
+
+
+def test_truncated_wrapped_object_keeps_complete_articles():
+    text = json.dumps({"articles": [article(1), article(2), article(3)]}, ensure_ascii=False, indent=2)
+    truncated = text[: text.index('"記事3"') + 10]
+
+    records, complete = parse_article_array(truncated)
+
+    assert complete is False
+    assert [record["title"] for record in records] == ["記事1", "記事2"]
+
+
+def test_broken_element_in_the_middle_is_skipped():
+    text = "[" + json.dumps(article(1), ensure_ascii=False) + ', {"title": "壊れた記事", "url": }, ' \
+        + json.dumps(article(3), ensure_ascii=False) + "]"
+
+    records, complete = parse_article_array(text)
+
+    assert complete is False
+    assert [record["title"] for record in records] == ["記事1", "記事3"]
+
+
+def test_wrapped_object_and_missing_array():
+    records, complete = parse_article_array(json.dumps({"articles": [article(1)]}))
+    assert (len(records), complete) == (1, True)
+
+    with pytest.raises(json.JSONDecodeError):
+        parse_article_array("JSONではない出力")
+
+
+def test_wrong_typed_fields_are_coerced():
+    record = dict(
+        article(1),
+        related_companies="AG5, Kahuna",
+        key_points="なし",
+        tags=None,
+        manufacturing_relevance=True,
+        confidence_score="80%",
+        region=["北米", "欧州"],
+    )
+
+    [coerced], report = validate_articles([record])
+
+    assert coerced["related_companies"] == ["AG5", "Kahuna"]
+    assert coerced["key_points"] == []
+    assert coerced["tags"] == []
+    assert coerced["manufacturing_relevance"] == "あり"
+    assert coerced["confidence_score"] == 0.8
+    assert coerced["region"] == "北米、欧州"
+    assert report == {"repaired": 1, "dropped": []}
+
+
+def test_articles_without_required_fields_are_dropped():
+    records = [article(1), dict(article(2), url="not a url"), "文字列", dict(article(4), title="")]
+
+    articles, report = validate_articles(records)
+
+    assert [item["title"] for item in articles] == ["記事1"]
+    assert [index for index, _ in report["dropped"]] == [2, 3, 4]
+
+
+def test_schema_is_sent_as_json_schema(monkeypatch):
+    """固定したバージョンの langchain-google-genai が記事スキーマをそのまま要求に含めること"""
+    pytest.importorskip("langchain_google_genai")
+    from langchain_core.messages import HumanMessage
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    model = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash-lite", response_mime_type="application/json", response_schema=ARTICLE_JSON_SCHEMA
+    )
+
+    request = model._prepare_request([HumanMessage(content="整形してください")])
+
+    assert request["config"].response_mime_type == "application/json"
+    assert request["config"].response_json_schema == ARTICLE_JSON_SCHEMA
+
+
+def test_schema_without_json_mime_type_is_rejected(monkeypatch):
+    """スキーマを無視して制約なしの出力に戻らず、エラーになること"""
+    pytest.importorskip("langchain_google_genai")
+    from langchain_core.messages import HumanMessage
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    model = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", response_schema=ARTICLE_JSON_SCHEMA)
+
+    with pytest.raises(ValueError, match="response_mime_type"):
+        model._prepare_request([HumanMessage(content="整形してください")])
@@ -0,0 +1,84 @@
+"""
+content_extractor.py の本文抽出・要約のテスト（benchmarks/fixtures/article_sample.html を使う）
+"""
+from pathlib import Path
+
+import pytest
+
+from content_extractor import ContentExtractor, extract_html, split_sentences, summarize
+
+FIXTURE = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "article_sample.html"
+
+# 本文の段落（書き出し）
+BODY_PARAGRAPHS = (
+    "A tier-one automotive supplier in Ohio has cut the time",
+    "The company, which employs roughly 2,300 hourly workers",
+    "The new system records every operator's qualifications",
+    "Trainers also use the matrix to plan cross-training.",
+    "After nine months, the supplier reports that onboarding time",
+    "The rollout was not without friction.",
+    "Analysts note that the project reflects a broader shift",
+    "The supplier plans to connect the matrix to its scheduling system",
+)
+
+# 本文以外（クッキー・ナビゲーション・広告・共有・関連記事・コメント・サイドバー・フッター）
+BOILERPLATE = (
+    "We use cookies",
+    "Operations",
+    "Sponsored: Upgrade your MES",
+    "Share on LinkedIn",
+    "Frontline training budgets rise",
+    "Great read.",
+    "Get the Plant Floor Weekly newsletter",
+    "OEE benchmarks for 2026",
+    "All rights reserved",
+    "Privacy",
+)
+
+
+@pytest.fixture(scope="module")
+def extracted():
+    return extract_html(FIXTURE.read_text(encoding="utf-8"))
+
+
+def test_body_paragraphs_are_kept(extracted):
+    title, paragraphs = extracted
+
+    assert title.startswith("Midwest Auto Supplier Cuts Onboarding Time")
+    for opening in BODY_PARAGRAPHS:
+        assert sum(paragraph.startswith(opening) for paragraph in paragraphs) == 1, opening
+
+
+def test_navigation_and_footer_are_dropped(extracted):
+    _, paragraphs = extracted
+    text = "\n".join(paragraphs)
+
+    for boilerplate in BOILERPLATE:
+        assert boilerplate not in text, boilerplate
+
+
+@pytest.mark.parametrize("max_sentences, max_chars", [(5, 800), (2, 800), (5, 300), (3, 120)])
+def test_summary_respects_limits(extracted, max_sentences, max_chars):
+    _, paragraphs = extracted
+    sentences = split_sentences(paragraphs)
+
+    summary = summarize(paragraphs, max_sentences=max_sentences, max_chars=max_chars)
+
+    assert summary
+    assert len(summary) <= max_chars
+    chosen = [sentence for sentence in sentences if sentence[:40] in summary]
+    assert 1 <= len(chosen) <= max_sentences
+    # 選んだ文は元の順に並べる
+    assert [summary.index(sentence[:40]) for sentence in chosen] == sorted(summary.index(sentence[:40]) for sentence in chosen)
+
+
+def test_compress_result_replaces_raw_content():
+    extractor = ContentExtractor(max_sentences=3, max_chars=500)
+    result = {"title": "t", "url": "https://example.com", "content": "短いスニペット", "raw_content": FIXTURE.read_text(encoding="utf-8")}
+
+    compressed = extractor.compress_result(result)
+
+    assert "raw_content" not in compressed
+    assert compressed["extracted"] is True
+    assert 0 < len(compressed["content"]) <= 500
+    assert "We use cookies" not in compressed["content"]
@@ -0,0 +1,220 @@
+"""
+mail_delivery.py の配信・再送キューのテスト
+aiosmtpd のローカルSMTPサーバーに実際に送信して確認する。
+"""
+import sys
+import socket
+import smtplib
+from datetime import datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+import mail_delivery
+from mail_delivery import MailDelivery, RetryQueue, SMTPSession, is_transient_error
+
+SENDER = "sender@example.com"
+
+
+class RecordingHandler:
+    """受信したエンベロープを記録し、指定した回数だけ RCPT を一時エラー（451）で拒否する"""
+
+    def __init__(self):
+        self.envelopes = []
+        self.refuse_rcpt = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.refuse_rcpt:
+            self.refuse_rcpt -= 1
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def make_delivery(controller, queue_dir, **options):
+    session = SMTPSession("127.0.0.1", controller.port, use_ssl=False, timeout=5)
+    options.setdefault("batch_delay", 0)
+    return MailDelivery(session, SENDER, queue_dir=queue_dir, **options)
+
+
+def _header(envelope, name):
+    return message_from_bytes(envelope.content)[name]
+
+
+def test_per_recipient_sends_one_message_per_address(smtp_server, workspace):
+    controller, handler = smtp_server
+    recipients = ["a@example.com", "b@example.com", "c@example.com"]
+    delivery = make_delivery(controller, workspace / "mail_queue", batch_size=2)
+
+    stats = delivery.send("件名", "<p>本文</p>", recipients)
+
+    assert [envelope.rcpt_tos for envelope in handler.envelopes] == [[address] for address in recipients]
+    assert [_header(envelope, "To") for envelope in handler.envelopes] == recipients
+    assert stats["sent"] == 3
+    assert stats["recipients"] == 3
+    assert stats["queued"] == 0
+    assert stats["connections"] == 1
+
+
+def test_segment_mode_groups_recipients_in_the_envelope(smtp_server, workspace):
+    controller, handler = smtp_server
+    recipients = [f"user{i}@example.com" for i in range(5)]
+    delivery = make_delivery(controller, workspace / "mail_queue", mode="segment", segment_size=2)
+
+    stats = delivery.send("件名", "<p>本文</p>", recipients)
+
+    assert [envelope.rcpt_tos for envelope in handler.envelopes] == [recipients[0:2], recipients[2:4], recipients[4:]]
+    # 宛先同士にアドレスが見えないよう、To は送信者のみ
+    assert all(_header(envelope, "To") == SENDER for envelope in handler.envelopes)
+    assert stats["sent"] == 3
+    assert stats["recipients"] == 5
+
+
+@pytest.mark.parametrize("mode", ["per_recipient", "segment"])
+def test_send_test_command(smtp_server, monkeypatch, mode):
+    controller, handler = smtp_server
+    monkeypatch.setattr(sys, "argv", [
+        "mail_delivery.py", "send-test", "--host", "127.0.0.1", "--port", str(controller.port), "--no-ssl",
+        "--to", "a@example.com,b@example.com", "--mode", mode,
+    ])
+
+    with pytest.raises(SystemExit) as exit_info:
+        mail_delivery.main()
+
+    assert exit_info.value.code == 0
+    assert sorted(address for envelope in handler.envelopes for address in envelope.rcpt_tos) == [
+        "a@example.com", "b@example.com",
+    ]
+
+
+@pytest.mark.parametrize("error, expected", [
+    (smtplib.SMTPResponseException(421, b"Service not available"), True),
+    (smtplib.SMTPResponseException(451, b"Try again later"), True),
+    (smtplib.SMTPResponseException(550, b"Mailbox unavailable"), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (451, b"later"), "b@example.com": (452, b"full")}), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (451, b"later"), "b@example.com": (550, b"unknown")}), False),
+    (smtplib.SMTPServerDisconnected("Connection unexpectedly closed"), True),
+    (socket.timeout("timed out"), True),
+    (ConnectionRefusedError("refused"), True),
+    (smtplib.SMTPAuthenticationError(535, b"Bad credentials"), False),
+    (ValueError("broken message"), False),
+])
+def test_is_transient_error(error, expected):
+    assert is_transient_error(error) is expected
+
+
+def test_transient_failure_is_queued_and_flushed_after_backoff(smtp_server, workspace):
+    controller, handler = smtp_server
+    queue_dir = workspace / "mail_queue"
+    handler.refuse_rcpt = 1
+    delivery = make_delivery(controller, queue_dir, retry_backoff=60, inline_retries=0)
+
+    before = datetime.now()
+    stats = delivery.send("件名", "<p>本文</p>", ["a@example.com"])
+
+    assert stats["sent"] == 0
+    assert stats["queued"] == 1
+    assert handler.envelopes == []
+    # キューはディレクトリに保存され、別の実行（インスタンス）から読み込める
+    queue = RetryQueue(queue_dir)
+    [entry] = queue.pending()
+    assert entry["to_addrs"] == ["a@example.com"]
+    assert entry["attempts"] == 1
+    assert "451" in entry["last_error"]
+    assert datetime.fromisoformat(entry["next_attempt_at"]) >= before.replace(microsecond=0) + timedelta(seconds=60)
+    assert (queue_dir / f"{entry['id']}.eml").exists()
+
+    # 再送時刻の前は送らない
+    retry = make_delivery(controller, queue_dir, retry_backoff=60)
+    with retry.session:
+        retry.flush_queue()
+    assert handler.envelopes == []
+    assert len(RetryQueue(queue_dir).pending()) == 1
+
+    # 再送時刻を過ぎたら送信し、キューから削除する
+    with retry.session:
+        retry.flush_queue(now=datetime.now() + timedelta(seconds=61))
+    assert [envelope.rcpt_tos for envelope in handler.envelopes] == [["a@example.com"]]
+    assert RetryQueue(queue_dir).entries == []
+    assert not (queue_dir / f"{entry['id']}.eml").exists()
+    assert retry.stats.retried == 1
+
+
+def test_requeue_doubles_backoff_until_max_attempts(smtp_server, workspace):
+    controller, handler = smtp_server
+    queue_dir = workspace / "mail_queue"
+    handler.refuse_rcpt = 100
+    delivery = make_delivery(controller, queue_dir, retry_backoff=60, max_attempts=3, inline_retries=0)
+    delivery.send("件名", "<p>本文</p>", ["a@example.com"])
+
+    later = datetime.now() + timedelta(days=1)
+    with delivery.session:
+        delivery.flush_queue(now=later)
+    [entry] = RetryQueue(queue_dir).pending()
+    assert entry["attempts"] == 2
+    # 2回目の失敗後は retry_backoff × 2 秒後
+    delay = datetime.fromisoformat(entry["next_attempt_at"]) - datetime.now()
+    assert timedelta(seconds=110) < delay <= timedelta(seconds=120)
+
+    with delivery.session:
+        delivery.flush_queue(now=later)
+    queue = RetryQueue(queue_dir)
+    assert queue.pending() == []
+    assert [(entry["status"], entry["attempts"]) for entry in queue.entries] == [("failed", 3)]
+    assert [address for address, _ in delivery.stats.failed] == ["a@example.com"]
+    assert handler.envelopes == []
+
+
+def test_inline_retry_delivers_within_the_same_run(smtp_server, workspace):
+    controller, handler = smtp_server
+    queue_dir = workspace / "mail_queue"
+    handler.refuse_rcpt = 1
+    delivery = make_delivery(controller, queue_dir, inline_retries=2, inline_retry_delay=0)
+
+    stats = delivery.send("件名", "<p>本文</p>", ["a@example.com", "b@example.com"])
+
+    assert sorted(address for envelope in handler.envelopes for address in envelope.rcpt_tos) == [
+        "a@example.com", "b@example.com",
+    ]
+    assert stats["sent"] == 2
+    assert stats["recipients"] == 2
+    assert stats["queued"] == 0
+    assert stats["retried"] == 1
+    assert RetryQueue(queue_dir).entries == []
+
+
+def test_inline_retries_are_bounded(smtp_server, workspace):
+    controller, handler = smtp_server
+    handler.refuse_rcpt = 100
+    delivery = make_delivery(controller, workspace / "mail_queue", inline_retries=2, inline_retry_delay=0)
+
+    stats = delivery.send("件名", "<p>本文</p>", ["a@example.com"])
+
+    assert stats["sent"] == 0
+    assert stats["retried"] == 2
+    assert stats["queued"] == 1
+    assert len(RetryQueue(workspace / "mail_queue").pending()) == 1
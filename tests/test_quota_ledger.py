@@ -0,0 +1,129 @@
+"""
+quota_ledger.py の上限の判定と、model_router.py のモデルの切り替えのテスト
+台帳は一時ディレクトリの SQLite、時計は仮想時計に差し替える。
+"""
+import pytest
+
+import instrumentation
+import model_router
+from instrumentation import RunRecorder
+from model_router import ModelRouter
+from quota_ledger import QuotaExhaustedError, QuotaLedger
+
+
+class VirtualClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds, reason=""):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = VirtualClock()
+    monkeypatch.setattr(QuotaLedger, "clock", staticmethod(clock.time))
+    return clock
+
+
+def make_ledger(workspace, limits=None, model_limits=None):
+    return QuotaLedger(workspace / "quota_ledger.sqlite", limits=limits, model_limits=model_limits)
+
+
+def fill(ledger, model, requests):
+    ledger.settle(ledger.reserve("gemini", model), requests=requests)
+
+
+def test_model_daily_limit_exhausts_only_that_model(clock, workspace):
+    ledger = make_ledger(
+        workspace,
+        limits={"gemini": {"requests_per_day": 250}},
+        model_limits={"gemini-2.5-flash": {"requests_per_day": 5}, "gemini-2.5-flash-lite": {"requests_per_day": 10}},
+    )
+    fill(ledger, "gemini-2.5-flash", 5)
+
+    with pytest.raises(QuotaExhaustedError) as error:
+        ledger.reserve("gemini", "gemini-2.5-flash")
+    assert error.value.scope == "gemini/gemini-2.5-flash"
+    # 提供元の1日の上限はモデルごとの上限があるモデルには使わないため、別のモデルは呼び出せる
+    assert ledger.reserve("gemini", "gemini-2.5-flash-lite") is not None
+    assert ledger.remaining_today("gemini", "gemini-2.5-flash") == 0
+    assert ledger.remaining_today("gemini", "gemini-2.5-flash-lite") == 9
+
+
+def test_provider_daily_limit_applies_without_model_limits(clock, workspace):
+    ledger = make_ledger(workspace, limits={"gemini": {"requests_per_day": 3}})
+    fill(ledger, "a", 2)
+    fill(ledger, "b", 1)
+
+    with pytest.raises(QuotaExhaustedError) as error:
+        ledger.reserve("gemini", "c")
+    assert error.value.scope == "gemini"
+
+
+def test_requests_per_minute_counts_expected_agent_steps(clock, workspace):
+    ledger = make_ledger(workspace, limits={"gemini": {"requests_per_minute": 10}})
+    ledger.reserve("gemini", "m", sleep=clock.sleep, requests=4)
+    clock.now += 1
+    ledger.reserve("gemini", "m", sleep=clock.sleep, requests=4)
+    clock.now += 1
+    assert clock.sleeps == []
+
+    # 4 + 4 + 4 > 10 のため、最初の予約が1分前になるまで待つ
+    ledger.reserve("gemini", "m", sleep=clock.sleep, requests=4)
+    assert clock.sleeps == [58.0]
+
+
+def test_tokens_per_minute_uses_estimate_until_settled(clock, workspace):
+    ledger = make_ledger(workspace, limits={"gemini": {"tokens_per_minute": 1000}})
+    reservation = ledger.reserve("gemini", "m", sleep=clock.sleep, tokens=800)
+    clock.now += 1
+
+    # 見込みの 800 トークンで上限に近いため、次の 300 トークンは待つ
+    ledger.reserve("gemini", "m", sleep=clock.sleep, tokens=300)
+    assert clock.sleeps == [59.0]
+
+    # 実際のトークン数で置き換えた後は、その分だけで判定する
+    clock.sleeps.clear()
+    ledger.settle(reservation, input_tokens=100, output_tokens=50)
+    ledger.reserve("gemini", "m", sleep=clock.sleep, tokens=300)
+    assert clock.sleeps == []
+
+
+def test_router_fails_over_when_model_daily_limit_is_reached(clock, workspace, monkeypatch):
+    ledger = make_ledger(
+        workspace,
+        limits={"gemini": {"requests_per_day": 250}},
+        model_limits={"gemini-2.5-flash": {"requests_per_day": 2}, "gemini-2.5-flash-lite": {"requests_per_day": 10}},
+    )
+    recorder = RunRecorder(workspace / "run_logs", run_id="test")
+    monkeypatch.setattr(instrumentation, "get_quota_ledger", lambda: ledger)
+    monkeypatch.setattr(model_router, "get_recorder", lambda: recorder)
+    fill(ledger, "gemini-2.5-flash", 2)
+
+    called = []
+    router = ModelRouter("email", ["gemini-2.5-flash", "gemini-2.5-flash-lite"], factory=lambda name: name, ledger=ledger)
+    response = router.invoke("llm", lambda model: called.append(model) or "ok", attempt=1)
+
+    assert response == "ok"
+    assert called == ["gemini-2.5-flash-lite"]
+    assert router.last_model == "gemini-2.5-flash-lite"
+    failovers = [event for event in recorder.load_events() if event["kind"] == "failover"]
+    assert [(event["from_model"], event["to_model"]) for event in failovers] == [
+        ("gemini-2.5-flash", "gemini-2.5-flash-lite"),
+    ]
+
+
+def test_daily_limit_counts_the_reserved_requests(clock, workspace):
+    ledger = make_ledger(workspace, limits={"gemini": {"requests_per_day": 250}})
+    fill(ledger, "m", 248)
+
+    # 残り2回のため、5回分（エージェントの見込みのステップ数）の予約は受け付けない
+    with pytest.raises(QuotaExhaustedError):
+        ledger.reserve("gemini", "m", requests=5)
+    assert ledger.reserve("gemini", "m", requests=2) is not None
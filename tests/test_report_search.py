@@ -0,0 +1,63 @@
+"""
+report_search.py の検索式の変換と全文検索のテスト
+"""
+import json
+import sqlite3
+
+import pytest
+
+from report_search import ReportSearch, to_fts_query
+
+
+@pytest.fixture
+def index(workspace):
+    weekly_data_dir = workspace / "reports" / "weekly_data"
+    weekly_data_dir.mkdir(parents=True)
+    path = weekly_data_dir / "20261019.json"
+    articles = [
+        {"title": "Kahuna のスキル管理", "url": "https://example.com/1", "source": "Example",
+         "summary_japanese": "製造業の技能伝承の事例", "key_points": [], "related_companies": ["Kahuna"]},
+        {"title": "AG5 の資格管理", "url": "https://example.com/2", "source": "Example",
+         "summary_japanese": "工場の資格管理の事例", "key_points": [], "related_companies": ["AG5"]},
+    ]
+    path.write_text(json.dumps({"metadata": {"report_date": "2026-10-19"}, "articles": articles}, ensure_ascii=False),
+                    encoding="utf-8")
+    index = ReportSearch(workspace / "search_index.sqlite")
+    index.sync([path])
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Kahuna AND", '"kahuna"'),
+    ("NOT Kahuna", '"kahuna"'),
+    ("AND", ""),
+    ("(Kahuna", '"kahuna"'),
+    ("Kahuna)", '"kahuna"'),
+    ("Kahuna AND OR 製造業", '"kahuna" AND "製造 造業"'),
+    ("Kahuna (AG5 OR)", '"kahuna" AND ( "ag5" )'),
+    ('"技能伝承" NOT AI', '"技能 能伝 伝承" NOT "ai"'),
+])
+def test_invalid_operators_and_parentheses_are_dropped(query, expected):
+    assert to_fts_query(query) == expected
+
+
+@pytest.mark.parametrize("query", ["Kahuna AND", "NOT Kahuna", "AND", "(Kahuna", "Kahuna OR (AG5", "() Kahuna NOT"])
+def test_malformed_queries_do_not_raise(index, query):
+    results = index.search(query)
+
+    assert all(result["kind"] == "article" for result in results)
+
+
+def test_operators_are_applied(index):
+    assert sorted(result["url"] for result in index.search("Kahuna OR AG5")) == [
+        "https://example.com/1", "https://example.com/2",
+    ]
+    assert [result["url"] for result in index.search("事例 NOT Kahuna")] == ["https://example.com/2"]
+
+
+def test_fts_error_is_reported_instead_of_raised(index, monkeypatch, capsys):
+    monkeypatch.setattr("report_search.to_fts_query", lambda query: 'AND "kahuna"')
+
+    assert index.search("Kahuna") == []
+    assert "❌" in capsys.readouterr().out
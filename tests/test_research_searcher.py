@@ -0,0 +1,86 @@
+"""
+research_searcher.py の JSON整形（Phase 2）の再試行のテスト
+エージェント・整形モデルは偽物に差し替え、API は呼び出さない。
+"""
+import pytest
+
+pytest.importorskip("langgraph")
+from langchain_core.messages import AIMessage
+
+import instrumentation
+import model_router
+import research_searcher
+from config_loader import get_config
+
+AGENT_OUTPUT = "\n---\n".join(
+    f"タイトル: 記事{i}\nURL: https://example.com/{i}\n公開日: 2026-10-15\n要約: " + "製造業のスキル管理の事例。" * 20
+    for i in range(3)
+)
+
+
+class FakeAgent:
+    def invoke(self, inputs, config=None):
+        return {"messages": [AIMessage(content=AGENT_OUTPUT)]}
+
+
+class FakeChatModel:
+    """整形モデルの偽物（作成時の引数と呼び出しを記録し、outputs を順に返す）"""
+
+    instances = []
+    outputs = []
+    calls = 0
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        FakeChatModel.instances.append(self)
+
+    def invoke(self, messages):
+        FakeChatModel.calls += 1
+        output = FakeChatModel.outputs.pop(0) if len(FakeChatModel.outputs) > 1 else FakeChatModel.outputs[0]
+        if isinstance(output, Exception):
+            raise output
+        return AIMessage(content=output)
+
+
+@pytest.fixture
+def searcher(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    monkeypatch.setattr(instrumentation, "get_quota_ledger", lambda: None)
+    monkeypatch.setattr(model_router, "get_quota_ledger", lambda: None)
+    monkeypatch.setattr(research_searcher, "InstrumentedTavilySearch", lambda **kwargs: object())
+    monkeypatch.setattr(research_searcher, "create_react_agent", lambda model, tools, **kwargs: FakeAgent())
+    monkeypatch.setattr(research_searcher, "ChatGoogleGenerativeAI", FakeChatModel)
+    FakeChatModel.instances = []
+    FakeChatModel.outputs = []
+    FakeChatModel.calls = 0
+    return research_searcher
+
+
+def formatting_models():
+    return [model for model in FakeChatModel.instances if "response_schema" in model.kwargs]
+
+
+def test_unparseable_output_exits_after_max_retries(searcher):
+    FakeChatModel.outputs = ["JSONではない出力"]
+
+    with pytest.raises(SystemExit) as exit_info:
+        searcher.search_and_extract_data()
+
+    assert exit_info.value.code == 1
+    # 整形は max_retries 回だけ呼び出す
+    assert FakeChatModel.calls == get_config().get("agent.max_retries", 3)
+    # 構造化出力のスキーマは毎回指定したまま（制約なしの出力に切り替えない）
+    assert formatting_models()
+    assert all(model.kwargs["response_mime_type"] == "application/json" for model in formatting_models())
+
+
+def test_rejected_schema_stops_without_retrying(searcher):
+    FakeChatModel.outputs = [ValueError("400 INVALID_ARGUMENT. response_json_schema: invalid schema")]
+
+    with pytest.raises(SystemExit) as exit_info:
+        searcher.search_and_extract_data()
+
+    assert exit_info.value.code == 1
+    assert FakeChatModel.calls == 1